@@ -6,7 +6,9 @@ import socketserver
 import sys
 import tempfile
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List
 
 from abcfold.alphafold3.run_alphafold3 import run_alphafold3
 from abcfold.argparse_utils import (alphafold_argparse_util,
@@ -17,16 +19,15 @@ from abcfold.argparse_utils import (alphafold_argparse_util,
                                     raise_argument_errors,
                                     visuals_argparse_util)
 from abcfold.html.html_utils import (PORT, NoCacheHTTPRequestHandler,
-                                     get_all_cif_files, get_model_data,
-                                     get_model_sequence_data,
-                                     output_open_html_script, plots,
-                                     render_template)
+                                     get_model_data, output_open_html_script,
+                                     plots, render_template)
 from abcfold.output.alphafold3 import AlphafoldOutput
 from abcfold.output.boltz import BoltzOutput
 from abcfold.output.chai import ChaiOutput
-from abcfold.output.utils import (get_gap_indicies, insert_none_by_minus_one,
-                                  make_dummy_m8_file)
-from abcfold.scripts.abc_script_utils import (check_input_json, make_dir,
+from abcfold.output.model_summary import ModelSummary, merge_sequence_data
+from abcfold.output.utils import make_dummy_m8_file
+from abcfold.scripts.abc_script_utils import (check_input_json,
+                                              has_protein_msa, make_dir,
                                               make_dummy_af3_db, setup_logger)
 from abcfold.scripts.add_mmseqs_msa import add_msa_to_json
 
@@ -35,6 +36,73 @@ logger = setup_logger()
 HTML_DIR = Path(__file__).parent / "html"
 HTML_TEMPLATE = HTML_DIR.joinpath("abcfold.html.jinja2")
 PLOTS_DIR = ".plots"
+# Name of each program on the output page
+PAGE_METHODS = {"Alphafold3": "AlphaFold3", "Boltz-1": "Boltz-1", "Chai-1": "Chai-1"}
+PROGRAM_NAMES = {"alphafold3": "AlphaFold3", "boltz1": "Boltz-1", "chai1": "Chai-1"}
+# Output directories of Boltz-1 and Chai-1, before and after they are processed
+ENGINE_DIRS = ("boltz_results", "boltz-1_", "chai1")
+
+
+def run_engines(args, run_json, alphafold3_task, boltz_task, chai_task) -> dict:
+    """
+    Run the selected programs and process their outputs. The programs run one
+    after another unless each was given its own devices with --gpus, in which case
+    they run at the same time. Boltz-1 and Chai-1 start from the data JSON written
+    by AlphaFold3 when they run after it, or when --reuse_af3_json is given
+
+    Args:
+        args (argparse.Namespace): Arguments from the command line
+        run_json (Path): Path to the input JSON of the run
+        alphafold3_task (Callable): Runs AlphaFold3, returns its output object or
+            None if it failed
+        boltz_task (Callable): Runs Boltz-1 from the given input JSON, returns its
+            output object or None if it failed
+        chai_task (Callable): Runs Chai-1 from the given input JSON, returns its
+            output object or None if it failed
+
+    Returns:
+        dict: Output object of each selected program, None if it failed
+    """
+    engine_outputs: dict = {}
+    if not args.concurrent_engines:
+        if args.alphafold3:
+            engine_outputs["alphafold3"] = alphafold3_task()
+            if engine_outputs["alphafold3"] is not None:
+                run_json = engine_outputs["alphafold3"].input_json
+        if args.boltz1:
+            engine_outputs["boltz1"] = boltz_task(run_json)
+        if args.chai1:
+            engine_outputs["chai1"] = chai_task(run_json)
+        return engine_outputs
+
+    def engine_json():
+        if args.reuse_af3_json and af3_future is not None:
+            alphafold3_output = af3_future.result()
+            if alphafold3_output is not None:
+                return alphafold3_output.input_json
+        return run_json
+
+    logger.info(
+        "Running "
+        + ", ".join(
+            f"{PROGRAM_NAMES[engine]} on {args.engine_gpus[engine]}"
+            for engine in PROGRAM_NAMES
+            if getattr(args, engine)
+        )
+        + " at the same time"
+    )
+    with ThreadPoolExecutor(max_workers=len(PROGRAM_NAMES)) as executor:
+        af3_future = executor.submit(alphafold3_task) if args.alphafold3 else None
+        futures = {"alphafold3": af3_future}
+        if args.boltz1:
+            futures["boltz1"] = executor.submit(lambda: boltz_task(engine_json()))
+        if args.chai1:
+            futures["chai1"] = executor.submit(lambda: chai_task(engine_json()))
+
+        for engine, future in futures.items():
+            if future is not None:
+                engine_outputs[engine] = future.result()
+    return engine_outputs
 
 
 def run(args, config, defaults, config_file):
@@ -52,8 +120,6 @@ def run(args, config, defaults, config_file):
 
 
     """
-    outputs = []
-
     args.output_dir = Path(args.output_dir)
 
     if args.mmseqs2:
@@ -89,17 +155,21 @@ def run(args, config, defaults, config_file):
         logger.error("Input JSON must contain a 'name' field")
         sys.exit(1)
 
-    if args.alphafold3:
+    if args.af3_results is not None and not Path(args.af3_results).is_dir():
+        logger.error(f"Alphafold3 results {args.af3_results} not found")
+        sys.exit(1)
+
+    if args.alphafold3 and args.af3_results is None:
         from abcfold.alphafold3.check_install import check_af3_install
 
         check_af3_install(interactive=False)
 
-    if args.boltz1:
+    if args.boltz1 and args.boltz_worker_socket is None:
         from abcfold.boltz1.check_install import check_boltz1
 
         check_boltz1()
 
-    if args.chai1:
+    if args.chai1 and args.chai_worker_socket is None:
         from abcfold.chai1.check_install import check_chai1
 
         check_chai1()
@@ -131,168 +201,120 @@ def run(args, config, defaults, config_file):
         else:
             run_json = Path(args.input_json)
 
-        successful_runs = []
-        if args.alphafold3:
-            af3_database = args.database_dir
-            if args.mmseqs2 or (
-                any(
-                    seq.get("protein", {}).get("unpairedMsa")
-                    or seq.get("protein", {}).get("unpairedMsaPath")
-                    for seq in input_params["sequences"]
-                    )):
-                af3_database = make_dummy_af3_db(temp_dir)
-
-            af3_success = run_alphafold3(
-                input_json=run_json,
-                output_dir=args.output_dir,
-                model_params=args.model_params,
-                database_dir=af3_database,
-                number_of_models=args.number_of_models,
-                num_recycles=args.num_recycles,
-                gpus=args.gpus,
-            )
-
-            if af3_success:
-                af3_out_dir = list(
-                    [
-                        dir_
-                        for dir_ in args.output_dir.glob(f"*{name.lower()}*")
-                        if dir_.is_dir()
-                    ]
-                )[0]
-                ao = AlphafoldOutput(af3_out_dir, input_params, name)
-                outputs.append(ao)
-                run_json = ao.input_json
-            successful_runs.append(af3_success)
-
-        if args.boltz1:
+        def alphafold3_task():
+            if args.af3_results is not None:
+                # Made beforehand, e.g. by one Alphafold3 run of many batch inputs
+                af3_results = Path(args.af3_results)
+                logger.info("Using the Alphafold3 results in %s", af3_results)
+                shutil.move(af3_results, args.output_dir.joinpath(af3_results.name))
+            else:
+                af3_database = args.database_dir
+                if args.mmseqs2 or has_protein_msa(input_params):
+                    af3_database = make_dummy_af3_db(temp_dir)
+
+                af3_success = run_alphafold3(
+                    input_json=run_json,
+                    output_dir=args.output_dir,
+                    model_params=args.model_params,
+                    database_dir=af3_database,
+                    number_of_models=args.number_of_models,
+                    num_recycles=args.num_recycles,
+                    gpus=args.engine_gpus["alphafold3"],
+                )
+                if not af3_success:
+                    return None
+
+            # The other programs may be writing to the output directory meanwhile
+            af3_out_dir = list(
+                [
+                    dir_
+                    for dir_ in args.output_dir.glob(f"*{name.lower()}*")
+                    if dir_.is_dir() and not dir_.name.startswith(ENGINE_DIRS)
+                ]
+            )[0]
+            return AlphafoldOutput(af3_out_dir, input_params, name, args.post_workers)
+
+        def boltz_task(engine_json):
             from abcfold.boltz1.run_boltz import run_boltz
 
             boltz_success = run_boltz(
-                input_json=run_json,
+                input_json=engine_json,
                 output_dir=args.output_dir,
                 save_input=args.save_input,
                 number_of_models=args.number_of_models,
                 num_recycles=args.num_recycles,
-                gpus=args.gpus,
+                gpus=args.engine_gpus["boltz1"],
+                worker_socket=args.boltz_worker_socket,
             )
+            if not boltz_success:
+                return None
 
-            if boltz_success:
-                bolt_out_dir = list(args.output_dir.glob("boltz_results*"))[0]
-                bo = BoltzOutput(bolt_out_dir, input_params, name)
-                outputs.append(bo)
-            successful_runs.append(boltz_success)
+            bolt_out_dir = list(args.output_dir.glob("boltz_results*"))[0]
+            return BoltzOutput(bolt_out_dir, input_params, name, args.post_workers)
 
-        if args.chai1:
+        def chai_task(engine_json):
             from abcfold.chai1.run_chai1 import run_chai
 
             template_hits_path = None
             if args.templates and args.mmseqs2:
                 template_hits_path = temp_dir.joinpath("all_chain.m8")
             elif args.templates:
-                template_hits_path = make_dummy_m8_file(run_json, temp_dir)
+                template_hits_path = make_dummy_m8_file(engine_json, temp_dir)
 
             chai_output_dir = args.output_dir.joinpath("chai1")
             chai_success = run_chai(
-                input_json=run_json,
+                input_json=engine_json,
                 output_dir=chai_output_dir,
                 save_input=args.save_input,
                 number_of_models=args.number_of_models,
                 num_recycles=args.num_recycles,
                 template_hits_path=template_hits_path,
-                device=args.gpus,
+                device=args.engine_gpus["chai1"],
+                worker_socket=args.chai_worker_socket,
             )
+            if not chai_success:
+                return None
+            return ChaiOutput(chai_output_dir, input_params, name, args.post_workers)
 
-            if chai_success:
-                co = ChaiOutput(chai_output_dir, input_params, name)
-                outputs.append(co)
-            successful_runs.append(chai_success)
+        engine_outputs = run_engines(
+            args, run_json, alphafold3_task, boltz_task, chai_task
+        )
+        outputs = [output for output in engine_outputs.values() if output is not None]
 
         if args.no_visuals:
             logger.info("Visuals disabled")
             return
 
-        if not any(successful_runs):
+        if not outputs:
             logger.error("No models were generated")
             return
 
-        plot_dict = plots(outputs, args.output_dir.joinpath(PLOTS_DIR))
+        # Every model is reduced to a compact summary and released as soon as its
+        # plots are prepared, the cross model steps only use the summaries
+        summaries: List[ModelSummary] = []
+        plot_dict = plots(outputs, args.output_dir.joinpath(PLOTS_DIR), summaries)
 
         # Compile data to make output page
-        programs_run = []
-        cif_models = [
-            cif_file
-            for cif_list in get_all_cif_files(outputs).values()
-            for cif_file in cif_list
+        programs_run = [
+            PROGRAM_NAMES[engine]
+            for engine, output in engine_outputs.items()
+            if output is not None
         ]
-        indicies = get_gap_indicies(*cif_models)
-        index_counter = 0
 
-        alphafold_models = {"models": []}
+        combined_models = [
+            get_model_data(
+                summary,
+                plot_dict,
+                PAGE_METHODS[summary.method],
+                summary.aligned_plddts,
+                args.output_dir,
+            )
+            for summary in summaries
+        ]
 
-        if args.alphafold3:
-            if af3_success:
-                programs_run.append("AlphaFold3")
-                for seed in ao.output.keys():
-                    for idx in ao.output[seed].keys():
-                        model = ao.output[seed][idx]["cif"]
-                        model.check_clashes()
-                        plddt = model.residue_plddts
-                        if len(indicies) > 0:
-                            plddt = insert_none_by_minus_one(
-                                indicies[index_counter],
-                                plddt
-                                )
-                        index_counter += 1
-                        model_data = get_model_data(
-                            model, plot_dict, "AlphaFold3", plddt, args.output_dir
-                        )
-                        alphafold_models["models"].append(model_data)
-
-        boltz_models = {"models": []}
-        if args.boltz1:
-            if boltz_success:
-                programs_run.append("Boltz-1")
-                for idx in bo.output.keys():
-                    model = bo.output[idx]["cif"]
-                    model.check_clashes()
-                    plddt = model.residue_plddts
-                    if len(indicies) > 0:
-                        plddt = insert_none_by_minus_one(
-                            indicies[index_counter],
-                            plddt
-                            )
-                    index_counter += 1
-                    model_data = get_model_data(
-                        model, plot_dict, "Boltz-1", plddt, args.output_dir
-                    )
-                    boltz_models["models"].append(model_data)
-
-        chai_models = {"models": []}
-        if args.chai1:
-            if chai_success:
-                programs_run.append("Chai-1")
-                for idx in co.output.keys():
-                    if idx >= 0:
-                        model = co.output[idx]["cif"]
-                        model.check_clashes()
-                        plddt = model.residue_plddts
-                        if len(indicies) > 0:
-                            plddt = insert_none_by_minus_one(
-                                indicies[index_counter],
-                                plddt
-                                )
-                        index_counter += 1
-                        model_data = get_model_data(
-                            model, plot_dict, "Chai-1", plddt, args.output_dir
-                        )
-                        chai_models["models"].append(model_data)
-
-        combined_models = (
-            alphafold_models["models"] + boltz_models["models"] + chai_models["models"]
+        sequence_data = merge_sequence_data(
+            summary.sequence_data for summary in summaries
         )
-
-        sequence_data = get_model_sequence_data(cif_models)
         sequence = ""
         for key in sequence_data.keys():
             sequence += sequence_data[key]
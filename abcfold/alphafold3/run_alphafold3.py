@@ -1,6 +1,10 @@
 from pathlib import Path
+import json
+import shutil
+import string
 import subprocess
 import logging
+from typing import Dict, List
 from rich.logging import RichHandler
 
 logger = logging.getLogger("alphafold3")
@@ -42,6 +46,136 @@ def run_alphafold3(
 
 
 
+def run_alphafold3_data_pipeline(
+    input_json: Path,
+    output_dir: Path,
+    model_params: Path,
+    database_dir: Path,
+    n_cpu: int = 8,
+) -> Path | None:
+    """
+    Run only the AlphaFold3 data pipeline (the jackhmmer/nhmmer MSA and template
+    search) on the CPU, without inference. Returns the data JSON holding the MSAs
+    and templates, None if the pipeline failed
+    """
+    cmd = _build_docker_cmd(
+        input_json, output_dir, model_params, database_dir, 1, 1, "cpu", False
+    )
+    cmd += [
+        "--run_inference=false",
+        f"--jackhmmer_n_cpu={n_cpu}",
+        f"--nhmmer_n_cpu={n_cpu}",
+    ]
+
+    logger.info("Running the Alphafold3 data pipeline for %s", input_json.name)
+    try:
+        subprocess.run(
+            cmd,
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+    except subprocess.CalledProcessError as e:
+        err_file = output_dir / "af3_error.log"
+        err_file.write_text(e.stderr or "")
+        logger.error("Alphafold3 data pipeline failed, see %s", err_file)
+        return None
+
+    data_jsons = sorted(output_dir.glob("*/*_data.json"))
+    return data_jsons[0] if data_jsons else None
+
+
+def run_alphafold3_batch(
+    input_jsons: List[Path],
+    output_dir: Path,
+    model_params: Path,
+    database_dir: Path,
+    number_of_models: int = 5,
+    num_recycles: int = 10,
+    gpus: str = "all",
+) -> Dict[Path, Path | None]:
+    """
+    Run Alphafold3 on many input JSONs in one container with `--input_dir`, so
+    the container start, JAX initialization and compilation are paid once for
+    all of them rather than once per input. Inputs whose job names would share
+    an output directory are run in separate containers.
+
+    Args:
+        input_jsons (List[Path]): Input JSONs, each with its own job name
+        output_dir (Path): Directory of the outputs, the output directory of each
+        job is made in a round_<n> directory for each container run
+        model_params (Path): Directory of the model parameters
+        database_dir (Path): Directory of the databases
+        number_of_models (int): Number of models of each job
+        num_recycles (int): Number of recycles
+        gpus (str): Device of the container
+
+    Returns:
+        Dict[Path, Path | None]: Output directory of each input JSON, None if
+        Alphafold3 wrote no model for it
+    """
+    job_names = {}
+    for input_json in input_jsons:
+        with open(input_json) as f:
+            job_names[input_json] = af3_job_dir_name(json.load(f)["name"])
+
+    job_dirs: Dict[Path, Path | None] = {}
+    pending = list(input_jsons)
+    round_ = 0
+    while pending:
+        group, names = [], set()
+        for input_json in pending:
+            if job_names[input_json] not in names:
+                names.add(job_names[input_json])
+                group.append(input_json)
+        pending = [input_json for input_json in pending if input_json not in group]
+
+        round_dir = output_dir.joinpath(f"round_{round_}")
+        input_dir = round_dir.joinpath("inputs")
+        input_dir.mkdir(parents=True, exist_ok=True)
+        for input_json in group:
+            shutil.copy(input_json, input_dir.joinpath(input_json.name))
+
+        cmd = _build_docker_cmd(
+            input_dir, round_dir, model_params, database_dir,
+            number_of_models, num_recycles, gpus, False
+        )
+        logger.info("Running Alphafold3 on %d inputs → GPU=%s", len(group), gpus)
+        try:
+            subprocess.run(
+                cmd,
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+        except subprocess.CalledProcessError as e:
+            # Alphafold3 stops at the first job that fails, the jobs run before
+            # it keep their outputs
+            err_file = round_dir / "af3_error.log"
+            err_file.write_text(e.stderr or "")
+            logger.error("Alphafold3 failed, see %s", err_file)
+        shutil.rmtree(input_dir, ignore_errors=True)
+
+        for input_json in group:
+            job_dir = round_dir.joinpath(job_names[input_json])
+            model = job_dir.joinpath(f"{job_names[input_json]}_model.cif")
+            job_dirs[input_json] = job_dir if model.is_file() else None
+        round_ += 1
+
+    return job_dirs
+
+
+def af3_job_dir_name(name: str) -> str:
+    """
+    Name of the output directory Alphafold3 makes for a job, its sanitised job
+    name
+    """
+    allowed = set(string.ascii_lowercase + string.digits + "_-.")
+    return "".join(c for c in name.lower().replace(" ", "_") if c in allowed)
+
+
 def _build_docker_cmd(
     input_json: Path,
     output_dir: Path,
@@ -53,6 +187,10 @@ def _build_docker_cmd(
     interactive: bool,
 ) -> list[str]:
 
+    """
+    Build the docker call running Alphafold3 on an input JSON, or on every JSON
+    in a directory if `input_json` is one
+    """
     cmd = ["docker", "run", "-i"] if interactive else ["docker", "run", "--rm"]
 
 
@@ -64,14 +202,21 @@ def _build_docker_cmd(
         cmd += ["--gpus", f"device={gpus}"]
 
 
+    if input_json.is_dir():
+        input_volume = input_json.resolve()
+        input_args = ["--input_dir", "/root/af_input"]
+    else:
+        input_volume = input_json.parent.resolve()
+        input_args = ["--json_path", f"/root/af_input/{input_json.name}"]
+
     cmd += [
-        "--volume", f"{input_json.parent.resolve()}:/root/af_input:ro",
+        "--volume", f"{input_volume}:/root/af_input:ro",
         "--volume", f"{output_dir.resolve()}:/root/af_output",
         "--volume", f"{model_params}:/root/models:ro",
         "--volume", f"{database_dir}:/root/public_databases:ro",
         "alphafold3",
         "python", "run_alphafold.py",
-        "--json_path", f"/root/af_input/{input_json.name}",
+        *input_args,
         "--model_dir", "/root/models",
         "--output_dir", "/root/af_output",
         "--num_diffusion_samples", str(n_models),
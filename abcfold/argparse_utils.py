@@ -1,9 +1,124 @@
 import logging
 import sys
 from pathlib import Path
+from typing import Dict, List
 
 logger = logging.getLogger("logger")
 
+ENGINES = ("alphafold3", "boltz1", "chai1")
+# Names accepted for each program in per-program --gpus assignments
+ENGINE_ALIASES = {
+    "af3": "alphafold3",
+    "alphafold3": "alphafold3",
+    "boltz": "boltz1",
+    "boltz1": "boltz1",
+    "boltz-1": "boltz1",
+    "chai": "chai1",
+    "chai1": "chai1",
+    "chai-1": "chai1",
+}
+
+
+def parse_gpus(gpus: str) -> Dict[str, str]:
+    """
+    Get the device of each program from the --gpus value. A single value, e.g.
+    'all', '0' or '0,1', is used by every program. Per-program assignments, e.g.
+    'af3=0,boltz=1,chai=2' or 'af3=0,1,chai=cpu', pin each program to its own
+    devices, programs without one use 'all'
+
+    Args:
+        gpus (str): Value of --gpus
+
+    Returns:
+        Dict[str, str]: Device of each program
+
+    Raises:
+        ValueError: If a program is unknown, assigned twice or has no device
+    """
+    if "=" not in gpus:
+        return dict.fromkeys(ENGINES, gpus)
+
+    assigned = gpu_assignments(gpus)
+    return {engine: ",".join(assigned.get(engine, ["all"])) for engine in ENGINES}
+
+
+def gpu_assignments(gpus: str) -> Dict[str, List[str]]:
+    """
+    Get the devices given to each program in per-program --gpus assignments,
+    see `parse_gpus`. Programs without an assignment are left out
+
+    Args:
+        gpus (str): Value of --gpus
+
+    Returns:
+        Dict[str, List[str]]: Devices of each assigned program
+
+    Raises:
+        ValueError: If a program is unknown, assigned twice or has no device
+    """
+    assigned: Dict[str, List[str]] = {}
+    engine = None
+    for part in gpus.split(","):
+        part = part.strip()
+        if "=" in part:
+            alias, part = (value.strip() for value in part.split("=", 1))
+            engine = ENGINE_ALIASES.get(alias.lower())
+            if engine is None:
+                raise ValueError(f"Unknown program in --gpus: {alias}")
+            if engine in assigned:
+                raise ValueError(f"Devices given twice for {alias} in --gpus")
+            assigned[engine] = []
+        elif engine is None:
+            raise ValueError(f"Device given without a program in --gpus: {part}")
+        if part:
+            assigned[engine].append(part)
+
+    for engine, engine_devices in assigned.items():
+        if not engine_devices:
+            raise ValueError(f"No device given for {engine} in --gpus")
+    return assigned
+
+
+def concurrent_engines(gpus: str, engines: List[str]) -> bool:
+    """
+    Whether the selected programs can run at the same time, which needs every
+    one of them pinned to its own devices in --gpus. Programs may share the CPU
+    but not a GPU
+
+    Args:
+        gpus (str): Value of --gpus
+        engines (List[str]): Programs selected to run
+
+    Returns:
+        bool: True if every selected program has devices no other one uses
+    """
+    if "=" not in gpus:
+        return False
+
+    assigned = gpu_assignments(gpus)
+    unassigned = [engine for engine in engines if engine not in assigned]
+    if unassigned:
+        logger.warning(
+            f"No devices given for {', '.join(unassigned)} in --gpus, running the "
+            "programs one after another"
+        )
+        return False
+
+    used: Dict[str, set] = {}
+    for engine in engines:
+        devices = set(assigned[engine]) - {"cpu"}
+        for other, other_devices in used.items():
+            if devices & other_devices or (
+                devices and other_devices and "all" in devices | other_devices
+            ):
+                logger.warning(
+                    f"{engine} and {other} share devices in --gpus, running the "
+                    "programs one after another"
+                )
+                return False
+        used[engine] = devices
+    return True
+
 
 def main_argpase_util(parser):
     parser.add_argument("input_json", help="Input sequence file")
@@ -12,7 +127,14 @@ def main_argpase_util(parser):
         "--gpus",
         type=str,
         default="all",
-        help="GPU device(s) to use, e.g. 'all', '0', '0,1', 'cpu'"
+        help="GPU device(s) to use, e.g. 'all', '0', '0,1', 'cpu'. Give every program \
+its own devices, e.g. 'af3=0,boltz=1,chai=2', to run the programs at the same time",
+    )
+    parser.add_argument(
+        "--post_workers",
+        type=int,
+        default=1,
+        help="Number of processes used to post-process the models of each program",
     )
 
     return parser
@@ -78,6 +200,12 @@ def boltz_argparse_util(parser):
         action="store_true",
         help="Run Boltz1",
     )
+    parser.add_argument(
+        "--boltz_worker_socket",
+        default=None,
+        help="Socket of a running Boltz1 worker (see abcfold.boltz1.run_boltz.\
+BoltzWorker) to send the prediction to, instead of starting a new Boltz1 process",
+    )
     if "--save_input" not in parser._option_string_actions:
         parser.add_argument(
             "--save_input",
@@ -96,6 +224,12 @@ def chai_argparse_util(parser):
         action="store_true",
         help="Run Chai-1",
     )
+    parser.add_argument(
+        "--chai_worker_socket",
+        default=None,
+        help="Socket of a running Chai-1 worker (see abcfold.chai1.run_chai1.\
+ChaiWorker) to send the prediction to, instead of starting a new Chai-1 process",
+    )
     return parser
 
 
@@ -129,6 +263,21 @@ def alphafold_argparse_util(parser):
         action="store_true",
     )
 
+    parser.add_argument(
+        "--reuse_af3_json",
+        action="store_true",
+        help="When the programs run at the same time, start Boltz-1 and Chai-1 from \
+the data JSON written by Alphafold3 once it finishes, rather than straight away \
+from the input JSON",
+    )
+
+    parser.add_argument(
+        "--af3_results",
+        default=None,
+        help="Output directory of an Alphafold3 job already run on the input JSON, \
+e.g. by abcfold_batch, moved into the output directory instead of running Alphafold3",
+    )
+
     parser.add_argument(
         "--use_af3_template_search",
         action="store_true",
@@ -197,4 +346,18 @@ by default"
         logger.error("Number of models must be greater than 0")
         sys.exit(1)
 
+    if args.post_workers < 1:
+        logger.error("Number of post-processing workers must be greater than 0")
+        sys.exit(1)
+
+    try:
+        args.engine_gpus = parse_gpus(args.gpus)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    # Programs given their own devices run at the same time
+    args.concurrent_engines = concurrent_engines(
+        args.gpus, [engine for engine in ENGINES if getattr(args, engine)]
+    )
+
     return args
@@ -0,0 +1,191 @@
+"""
+Boltz-1 worker, keeps the model loaded and runs the predictions sent to a Unix
+socket in this process. Started by `abcfold.boltz1.run_boltz.BoltzWorker`, its
+steps follow `boltz predict` so the outputs are the same.
+"""
+
+import argparse
+import logging
+import traceback
+from dataclasses import asdict
+from multiprocessing.connection import Listener
+from pathlib import Path
+from typing import Union
+
+import torch
+from boltz.data.module.inference import BoltzInferenceDataModule
+from boltz.data.types import Manifest
+from boltz.data.write.writer import BoltzWriter
+from boltz.main import (BoltzDiffusionParams, check_inputs, download,
+                        process_inputs)
+from boltz.model.model import Boltz1
+from pytorch_lightning import Trainer
+
+from abcfold.boltz1.run_boltz import MISSING_MSA_ERROR
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("logger")
+
+MSA_SERVER_URL = "https://api.colabfold.com"
+
+
+class BoltzPredictor:
+    def __init__(self, accelerator: str = "gpu", cache: Union[str, Path] = "~/.boltz"):
+        """
+        Boltz-1 with its weights loaded once, for any number of predictions
+
+        Args:
+            accelerator (str): "gpu" or "cpu"
+            cache (Union[str, Path]): Directory of the Boltz-1 weights and CCD,
+            as `boltz predict --cache`
+        """
+        torch.set_grad_enabled(False)
+        torch.set_float32_matmul_precision("highest")
+
+        self.accelerator = accelerator
+        self.cache = Path(cache).expanduser()
+        self.cache.mkdir(parents=True, exist_ok=True)
+        download(self.cache)
+
+        self.model = Boltz1.load_from_checkpoint(
+            self.cache / "boltz1_conf.ckpt",
+            strict=True,
+            predict_args={},
+            map_location="cpu",
+            diffusion_process_args=asdict(BoltzDiffusionParams()),
+            ema=False,
+        )
+        self.model.eval()
+
+    def predict(
+        self,
+        input_yaml: Union[str, Path],
+        output_dir: Union[str, Path],
+        diffusion_samples: int = 5,
+        recycling_steps: int = 10,
+        sampling_steps: int = 200,
+    ) -> Path:
+        """
+        Predict the structure of a Boltz-1 YAML, as `boltz predict` with
+        `--override --write_full_pae --write_full_pde`
+
+        Args:
+            input_yaml (Union[str, Path]): YAML written by BoltzYaml
+            output_dir (Union[str, Path]): Directory the boltz_results_<name>
+            directory is made in
+            diffusion_samples (int): Number of models to generate
+            recycling_steps (int): Number of recycling steps
+            sampling_steps (int): Number of diffusion sampling steps
+
+        Returns:
+            Path: The boltz_results_<name> directory
+
+        Raises:
+            RuntimeError: If no models were written
+        """
+        input_yaml = Path(input_yaml)
+        out_dir = Path(output_dir).joinpath(f"boltz_results_{input_yaml.stem}")
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        data = check_inputs(input_yaml, out_dir, override=True)
+        try:
+            self.process(data, out_dir, use_msa_server=False)
+        except Exception as e:
+            if MISSING_MSA_ERROR not in str(e):
+                raise
+            logger.warning("MSA not found, retrying with the MSA server")
+            self.process(data, out_dir, use_msa_server=True)
+
+        processed_dir = out_dir / "processed"
+        data_module = BoltzInferenceDataModule(
+            manifest=Manifest.load(processed_dir / "manifest.json"),
+            target_dir=processed_dir / "structures",
+            msa_dir=processed_dir / "msa",
+            num_workers=2,
+        )
+        self.model.predict_args = {
+            "recycling_steps": recycling_steps,
+            "sampling_steps": sampling_steps,
+            "diffusion_samples": diffusion_samples,
+            "write_confidence_summary": True,
+            "write_full_pae": True,
+            "write_full_pde": True,
+        }
+        pred_writer = BoltzWriter(
+            data_dir=processed_dir / "structures",
+            output_dir=out_dir / "predictions",
+            output_format="mmcif",
+        )
+        trainer = Trainer(
+            default_root_dir=out_dir,
+            strategy="auto",
+            callbacks=[pred_writer],
+            accelerator=self.accelerator,
+            devices=1,
+            precision=32,
+        )
+        trainer.predict(self.model, datamodule=data_module, return_predictions=False)
+
+        # The batch is skipped rather than failed when it runs out of memory
+        if not any(out_dir.joinpath("predictions", input_yaml.stem).glob("*.cif")):
+            raise RuntimeError("Boltz1 wrote no models, it may have run out of memory")
+        return out_dir
+
+    def process(self, data: list, out_dir: Path, use_msa_server: bool) -> None:
+        process_inputs(
+            data=data,
+            out_dir=out_dir,
+            ccd_path=self.cache / "ccd.pkl",
+            msa_server_url=MSA_SERVER_URL,
+            msa_pairing_strategy="greedy",
+            use_msa_server=use_msa_server,
+        )
+
+
+def serve(socket_path: Union[str, Path], accelerator: str = "gpu") -> None:
+    """
+    Load Boltz-1 and predict the jobs sent to a Unix socket, one at a time. Each
+    job is a dict of `BoltzPredictor.predict` arguments and is answered with
+    {"success": bool, "error": str, "output_dir": str}. A job of None stops the
+    worker.
+    """
+    predictor = BoltzPredictor(accelerator=accelerator)
+    with Listener(str(socket_path), family="AF_UNIX") as listener:
+        logger.info("Boltz1 worker ready at %s", socket_path)
+        while True:
+            with listener.accept() as conn:
+                try:
+                    job = conn.recv()
+                except EOFError:
+                    continue
+                if job is None:
+                    break
+                try:
+                    out_dir = predictor.predict(**job)
+                    reply = {"success": True, "error": "", "output_dir": str(out_dir)}
+                except Exception:
+                    reply = {
+                        "success": False,
+                        "error": traceback.format_exc(),
+                        "output_dir": "",
+                    }
+                conn.send(reply)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Keep Boltz-1 loaded and predict the jobs sent to a Unix socket"
+    )
+    parser.add_argument("socket", help="Unix socket to take the jobs from")
+    parser.add_argument(
+        "--accelerator",
+        choices=["gpu", "cpu"],
+        default="gpu",
+        help="Device type to predict on",
+    )
+    args = parser.parse_args()
+    serve(args.socket, args.accelerator)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,14 +3,16 @@ import subprocess
 import sys
 import tempfile
 from pathlib import Path
-from typing import Union
+from typing import Optional, Tuple, Union
 import os
 
 from abcfold.boltz1.af3_to_boltz1 import BoltzYaml
 from abcfold.boltz1.check_install import check_boltz1
+from abcfold.inference_worker import InferenceWorker, submit_job
 
 logger = logging.getLogger("logger")
 
+MISSING_MSA_ERROR = "Missing MSA's in input and --use_msa_server flag not set"
 
 
 def run_boltz(
@@ -21,6 +23,7 @@ def run_boltz(
     number_of_models: int = 5,
     num_recycles: int = 10,
     gpus: str = "all",
+    worker_socket: Union[str, Path, None] = None,
 ) -> bool:
     """
     Run Boltz1 using the input JSON file
@@ -32,6 +35,9 @@ def run_boltz(
         directory
         test (bool): If True, run the test command
         number_of_models (int): Number of models to generate
+        worker_socket (Union[str, Path, None]): Socket of a running BoltzWorker. If
+        given the prediction is sent to the worker, which runs on its own device,
+        instead of starting a new Boltz1 process
 
     Returns:
         Bool: True if the Boltz1 run was successful, False otherwise
@@ -44,8 +50,9 @@ def run_boltz(
     input_json = Path(input_json)
     output_dir = Path(output_dir)
 
-    logger.debug("Checking if boltz1 is installed")
-    check_boltz1()
+    if worker_socket is None or test:
+        logger.debug("Checking if boltz1 is installed")
+        check_boltz1()
 
     with tempfile.TemporaryDirectory() as temp_dir:
         working_dir = Path(temp_dir)
@@ -58,6 +65,25 @@ def run_boltz(
         out_file = working_dir.joinpath(f"{input_json.stem}.yaml")
 
         boltz_yaml.write_yaml(out_file)
+        if worker_socket is not None and not test:
+            logger.info("Running Boltz1 on the worker at %s", worker_socket)
+            job = generate_boltz_job(
+                out_file, output_dir, number_of_models, num_recycles
+            )
+            results_dir, error = submit_boltz_job(worker_socket, job)
+            if results_dir is None:
+                logger.error(error)
+                output_err_file = output_dir / "boltz_error.log"
+                with open(output_err_file, "w") as f:
+                    f.write(error)
+                logger.error(
+                    "Boltz1 run failed. Error log is in %s", output_err_file
+                )
+                return False
+            logger.info("Boltz1 run complete")
+            logger.info("Output files are in %s", results_dir)
+            return True
+
         logger.info("Running Boltz1")
         cmd = (
             generate_boltz_command(out_file, output_dir, number_of_models, num_recycles, gpus)
@@ -87,7 +113,7 @@ def run_boltz(
                 _, stderr = proc.communicate()
                 return proc.returncode, stdout, stderr
         returncode, stdout, stderr = run_cmd(cmd, env)
-        if returncode != 0 and b"Missing MSA's in input and --use_msa_server flag not set" in stderr:
+        if returncode != 0 and MISSING_MSA_ERROR.encode() in stderr:
             logger.warning("MSA not found, retrying with --use_msa_server")
             cmd.append("--use_msa_server")
             returncode, stdout, stderr = run_cmd(cmd, env)
@@ -146,6 +172,87 @@ def generate_boltz_command(
     return cmd
 
 
+def generate_boltz_job(
+    input_yaml: Union[str, Path],
+    output_dir: Union[str, Path],
+    number_of_models: int = 5,
+    num_recycles: int = 10,
+) -> dict:
+    """
+    Build a BoltzWorker job, the worker equivalent of `generate_boltz_command`
+
+    Args:
+        input_yaml (Union[str, Path]): Path to the input YAML file
+        output_dir (Union[str, Path]): Path to the output directory
+        number_of_models (int): Number of models to generate
+        num_recycles (int): Number of recycling steps
+
+    Returns:
+        dict: The job
+    """
+    return {
+        "input_yaml": Path(input_yaml),
+        "output_dir": Path(output_dir),
+        "diffusion_samples": number_of_models,
+        "recycling_steps": num_recycles,
+    }
+
+
+def submit_boltz_job(
+    worker_socket: Union[str, Path], job: dict
+) -> Tuple[Optional[Path], str]:
+    """
+    Send a job to a BoltzWorker and wait for it to be predicted
+
+    Args:
+        worker_socket (Union[str, Path]): Socket of the worker
+        job (dict): The job, see `generate_boltz_job`
+
+    Returns:
+        Tuple[Optional[Path], str]: The boltz_results directory of the
+        prediction, None if it failed, and the error if it did
+    """
+    reply = submit_job(worker_socket, job)
+    if not reply["success"]:
+        return None, reply["error"]
+    return Path(reply["output_dir"]), ""
+
+
+class BoltzWorker(InferenceWorker):
+    """
+    A Boltz1 process kept running on one device, so torch, lightning and the
+    checkpoint are only loaded once for many predictions. It takes the YAMLs
+    written by BoltzYaml, with `run_boltz(..., worker_socket=worker.socket)` or
+    `submit_boltz_job`, and writes the same outputs as `boltz predict`, see
+    InferenceWorker
+    """
+
+    program = "boltz"
+
+    def check_install(self) -> None:
+        logger.debug("Checking if boltz1 is installed")
+        check_boltz1()
+
+    def command(self) -> list:
+        accelerator = (
+            "cpu" if self.device is not None and self.device.lower() == "cpu" else "gpu"
+        )
+        return [
+            sys.executable,
+            "-m",
+            "abcfold.boltz1.boltz_worker",
+            str(self.socket),
+            "--accelerator",
+            accelerator,
+        ]
+
+    def environment(self) -> dict:
+        env = super().environment()
+        if self.device is not None and self.device.lower() == "cpu":
+            env["CUDA_VISIBLE_DEVICES"] = ""
+        return env
+
+
 def generate_boltz_test_command() -> list:
     """
     Generate the test command for Boltz1
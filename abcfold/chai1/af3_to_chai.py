@@ -1,3 +1,4 @@
+import csv
 import hashlib
 import json
 import logging
@@ -6,7 +7,6 @@ from pathlib import Path
 from typing import Dict, List, Optional, Union
 
 import numpy as _  # noqa F401
-import pandas as pd
 import pyarrow as _  # noqa F401
 import requests
 
@@ -71,7 +71,7 @@ class ChaiFasta:
             "comment",
             "restraint_id",
         ]
-        df = pd.DataFrame(columns=constraints_headers)
+        rows = []
 
         for i, bonded_pair in enumerate(bonded_pairs):
             pair_data = []
@@ -116,10 +116,13 @@ check back for updates"
                 "Covalent Bond",
                 f"restraint_{i}",
             ]
-            df.loc[i] = row_data
+            rows.append(row_data)
 
-        if not df.empty and self.__create_files:
-            df.to_csv(self.constraints, sep=",", index=False)
+        if rows and self.__create_files:
+            with open(self.constraints, "w", newline="") as f:
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(constraints_headers)
+                writer.writerows(rows)
 
     def msa_to_file(self, msa: str, file_path: Union[str, Path]):
         """
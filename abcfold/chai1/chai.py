@@ -9,14 +9,23 @@
 
 """Command line interface."""
 
+import functools
 import logging
+import tempfile
+import traceback
+from multiprocessing.connection import Listener
 from pathlib import Path
 
 import numpy as np
 import typer
+from chai_lab import chai1
 from chai_lab.chai1 import run_inference
 
 logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("logger")
+
+# Short peptide folded once by `serve` to load the weights before taking jobs
+WARMUP_FASTA = ">protein|name=warmup\nMKTAYIAKQRQISFVKSHFSRQ\n"
 
 CITATION = """
 @article{Chai-1-Technical-Report,
@@ -99,9 +108,64 @@ def run_inference_wrapper(
     return result
 
 
+def load_components(device: str | None = None) -> None:
+    """
+    Load the Chai-1 components and the ESM model once for this process.
+    `run_inference` loads the exported components from disk on every call, so
+    the loader is memoized before folding a short peptide, which leaves the
+    components and ESM in memory for the jobs that follow.
+    """
+    if not hasattr(chai1.load_exported, "cache_info"):
+        chai1.load_exported = functools.lru_cache(maxsize=32)(chai1.load_exported)
+
+    with tempfile.TemporaryDirectory(prefix="chai_warmup_") as tmpdir:
+        fasta_file = Path(tmpdir).joinpath("warmup.fasta")
+        fasta_file.write_text(WARMUP_FASTA)
+        run_inference(
+            fasta_file=fasta_file,
+            output_dir=Path(tmpdir).joinpath("output"),
+            use_esm_embeddings=True,
+            num_trunk_recycles=1,
+            num_diffn_timesteps=2,
+            num_diffn_samples=1,
+            device=normalize_device(device),
+            low_memory=False,
+        )
+
+
+def serve(socket_path: Path, device: str | None = None):
+    """
+    Keep Chai-1 loaded and fold the jobs sent to a Unix socket, one at a time.
+    Each job is a dict of `run_inference_wrapper` arguments and is answered
+    with {"success": bool, "error": str}. A job of None stops the worker. The
+    socket is only made once the weights are loaded, see `load_components`.
+    """
+    load_components(device)
+    with Listener(str(socket_path), family="AF_UNIX") as listener:
+        logger.info("Chai-1 worker ready at %s", socket_path)
+        while True:
+            with listener.accept() as conn:
+                try:
+                    job = conn.recv()
+                except EOFError:
+                    continue
+                if job is None:
+                    break
+                try:
+                    # low_memory=False, the memoized components must stay on
+                    # the device rather than be moved off it after each job
+                    run_inference_wrapper(**job, device=device, low_memory=False)
+                    conn.send({"success": True, "error": ""})
+                except Exception:
+                    conn.send({"success": False, "error": traceback.format_exc()})
+
+
 def cli():
     app = typer.Typer()
     app.command("fold", help="Run Chai-1 to fold a complex.")(run_inference_wrapper)
+    app.command(
+        "serve", help="Keep Chai-1 loaded and fold the jobs sent to a Unix socket."
+    )(serve)
     app.command("citation", help="Print citation information")(citation)
     app()
 
@@ -1,13 +1,15 @@
 import logging
+import os
 import shutil
 import subprocess
 import sys
 import tempfile
 from pathlib import Path
-from typing import Union
+from typing import Tuple, Union
 
 from abcfold.chai1.af3_to_chai import ChaiFasta
 from abcfold.chai1.check_install import check_chai1
+from abcfold.inference_worker import InferenceWorker, submit_job
 
 logger = logging.getLogger("logger")
 
@@ -34,6 +36,7 @@ def run_chai(
     use_templates_server: bool = False,
     template_hits_path: Path | None = None,
     device: str | None = None,
+    worker_socket: Union[str, Path, None] = None,
 ) -> bool:
     """
     Run Chai-1 using the input JSON file
@@ -48,7 +51,11 @@ def run_chai(
         num_recycles (int): Number of trunk recycles
         use_templates_server (bool): If True, use templates from the server
         template_hits_path (Path): Path to the template hits m8 file
-        device (str | None): If specified, use the specified GPU
+        device (str | None): If specified, use the specified GPU. Specific devices
+        are made the only visible ones, so Chai-1 runs on the first of them
+        worker_socket (Union[str, Path, None]): Socket of a running ChaiWorker. If
+        given the prediction is sent to the worker, which runs on its own device,
+        instead of starting a new Chai-1 process
 
     Returns:
         Bool: True if the Chai-1 run was successful, False otherwise
@@ -56,8 +63,9 @@ def run_chai(
     """
     input_json = Path(input_json)
     output_dir = Path(output_dir)
-    logger.debug("Checking if Chai-1 is installed")
-    check_chai1()
+    if worker_socket is None or test:
+        logger.debug("Checking if Chai-1 is installed")
+        check_chai1()
 
     with tempfile.TemporaryDirectory() as temp_dir:
         working_dir = Path(temp_dir)
@@ -72,6 +80,25 @@ def run_chai(
         msa_dir = chai_fasta.working_dir
         out_constraints = chai_fasta.constraints
 
+        if worker_socket is not None and not test:
+            job = generate_chai_job(
+                out_fasta,
+                msa_dir,
+                out_constraints,
+                output_dir,
+                number_of_models,
+                num_recycles=num_recycles,
+                use_templates_server=use_templates_server,
+                template_hits_path=template_hits_path,
+            )
+            logger.info("Running Chai-1 on the worker at %s", worker_socket)
+            success, error = submit_chai_job(worker_socket, job)
+            if not success:
+                write_chai_error(output_dir, error)
+                return False
+            logger.info("Chai-1 run complete")
+            return True
+
         cmd = (
             generate_chai_command(
                 out_fasta,
@@ -88,24 +115,21 @@ def run_chai(
             else generate_chai_test_command()
         )
 
+        env = os.environ.copy()
+        if device is not None and device.lower() not in ("all", "cpu"):
+            env["CUDA_VISIBLE_DEVICES"] = device
+
         logger.info("Running Chai-1")
         with subprocess.Popen(
             cmd,
             stdout=sys.stdout,
             stderr=subprocess.PIPE,
+            env=env,
         ) as proc:
             _, stderr = proc.communicate()
             if proc.returncode != 0:
                 if proc.stderr:
-                    if output_dir.exists():
-                        output_err_file = output_dir / "chai_error.log"
-                    else:
-                        output_err_file = output_dir.parent / "chai_error.log"
-                    with open(output_err_file, "w") as f:
-                        f.write(stderr.decode())
-                    logger.error(
-                        "Chai-1 run failed. Error log is in %s", output_err_file
-                    )
+                    write_chai_error(output_dir, stderr.decode())
                 else:
                     logger.error("Chai-1 run failed")
                 return False
@@ -140,6 +164,60 @@ def generate_chai_command(
     cmd += ["--num-diffn-samples", str(number_of_models)]
     cmd += ["--num-trunk-recycles", str(num_recycles)]
 
+    if check_kalign(use_templates_server, template_hits_path):
+        if use_templates_server:
+            cmd += ["--use-templates-server"]
+        if template_hits_path:
+            cmd += ["--template-hits-path", str(template_hits_path)]
+
+    if device is not None:
+        cmd += ["--device", device]
+
+    cmd += [str(output_dir)]
+    return cmd
+
+
+def generate_chai_job(
+    input_fasta: Union[str, Path],
+    msa_dir: Union[str, Path],
+    input_constraints: Union[str, Path],
+    output_dir: Union[str, Path],
+    number_of_models: int = 5,
+    num_recycles: int = 10,
+    use_templates_server: bool = False,
+    template_hits_path: Path | None = None,
+) -> dict:
+    """
+    Build the `run_inference_wrapper` arguments of a ChaiWorker job, matching
+    the Chai-1 CLI call of `generate_chai_command`
+    """
+    job = {
+        "fasta_file": Path(input_fasta),
+        "output_dir": Path(output_dir),
+        "num_diffn_samples": number_of_models,
+        "num_trunk_recycles": num_recycles,
+    }
+    if Path(msa_dir).exists():
+        job["msa_directory"] = Path(msa_dir)
+    if Path(input_constraints).exists():
+        job["constraint_path"] = Path(input_constraints)
+
+    if check_kalign(use_templates_server, template_hits_path):
+        if use_templates_server:
+            job["use_templates_server"] = True
+        if template_hits_path:
+            job["template_hits_path"] = Path(template_hits_path)
+    return job
+
+
+def check_kalign(use_templates_server: bool, template_hits_path: Path | None) -> bool:
+    """
+    Check that the template options can be used, kalign is needed to align the
+    templates
+
+    Returns:
+        bool: False if templates were asked for but kalign is not installed
+    """
     assert not (use_templates_server and template_hits_path), \
         "Cannot specify both templates server and path"
 
@@ -148,17 +226,62 @@ def generate_chai_command(
             "kalign not found, skipping template search. "
             "Please install kalign to use templates with Chai-1."
         )
+        return False
+    return True
+
+
+def write_chai_error(output_dir: Path, error: str) -> None:
+    """
+    Write the error of a failed Chai-1 run to chai_error.log
+    """
+    if output_dir.exists():
+        output_err_file = output_dir / "chai_error.log"
     else:
-        if use_templates_server:
-            cmd += ["--use-templates-server"]
-        if template_hits_path:
-            cmd += ["--template-hits-path", str(template_hits_path)]
+        output_err_file = output_dir.parent / "chai_error.log"
+    with open(output_err_file, "w") as f:
+        f.write(error)
+    logger.error("Chai-1 run failed. Error log is in %s", output_err_file)
 
-    if device is not None:
-        cmd += ["--device", device]
 
-    cmd += [str(output_dir)]
-    return cmd
+def submit_chai_job(worker_socket: Union[str, Path], job: dict) -> Tuple[bool, str]:
+    """
+    Send a job to a ChaiWorker and wait for it to be folded
+
+    Args:
+        worker_socket (Union[str, Path]): Socket of the worker
+        job (dict): `run_inference_wrapper` arguments, see `generate_chai_job`
+
+    Returns:
+        Tuple[bool, str]: Whether the job succeeded and the error if it did not
+    """
+    reply = submit_job(worker_socket, job)
+    return reply["success"], reply["error"]
+
+
+class ChaiWorker(InferenceWorker):
+    """
+    A Chai-1 process kept running on one device, so torch, chai_lab and the
+    model weights are only loaded once for many predictions. Jobs are sent to it
+    with `run_chai(..., worker_socket=worker.socket)` or `submit_chai_job`, see
+    InferenceWorker
+    """
+
+    program = "chai"
+
+    def check_install(self) -> None:
+        logger.debug("Checking if Chai-1 is installed")
+        check_chai1()
+
+    def command(self) -> list:
+        cmd = [
+            sys.executable,
+            str(Path(__file__).parent / "chai.py"),
+            "serve",
+            str(self.socket),
+        ]
+        if normalize_device(self.device) is not None:
+            cmd += ["--device", str(normalize_device(self.device))]
+        return cmd
 
 
 def generate_chai_test_command() -> list:
@@ -1,17 +1,19 @@
 import http.server
 import textwrap
-from itertools import groupby
-from operator import itemgetter
 from pathlib import Path
-from typing import Dict, Union
+from typing import Dict, List, Optional, Union
 
 import numpy as np
-from Bio.SeqUtils import seq1
 from jinja2 import Environment, FileSystemLoader
 
 from abcfold.output.alphafold3 import AlphafoldOutput
 from abcfold.output.boltz import BoltzOutput
 from abcfold.output.chai import ChaiOutput
+from abcfold.output.model_summary import (ModelSummary, align_model_summaries,
+                                          merge_sequence_data,
+                                          model_sequence_data,
+                                          summaries_by_method)
+from abcfold.output.plddt_summary import plddt_regions
 from abcfold.plots.pae_plot import create_pae_plots
 from abcfold.plots.plddt_plot import plot_plddt
 
@@ -20,37 +22,23 @@ PORT = 8000
 
 def get_plddt_regions(plddts: Union[np.ndarray, list]) -> dict:
     """
-    Get the pLDDT regions for the model
+    Get the pLDDT regions for the model, missing (None) scores are not part of any
+    region
     """
-    if not isinstance(plddts, np.ndarray):
-        plddts = np.array(plddts)
-
-    regions = {}
-    # replace none values with -1
-    plddts = np.where(plddts is None, -1, plddts)
-
-    v_low = np.where((0 <= plddts) & (plddts <= 50))[0]
-    regions["v_low"] = get_regions_helper(v_low)
-    low = np.where((plddts > 50) & (plddts < 70))[0]
-    regions["low"] = get_regions_helper(low)
-    confident = np.where((plddts >= 70) & (plddts < 90))[0]
-    regions["confident"] = get_regions_helper(confident)
-    v_confident = np.where(plddts >= 90)[0]
-    regions["v_high"] = get_regions_helper(v_confident)
-
-    return regions
+    return plddt_regions(plddts)
 
 
 def get_regions_helper(indices):
     """
     Get the regions from the indices
     """
-    regions = []
-    for _, g in groupby(enumerate(indices), lambda x: x[0] - x[1]):
-        group = map(itemgetter(1), g)
-        group = list(map(int, group))
-        regions.append((group[0], group[-1]))
-    return regions
+    indices = np.asarray(indices, dtype=np.int64)
+    if len(indices) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(indices) != 1)
+    starts = indices[np.concatenate(([0], breaks + 1))]
+    ends = indices[np.concatenate((breaks, [len(indices) - 1]))]
+    return [(int(start), int(end)) for start, end in zip(starts, ends)]
 
 
 def get_model_sequence_data(cif_objs) -> dict:
@@ -64,38 +52,7 @@ def get_model_sequence_data(cif_objs) -> dict:
     Returns:
         dict : Chain ID and sequence data
     """
-    sequence_data: dict = {}
-    for cif_obj in cif_objs:
-        sequence_data_ = {}
-        for chain in cif_obj.get_chains():
-            if cif_obj.check_ligand(chain):
-                if chain.id not in sequence_data_:
-                    sequence_data_[chain.id] = ""
-                sequence_data_[chain.id] += "".join(
-                    [atom.id[0] for residue in chain for atom in residue]
-                )
-            elif cif_obj.check_other(chain, ["dna"]):
-                sequence_data_[chain.id] = "".join(
-                    [residue.get_resname()[-1] for residue in chain]
-                )
-            elif cif_obj.check_other(chain, ["rna"]):
-                sequence_data_[chain.id] = "".join(
-                    [residue.get_resname() for residue in chain]
-                )
-            else:
-
-                sequence_data_[chain.id] = "".join(
-                    [seq1(residue.get_resname()) for residue in chain]
-                )
-        sequence_data = {
-            chain_id: sorted(
-                [sequence_data_[chain_id], sequence_data.get(chain_id, "")],
-                reverse=True,
-            )[0]
-            for chain_id in sequence_data_
-        }
-
-    return sequence_data
+    return merge_sequence_data(model_sequence_data(cif_obj) for cif_obj in cif_objs)
 
 
 def get_model_data(model, plot_dict, method, plddt_scores, output_dir):
@@ -103,7 +60,7 @@ def get_model_data(model, plot_dict, method, plddt_scores, output_dir):
     Get the model data for the output page
 
     Args:
-        model (CifFile): Model object
+        model (Union[CifFile, ModelSummary]): Model object or its summary
         plot_dict (dict): Dictionary of plots
         method (str): Method used to generate the model
         output_dir (Path): Path to the output directory
@@ -135,18 +92,37 @@ class NoCacheHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         super().end_headers()
 
 
-def plots(outputs: list, output_dir: Path):
+def plots(
+    outputs: list,
+    output_dir: Path,
+    summaries: Optional[List[ModelSummary]] = None,
+):
     """
     Generate plots for the output of the different programs
 
     Args:
         outputs (list): List of output objects
+        summaries (Optional[List[ModelSummary]]): If given, every model is
+            summarized into this list and released while its PAE plot is prepared,
+            the pLDDT plot is then made from the summaries, whose aligned pLDDT
+            scores are set
 
     """
-    pathway_plots = create_pae_plots(outputs, output_dir=output_dir)
-    plddt_plot_input: Dict[str, list] = get_all_cif_files(outputs)
-
-    plot_plddt(plddt_plot_input, output_name=output_dir.joinpath("plddt_plot.html"))
+    pathway_plots = create_pae_plots(
+        outputs, output_dir=output_dir, summaries=summaries
+    )
+    if summaries is None:
+        plddt_plot_input: Dict[str, list] = get_all_cif_files(outputs)
+        plddts = None
+    else:
+        plddt_plot_input = summaries_by_method(summaries)
+        plddts = align_model_summaries(summaries)
+
+    plot_plddt(
+        plddt_plot_input,
+        output_name=output_dir.joinpath("plddt_plot.html"),
+        plddts=plddts,
+    )
 
     pathway_plots["plddt"] = str(output_dir.joinpath("plddt_plot.html").resolve())
 
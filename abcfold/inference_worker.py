@@ -0,0 +1,167 @@
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing.connection import Client
+from pathlib import Path
+from typing import Union
+
+logger = logging.getLogger("logger")
+
+
+def submit_job(worker_socket: Union[str, Path], job: dict) -> dict:
+    """
+    Send a job to a running worker and wait for its reply
+
+    Args:
+        worker_socket (Union[str, Path]): Socket of the worker
+        job (dict): The job, in the layout the worker expects
+
+    Returns:
+        dict: Reply of the worker, with at least "success" and "error"
+    """
+    try:
+        with Client(str(worker_socket), family="AF_UNIX") as conn:
+            conn.send(job)
+            return conn.recv()
+    except (OSError, EOFError) as e:
+        return {
+            "success": False,
+            "error": f"Could not reach the worker at {worker_socket}: {e}",
+        }
+
+
+class InferenceWorker:
+    program = "inference"
+
+    def __init__(
+        self,
+        device: str | None = None,
+        socket_dir: Union[str, Path, None] = None,
+        log_file: Union[str, Path, None] = None,
+    ):
+        """
+        A structure prediction process kept running on one device, so torch and
+        the model weights are only loaded once for many predictions. Jobs are
+        sent to it over a Unix socket with `submit_job` and are run one at a time.
+        Used as a context manager, or started with `start` and stopped with
+        `close`. Subclasses give the command starting the worker
+
+        Args:
+            device (str | None): Device of the worker, as given to the run
+            functions of the programs
+            socket_dir (Union[str, Path, None]): Directory of the socket, a new
+            temporary directory if not given
+            log_file (Union[str, Path, None]): File the worker writes its output
+            to, the output of this process if not given
+
+        Attributes:
+            device (str | None): Device of the worker
+            socket (Path): Socket the worker takes jobs from
+        """
+        self.device = device
+        self.__own_socket_dir = socket_dir is None
+        socket_dir = (
+            Path(tempfile.mkdtemp(prefix=f"abcfold_{self.program}_"))
+            if socket_dir is None
+            else Path(socket_dir)
+        )
+        name = "cpu" if device is None else device.replace(",", "_")
+        self.socket = socket_dir.joinpath(f"{self.program}_{name}.sock")
+        self.__log_file = log_file
+        self.__log = None
+        self.__proc: subprocess.Popen | None = None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.device}, {self.socket})"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    @property
+    def alive(self) -> bool:
+        return self.__proc is not None and self.__proc.poll() is None
+
+    def check_install(self) -> None:
+        """
+        Make sure the program of the worker is installed
+        """
+
+    def command(self) -> list:
+        """
+        The command starting the worker, which takes jobs from `self.socket`
+        """
+        raise NotImplementedError
+
+    def environment(self) -> dict:
+        """
+        The environment of the worker, specific devices are made the only
+        visible ones
+        """
+        env = os.environ.copy()
+        if self.device is not None and self.device.lower() not in ("all", "cpu"):
+            env["CUDA_VISIBLE_DEVICES"] = self.device
+        return env
+
+    def start(self, timeout: float = 600) -> None:
+        """
+        Start the worker and wait until it takes jobs
+
+        Args:
+            timeout (float): Seconds to wait for the model to load
+        """
+        self.check_install()
+        self.socket.parent.mkdir(parents=True, exist_ok=True)
+        self.socket.unlink(missing_ok=True)
+
+        if self.__log_file is not None:
+            self.__log = open(self.__log_file, "a")
+        logger.info("Starting a %s worker on device %s", self.program, self.device)
+        self.__proc = subprocess.Popen(
+            self.command(),
+            stdout=sys.stdout if self.__log is None else self.__log,
+            stderr=sys.stderr if self.__log is None else self.__log,
+            env=self.environment(),
+        )
+
+        deadline = time.monotonic() + timeout
+        while not self.socket.exists():
+            if not self.alive:
+                self.close()
+                raise RuntimeError(f"The {self.program} worker stopped while starting")
+            if time.monotonic() > deadline:
+                self.close()
+                raise TimeoutError(f"The {self.program} worker did not start in time")
+            time.sleep(0.5)
+
+    def submit(self, job: dict) -> dict:
+        """
+        Run a job on the worker, see `submit_job`
+        """
+        return submit_job(self.socket, job)
+
+    def close(self) -> None:
+        """
+        Stop the worker once its current job is done
+        """
+        if self.alive:
+            try:
+                with Client(str(self.socket), family="AF_UNIX") as conn:
+                    conn.send(None)
+                self.__proc.wait(timeout=60)  # type: ignore[union-attr]
+            except (OSError, subprocess.TimeoutExpired):
+                self.__proc.kill()  # type: ignore[union-attr]
+        self.__proc = None
+        if self.__log is not None:
+            self.__log.close()
+            self.__log = None
+        self.socket.unlink(missing_ok=True)
+        if self.__own_socket_dir:
+            shutil.rmtree(self.socket.parent, ignore_errors=True)
@@ -1,8 +1,10 @@
 from pathlib import Path
 from typing import Union
 
-from abcfold.output.file_handlers import CifFile, ConfidenceJsonFile
-from abcfold.output.utils import Af3Pae
+from abcfold.output.file_handlers import CifFile, ConfidenceJsonFile, PaeFile
+from abcfold.output.manifest import OutputManifest
+from abcfold.output.model_summary import ModelRecord
+from abcfold.output.utils import Af3Pae, map_models
 
 
 class AlphafoldOutput:
@@ -11,6 +13,7 @@ class AlphafoldOutput:
         af3_output_dir: Union[str, Path],
         input_params: dict,
         name: str,
+        post_workers: int = 1,
     ):
         """
         Object to process the output of an AlphaFold3 run
@@ -20,12 +23,20 @@ class AlphafoldOutput:
             input_params (dict): Dictionary containing the input parameters used for the
             AlphaFold3 run
             name (str): Name given to the AlphaFold3 run
+            post_workers (int): Number of processes the models are post-processed
+            in, 1 processes them one after another
 
         Attributes:
             output_dir (Path): Path to the AlphaFold3 output directory
             input_params (dict): Dictionary containing the input parameters used for the
             AlphaFold3 run
             name (str): Name given to the AlphaFold3 run
+            manifest (OutputManifest): Record of the normalization of the output
+            directory, the models are only reordered and their PAE converted when it
+            does not match
+            normalized (bool): Whether the outputs were already normalized
+            records (Dict[Path, ModelRecord]): Record of each model by its path,
+            read from the manifest when the outputs were already normalized
             output (dict): Dictionary containing the processed output the contents
             of the AlphaFold3 output directory. The dictionary is structured as follows:
 
@@ -43,15 +54,20 @@ class AlphafoldOutput:
                 etc...
             }
             This is different to the boltz and chai equivalent as they do not have seeds
+            cif_files (dict): CifFile handles to the models of each seed, their
+            atoms are only read while each model is summarized
         """
         self.output_dir = Path(af3_output_dir)
         self.input_params = input_params
+        self.post_workers = post_workers
 
         if not self.output_dir.name.startswith("alphafold3"):
             self.output_dir = self.output_dir.rename(
                 self.output_dir.parent.joinpath(f"alphafold3_{name}")
             )
 
+        self.manifest = OutputManifest(self.output_dir)
+        self.normalized = False
         self.output = self.process_af3_output()
         self.seeds = list(self.output.keys())
         self.cif_files = {
@@ -63,6 +79,8 @@ class AlphafoldOutput:
             for seed in self.seeds
         }
         self.pae_to_af3()
+        if not self.normalized:
+            self.manifest.write(self.records.values())
 
         self.scores_files = {
             seed: [value["summary"] for value in self.output[seed].values()]
@@ -76,6 +94,7 @@ class AlphafoldOutput:
 
         """
         file_groups = {}
+        cif_pathways = []
         for pathway in self.output_dir.iterdir():
             if pathway.is_dir():
                 seed = pathway.name.split("_")[0]
@@ -89,12 +108,8 @@ class AlphafoldOutput:
                     file_groups[seed][sample] = {}
                 for file in pathway.iterdir():
                     if file.suffix == ".cif":
-                        cif_file = CifFile(str(file), self.input_params)
-                        cif_file.name = f"Alphafold3_{seed}_{sample}"
-
-                        cif_file = self.reorder_chains(cif_file)
-                        cif_file.to_file(str(file))
-                        file_groups[seed][sample]["cif"] = cif_file
+                        # The models are reordered below, in parallel if requested
+                        cif_pathways.append((seed, sample, file))
                     elif file.suffix == ".json" and "summary" not in file.stem:
                         file_groups[seed][sample]["af3_pae"] = ConfidenceJsonFile(
                             str(file)
@@ -106,6 +121,36 @@ class AlphafoldOutput:
                     else:
                         continue
 
+        sources = [file for _, _, file in cif_pathways] + [
+            files["af3_pae"].pathway
+            for samples in file_groups.values()
+            for files in samples.values()
+            if "af3_pae" in files
+        ]
+        models = [file for _, _, file in cif_pathways]
+        self.normalized = self.manifest.is_current(sources, models)
+        if self.normalized:
+            # Nothing is read from the models, their records are in the manifest
+            records = [self.manifest.records()[file] for file in models]
+        else:
+            self.manifest.record_sources(sources)
+            records = map_models(
+                process_alphafold3_cif,
+                [
+                    (
+                        file,
+                        self.input_params,
+                        f"Alphafold3_{seed}_{sample}",
+                        self.get_chain_ids(),
+                    )
+                    for seed, sample, file in cif_pathways
+                ],
+                self.post_workers,
+            )
+        self.records = {record.pathway: record for record in records}
+        for (seed, sample, _), record in zip(cif_pathways, records):
+            file_groups[seed][sample]["cif"] = record.cif_file(self.input_params)
+
         for seed in file_groups:
             file_groups[seed] = {
                 sample: file_groups[seed][sample]
@@ -135,23 +180,30 @@ class AlphafoldOutput:
         Returns:
             None
         """
-        new_pae_files = {}
-        for seed in self.seeds:
-            for i, (pae_file, cif_file) in enumerate(
-                zip(self.af3_pae_files[seed], self.cif_files[seed])
-            ):
-                pae = Af3Pae.from_alphafold3(
-                    pae_file.data,
-                    cif_file,
-                )
-
-                out_name = pae_file.pathway
-
-                pae.to_file(out_name)
+        tasks = [
+            (seed, (pae_file, cif_file, pae_file.pathway.with_suffix(".npz")))
+            for seed in self.seeds
+            for pae_file, cif_file in zip(
+                self.af3_pae_files[seed], self.cif_files[seed]
+            )
+        ]
+        if self.normalized:
+            af3_pae_files = [
+                PaeFile(self.records[cif_file.pathway].derived["af3_pae"])
+                for _, (_, cif_file, _) in tasks
+            ]
+        else:
+            af3_pae_files = map_models(
+                alphafold3_pae_to_af3, [task for _, task in tasks], self.post_workers
+            )
+            for (_, (_, cif_file, _)), af3_pae_file in zip(tasks, af3_pae_files):
+                self.records[cif_file.pathway].derived["af3_pae"] = af3_pae_file.pathway
 
-                if seed not in new_pae_files:
-                    new_pae_files[seed] = []
-                new_pae_files[seed].append(ConfidenceJsonFile(out_name))
+        new_pae_files = {}
+        for (seed, _), af3_pae_file in zip(tasks, af3_pae_files):
+            if seed not in new_pae_files:
+                new_pae_files[seed] = []
+            new_pae_files[seed].append(af3_pae_file)
 
         self.af3_pae_files = new_pae_files
         self.output = {
@@ -175,7 +227,57 @@ class AlphafoldOutput:
             cif_file (CifFile): CifFile object to update the chain labels for
 
         """
-        if [chain.id for chain in cif_file.get_chains()] == self.get_chain_ids():
+        if cif_file.chain_ids == self.get_chain_ids():
             return cif_file
         cif_file.reorder_chains(self.get_chain_ids())
         return cif_file
+
+
+def process_alphafold3_cif(
+    cif_pathway: Path,
+    input_params: dict,
+    name: str,
+    chain_ids: list,
+) -> ModelRecord:
+    """
+    Load an AlphaFold3 model, put its chains in the order of the input and write
+    it back. Runs in a worker process when the models are post-processed in
+    parallel, only the record of the model is sent back
+
+    Args:
+        cif_pathway (Path): Path to the CIF file of the model
+        input_params (dict): Dictionary containing the input parameters used for the
+        AlphaFold3 run
+        name (str): Name given to the model
+        chain_ids (list): Chain ids of the input
+
+    Returns:
+        ModelRecord: Record of the reordered model
+    """
+    cif_file = CifFile(str(cif_pathway), input_params)
+    cif_file.name = name
+    if cif_file.chain_ids != chain_ids:
+        cif_file.reorder_chains(chain_ids)
+    cif_file.to_file(str(cif_pathway))
+    return ModelRecord.from_cif(cif_file)
+
+
+def alphafold3_pae_to_af3(
+    confidences_file: ConfidenceJsonFile, cif_file: CifFile, output_file: Path
+) -> PaeFile:
+    """
+    Match the AlphaFold3 confidences to the chain order of the model and write
+    them to file. The confidences are read here, in the worker process when the
+    models are post-processed in parallel
+
+    Args:
+        confidences_file (ConfidenceJsonFile): Confidences of the model
+        cif_file (CifFile): The model the confidences belong to
+        output_file (Path): Path to write the scores to
+
+    Returns:
+        PaeFile: The scores in the chain order of the model
+    """
+    Af3Pae.from_alphafold3(confidences_file.data, cif_file).to_file(output_file)
+    cif_file.release()
+    return PaeFile(output_file)
@@ -0,0 +1,505 @@
+from enum import IntEnum
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from Bio.Data.IUPACData import atom_weights
+from Bio.PDB.Chain import Chain
+from Bio.PDB.Polypeptide import is_aa
+from Bio.PDB.StructureBuilder import StructureBuilder
+from Bio.SeqUtils import seq1
+
+# Values used by mmCIF for unassigned items
+UNASSIGNED = (".", "?")
+
+ATOM_SITE_COLUMNS = (
+    "group_PDB",
+    "type_symbol",
+    "label_atom_id",
+    "label_alt_id",
+    "label_comp_id",
+    "auth_asym_id",
+    "auth_seq_id",
+    "pdbx_PDB_ins_code",
+    "Cartn_x",
+    "Cartn_y",
+    "Cartn_z",
+    "occupancy",
+    "B_iso_or_equiv",
+)
+
+
+class EntityType(IntEnum):
+    """
+    Enum class for the entity type codes stored in the atom table
+    """
+
+    UNKNOWN = -1
+    PROTEIN = 0
+    RNA = 1
+    DNA = 2
+    LIGAND = 3
+
+    @classmethod
+    def from_name(cls, name: str) -> "EntityType":
+        return cls.__members__.get(name.upper(), cls.UNKNOWN)
+
+
+POLYMER_TYPES = (EntityType.PROTEIN, EntityType.RNA, EntityType.DNA)
+
+
+class AtomTable:
+    def __init__(
+        self,
+        coords: np.ndarray,
+        bfactor: np.ndarray,
+        occupancy: np.ndarray,
+        element: np.ndarray,
+        atom_name: np.ndarray,
+        altloc: np.ndarray,
+        residue_index: np.ndarray,
+        residue_name: np.ndarray,
+        residue_seq: np.ndarray,
+        residue_icode: np.ndarray,
+        residue_hetflag: np.ndarray,
+        residue_chain_index: np.ndarray,
+        chain_ids: Sequence[str],
+    ):
+        """
+        Struct-of-arrays representation of the first model of a structure. Atoms
+        are stored in file order, residues and chains are stored in the order they
+        are first seen and every residue / chain is a contiguous block of atoms.
+
+        Args:
+            coords (np.ndarray): (n_atoms, 3) array of atom coordinates
+            bfactor (np.ndarray): B-factor (pLDDT) of each atom
+            occupancy (np.ndarray): Occupancy of each atom
+            element (np.ndarray): Element of each atom
+            atom_name (np.ndarray): Name of each atom
+            altloc (np.ndarray): Alternative location indicator of each atom
+            residue_index (np.ndarray): Index of the residue each atom belongs to
+            residue_name (np.ndarray): Name of each residue
+            residue_seq (np.ndarray): Sequence number of each residue
+            residue_icode (np.ndarray): Insertion code of each residue
+            residue_hetflag (np.ndarray): Hetero flag of each residue, " " for
+            standard residues, "H" for hetero residues and "W" for waters
+            residue_chain_index (np.ndarray): Index of the chain each residue
+            belongs to
+            chain_ids (Sequence[str]): Id of each chain, ids may be repeated when
+            several chains have been given the same label
+
+        Attributes:
+            chain_index (np.ndarray): Index of the chain each atom belongs to
+            entity_type (np.ndarray): EntityType code of each atom
+        """
+        self.coords = np.asarray(coords, dtype=np.float32).reshape(-1, 3)
+        self.bfactor = np.asarray(bfactor, dtype=np.float64)
+        self.occupancy = np.asarray(occupancy, dtype=np.float64)
+        self.element = np.asarray(element, dtype=str)
+        self.atom_name = np.asarray(atom_name, dtype=str)
+        self.altloc = np.asarray(altloc, dtype=str)
+        self.residue_index = np.asarray(residue_index, dtype=np.int64)
+
+        self.residue_name = np.asarray(residue_name, dtype=str)
+        self.residue_seq = np.asarray(residue_seq, dtype=np.int64)
+        self.residue_icode = np.asarray(residue_icode, dtype=str)
+        self.residue_hetflag = np.asarray(residue_hetflag, dtype=str)
+        self.residue_chain_index = np.asarray(residue_chain_index, dtype=np.int64)
+
+        self.chain_ids: List[str] = list(chain_ids)
+
+        self.chain_index = self.residue_chain_index[self.residue_index]
+        self.chain_entity_type = np.full(
+            len(self.chain_ids), EntityType.UNKNOWN, dtype=np.int8
+        )
+        self.entity_type = self.chain_entity_type[self.chain_index]
+
+    @classmethod
+    def from_structure(cls, structure) -> "AtomTable":
+        """
+        Build the table from the first model of a BioPython structure in a single
+        walk over the structure
+
+        Args:
+            structure (Structure): BioPython structure object
+
+        Returns:
+            AtomTable: Table containing the atoms of the first model
+        """
+        coords, bfactor, occupancy, element, atom_name, altloc = [], [], [], [], [], []
+        residue_index = []
+        residue_name, residue_seq, residue_icode, residue_hetflag = [], [], [], []
+        residue_chain_index, chain_ids = [], []
+
+        for chain in structure[0]:
+            chain_ids.append(chain.id)
+            for residue in chain:
+                hetflag, resseq, icode = residue.id
+                residue_name.append(residue.get_resname())
+                residue_seq.append(resseq)
+                residue_icode.append(icode)
+                residue_hetflag.append(hetflag[0])
+                residue_chain_index.append(len(chain_ids) - 1)
+                for atom in residue:
+                    coords.append(atom.coord)
+                    bfactor.append(atom.bfactor)
+                    occupancy.append(atom.occupancy)
+                    element.append(atom.element)
+                    atom_name.append(atom.get_name())
+                    altloc.append(atom.altloc)
+                    residue_index.append(len(residue_name) - 1)
+
+        return cls(
+            coords=np.array(coords, dtype=np.float32),
+            bfactor=bfactor,
+            occupancy=occupancy,
+            element=element,
+            atom_name=atom_name,
+            altloc=altloc,
+            residue_index=residue_index,
+            residue_name=residue_name,
+            residue_seq=residue_seq,
+            residue_icode=residue_icode,
+            residue_hetflag=residue_hetflag,
+            residue_chain_index=residue_chain_index,
+            chain_ids=chain_ids,
+        )
+
+    @classmethod
+    def from_atom_site(cls, atom_site: Dict[str, np.ndarray]) -> Optional["AtomTable"]:
+        """
+        Build the table from the _atom_site columns read by `read_mmcif`, following
+        the conventions of Bio.PDB's MMCIFParser (author chain and residue ids, first
+        model only, waters flagged with "W").
+
+        Files that need Biopython's structure building rules to be represented
+        faithfully (alternative locations, repeated residues or atoms and unknown
+        elements) are not handled and None is returned so the caller can fall back
+        to Biopython.
+
+        Args:
+            atom_site (Dict[str, np.ndarray]): Columns of the _atom_site loop
+
+        Returns:
+            Optional[AtomTable]: Table containing the atoms of the first model, None
+            if the file has to be parsed with Biopython
+        """
+        if any(column not in atom_site for column in ATOM_SITE_COLUMNS):
+            return None
+
+        keep = atom_site["auth_seq_id"] != "."
+        if "pdbx_PDB_model_num" in atom_site:
+            model_num = atom_site["pdbx_PDB_model_num"][keep]
+            model_change = np.flatnonzero(model_num != model_num[:1])
+            if len(model_change):
+                keep[np.flatnonzero(keep)[model_change[0]:]] = False
+        columns = {column: atom_site[column][keep] for column in ATOM_SITE_COLUMNS}
+        if len(columns["group_PDB"]) == 0 or not np.all(
+            np.isin(columns["label_alt_id"], UNASSIGNED)
+        ):
+            return None
+
+        element = np.char.upper(columns["type_symbol"].astype(str))
+        if any(
+            symbol.capitalize() not in atom_weights for symbol in np.unique(element)
+        ):
+            return None
+
+        try:
+            residue_seq = columns["auth_seq_id"].astype(np.int64)
+            bfactor = columns["B_iso_or_equiv"].astype(np.float64)
+            occupancy = columns["occupancy"].astype(np.float64)
+            coords = np.stack(
+                [
+                    columns[axis].astype(np.float64)
+                    for axis in ("Cartn_x", "Cartn_y", "Cartn_z")
+                ],
+                axis=1,
+            ).astype(np.float32)
+        except ValueError:
+            return None
+
+        residue_name = columns["label_comp_id"].astype(str)
+        icode = np.where(
+            np.isin(columns["pdbx_PDB_ins_code"], UNASSIGNED),
+            " ",
+            columns["pdbx_PDB_ins_code"],
+        ).astype(str)
+        hetflag = np.where(
+            columns["group_PDB"] == "HETATM",
+            np.where(np.isin(residue_name, ("HOH", "WAT")), "W", "H"),
+            " ",
+        )
+
+        chain = columns["auth_asym_id"].astype(str)
+        residue_start = np.concatenate(([True], chain[1:] != chain[:-1]))
+        for residue_key in (hetflag, residue_seq, icode, residue_name):
+            residue_start[1:] |= residue_key[1:] != residue_key[:-1]
+
+        # Biopython appends the atoms of a discontinuous chain (e.g. the waters
+        # listed after every polymer in PDB entries) to the first chain with that
+        # id, a stable sort on the chain gives the same order
+        chain_ids, first_seen, chain_code = np.unique(
+            chain, return_index=True, return_inverse=True
+        )
+        chain_rank = np.argsort(np.argsort(first_seen))
+        order = np.argsort(chain_rank[chain_code], kind="stable")
+        chain_ids = chain_ids[np.argsort(first_seen)].tolist()
+
+        residue_index = (np.cumsum(residue_start) - 1)[order]
+        residue_start = np.concatenate(
+            ([True], residue_index[1:] != residue_index[:-1])
+        )
+        residue_index = np.cumsum(residue_start) - 1
+        residue_chain_index = chain_rank[chain_code][order][residue_start]
+        coords, bfactor, occupancy = coords[order], bfactor[order], occupancy[order]
+        element = element[order]
+        atom_name = columns["label_atom_id"][order].astype(str)
+        residue_name, residue_seq = residue_name[order], residue_seq[order]
+        icode, hetflag = icode[order], hetflag[order]
+
+        # Biopython merges repeated residues and flags repeated atoms, neither of
+        # which can be represented as contiguous blocks
+        hetfield = np.where(
+            hetflag == "H", np.char.add("H_", residue_name), hetflag
+        )[residue_start]
+        residue_ids = set(
+            zip(
+                residue_chain_index.tolist(),
+                hetfield.tolist(),
+                residue_seq[residue_start].tolist(),
+                icode[residue_start].tolist(),
+            )
+        )
+        if len(residue_ids) != len(residue_chain_index):
+            return None
+        names, name_codes = np.unique(atom_name, return_inverse=True)
+        if len(np.unique(residue_index * len(names) + name_codes)) != len(name_codes):
+            return None
+
+        return cls(
+            coords=coords,
+            bfactor=bfactor,
+            occupancy=occupancy,
+            element=element,
+            atom_name=atom_name,
+            altloc=np.full(len(coords), " "),
+            residue_index=residue_index,
+            residue_name=residue_name[residue_start],
+            residue_seq=residue_seq[residue_start],
+            residue_icode=icode[residue_start],
+            residue_hetflag=hetflag[residue_start],
+            residue_chain_index=residue_chain_index,
+            chain_ids=chain_ids,
+        )
+
+    def to_structure(self, structure_id: str):
+        """
+        Build a BioPython structure containing a single model from the table
+
+        Args:
+            structure_id (str): Id given to the structure
+
+        Returns:
+            Structure: BioPython structure object
+        """
+        builder = StructureBuilder()
+        builder.init_structure(structure_id)
+        builder.init_model(0)
+        builder.init_seg(" ")
+        model = builder.get_structure()[0]
+
+        residue_atoms = np.concatenate(([0], np.cumsum(self.residue_atom_counts())))
+        for chain_index, residue_slice in enumerate(self.chain_residue_slices()):
+            # Chains are added directly so that repeated chain ids are kept as
+            # separate chains, as they are after relabelling with linked ids
+            builder.chain = Chain(f"_{chain_index}")
+            model.add(builder.chain)
+            for residue in range(residue_slice.start, residue_slice.stop):
+                builder.init_residue(
+                    str(self.residue_name[residue]),
+                    str(self.residue_hetflag[residue]),
+                    int(self.residue_seq[residue]),
+                    str(self.residue_icode[residue]),
+                )
+                for atom in range(residue_atoms[residue], residue_atoms[residue + 1]):
+                    builder.init_atom(
+                        str(self.atom_name[atom]),
+                        self.coords[atom],
+                        float(self.bfactor[atom]),
+                        float(self.occupancy[atom]),
+                        str(self.altloc[atom]),
+                        str(self.atom_name[atom]),
+                        serial_number=atom + 1,
+                        element=str(self.element[atom]),
+                    )
+            builder.chain.id = self.chain_ids[chain_index]
+
+        return builder.get_structure()
+
+    def select(self, atom_mask: np.ndarray) -> "AtomTable":
+        """
+        Get a new table containing the selected atoms
+
+        Args:
+            atom_mask (np.ndarray): Boolean mask of the atoms to keep
+
+        Returns:
+            AtomTable: Table of the selected atoms, residues and chains without
+            atoms are removed
+        """
+        residues, residue_index = np.unique(
+            self.residue_index[atom_mask], return_inverse=True
+        )
+        chains, residue_chain_index = np.unique(
+            self.residue_chain_index[residues], return_inverse=True
+        )
+        atom_table = AtomTable(
+            coords=self.coords[atom_mask],
+            bfactor=self.bfactor[atom_mask],
+            occupancy=self.occupancy[atom_mask],
+            element=self.element[atom_mask],
+            atom_name=self.atom_name[atom_mask],
+            altloc=self.altloc[atom_mask],
+            residue_index=residue_index,
+            residue_name=self.residue_name[residues],
+            residue_seq=self.residue_seq[residues],
+            residue_icode=self.residue_icode[residues],
+            residue_hetflag=self.residue_hetflag[residues],
+            residue_chain_index=residue_chain_index,
+            chain_ids=[self.chain_ids[chain] for chain in chains],
+        )
+        atom_table.set_chain_entity_types(self.chain_entity_type[chains])
+        return atom_table
+
+    def take_chains(self, chain_order: Sequence[int]) -> "AtomTable":
+        """
+        Get a new table with the chains in the given order
+
+        Args:
+            chain_order (Sequence[int]): Index of each chain to take, in the order
+            they appear in the new table
+
+        Returns:
+            AtomTable: Table of the taken chains
+        """
+        chain_order = np.asarray(chain_order, dtype=np.int64)
+        atom_slices = self.chain_atom_slices()
+        residue_slices = self.chain_residue_slices()
+        atom_order = np.concatenate(
+            [np.arange(atom_slices[i].start, atom_slices[i].stop) for i in chain_order]
+            + [np.zeros(0, dtype=np.int64)]
+        )
+        residue_order = np.concatenate(
+            [
+                np.arange(residue_slices[i].start, residue_slices[i].stop)
+                for i in chain_order
+            ]
+            + [np.zeros(0, dtype=np.int64)]
+        )
+        # new position of each taken residue and chain
+        residue_rank = np.zeros(self.n_residues, dtype=np.int64)
+        residue_rank[residue_order] = np.arange(len(residue_order))
+        chain_rank = np.zeros(self.n_chains, dtype=np.int64)
+        chain_rank[chain_order] = np.arange(len(chain_order))
+
+        atom_table = AtomTable(
+            coords=self.coords[atom_order],
+            bfactor=self.bfactor[atom_order],
+            occupancy=self.occupancy[atom_order],
+            element=self.element[atom_order],
+            atom_name=self.atom_name[atom_order],
+            altloc=self.altloc[atom_order],
+            residue_index=residue_rank[self.residue_index[atom_order]],
+            residue_name=self.residue_name[residue_order],
+            residue_seq=self.residue_seq[residue_order],
+            residue_icode=self.residue_icode[residue_order],
+            residue_hetflag=self.residue_hetflag[residue_order],
+            residue_chain_index=chain_rank[self.residue_chain_index[residue_order]],
+            chain_ids=[self.chain_ids[i] for i in chain_order],
+        )
+        atom_table.set_chain_entity_types(self.chain_entity_type[chain_order])
+        return atom_table
+
+    def __len__(self) -> int:
+        return len(self.bfactor)
+
+    @property
+    def n_residues(self) -> int:
+        return len(self.residue_name)
+
+    @property
+    def n_chains(self) -> int:
+        return len(self.chain_ids)
+
+    def set_chain_entity_types(self, entity_types: Sequence[int]) -> None:
+        """
+        Set the EntityType code of each chain and broadcast it to the atoms
+
+        Args:
+            entity_types (Sequence[int]): EntityType code for each chain
+        """
+        self.chain_entity_type = np.asarray(entity_types, dtype=np.int8)
+        self.entity_type = self.chain_entity_type[self.chain_index]
+
+    def chain_mask(self, chain_id: str) -> np.ndarray:
+        """
+        Boolean mask of the atoms in the chain(s) with the given id
+        """
+        return np.isin(
+            self.chain_index,
+            [i for i, chain in enumerate(self.chain_ids) if chain == chain_id],
+        )
+
+    def chain_atom_counts(self) -> np.ndarray:
+        return np.bincount(self.chain_index, minlength=self.n_chains)
+
+    def chain_residue_counts(self) -> np.ndarray:
+        return np.bincount(self.residue_chain_index, minlength=self.n_chains)
+
+    def residue_atom_counts(self) -> np.ndarray:
+        return np.bincount(self.residue_index, minlength=self.n_residues)
+
+    def chain_atom_slices(self) -> List[slice]:
+        bounds = np.concatenate([[0], np.cumsum(self.chain_atom_counts())])
+        return [slice(int(start), int(end)) for start, end in zip(bounds, bounds[1:])]
+
+    def chain_residue_slices(self) -> List[slice]:
+        bounds = np.concatenate([[0], np.cumsum(self.chain_residue_counts())])
+        return [slice(int(start), int(end)) for start, end in zip(bounds, bounds[1:])]
+
+    def residue_mean(self, values: np.ndarray) -> np.ndarray:
+        """
+        Average a per-atom array over each residue
+        """
+        return np.bincount(
+            self.residue_index, weights=values, minlength=self.n_residues
+        ) / np.maximum(self.residue_atom_counts(), 1)
+
+    def residue_first_named(self, name: str) -> np.ndarray:
+        """
+        Get the index of the first atom with the given name in each residue, -1 if
+        the residue has no such atom
+        """
+        first = np.full(self.n_residues, -1, dtype=np.int64)
+        atom_indices = np.flatnonzero(self.atom_name == name)
+        residues, first_position = np.unique(
+            self.residue_index[atom_indices], return_index=True
+        )
+        first[residues] = atom_indices[first_position]
+        return first
+
+    def standard_amino_acids(self) -> np.ndarray:
+        """
+        Boolean mask of the residues that are one of the 20 standard amino acids
+        """
+        names, inverse = np.unique(self.residue_name, return_inverse=True)
+        return np.array([is_aa(name, standard=True) for name in names], dtype=bool)[
+            inverse
+        ]
+
+    def one_letter_codes(self) -> np.ndarray:
+        """
+        One letter code of each residue
+        """
+        names, inverse = np.unique(self.residue_name, return_inverse=True)
+        return np.array([seq1(name) for name in names], dtype=object)[inverse]
@@ -2,10 +2,15 @@ import logging
 from pathlib import Path
 from typing import Union
 
+import numpy as np
+
 from abcfold.boltz1.af3_to_boltz1 import BoltzYaml
 from abcfold.output.file_handlers import (CifFile, ConfidenceJsonFile,
-                                          FileTypes, ModelCount, NpzFile)
-from abcfold.output.utils import Af3Pae
+                                          FileTypes, ModelCount, NpzFile,
+                                          PaeFile)
+from abcfold.output.manifest import OutputManifest
+from abcfold.output.model_summary import ModelRecord
+from abcfold.output.utils import Af3Pae, map_models
 
 logger = logging.getLogger("logger")
 
@@ -16,6 +21,7 @@ class BoltzOutput:
         boltz_output_dir: Union[str, Path],
         input_params: dict,
         name: str,
+        post_workers: int = 1,
     ):
         """
         Object to process the output of an Boltz-1 run
@@ -25,12 +31,20 @@ class BoltzOutput:
             input_params (dict): Dictionary containing the input parameters used for the
             Boltz-1 run
             name (str): Name given to the Boltz-1 run
+            post_workers (int): Number of processes the models are post-processed
+            in, 1 processes them one after another
 
         Attributes:
             output_dir (Path): Path to the Boltz-1 output directory
             input_params (dict): Dictionary containing the input parameters used for the
             Boltz-1 run
             name (str): Name given to the Boltz-1 run
+            manifest (OutputManifest): Record of the normalization of the output
+            directory, the models are only relabelled and their PAE converted when it
+            does not match
+            normalized (bool): Whether the outputs were already normalized
+            records (Dict[Path, ModelRecord]): Record of each model by its path,
+            read from the manifest when the outputs were already normalized
             output (dict): Dictionary containing the processed output the contents
             of the Boltz-1 output directory. The dictionary is structured as follows:
 
@@ -55,7 +69,8 @@ class BoltzOutput:
             plddt_files (list): Ordered list of NpzFile objects containing the PLDDT
             data
             pde_files (list):  Ordered list of NpzFile objects containing the PDE data
-            cif_files (list): Ordered list of CifFile objects containing the model data
+            cif_files (list): Ordered list of CifFile handles to the models, their
+            atoms are only read while each model is summarized
             scores_files (list): Ordered list of ConfidenceJsonFile objects containing
             the model scores
 
@@ -63,11 +78,14 @@ class BoltzOutput:
         self.output_dir = Path(boltz_output_dir)
         self.input_params = input_params
         self.name = name
+        self.post_workers = post_workers
 
         if self.output_dir.name.startswith("boltz_results_"):
             self.output_dir = self.output_dir.rename(
                 self.output_dir.parent / f"boltz-1_{name}"
             )
+        self.manifest = OutputManifest(self.output_dir)
+        self.normalized = False
         self.yaml_input_obj = self.get_input_yaml()
         self.output = self.process_boltz_output()
 
@@ -75,6 +93,8 @@ class BoltzOutput:
         self.cif_files = [value["cif"] for value in self.output.values()]
         self.pae_to_af3()
         self.af3_pae_files = [value["af3_pae"] for value in self.output.values()]
+        if not self.normalized:
+            self.manifest.write(self.records.values())
         self.plddt_files = [value["plddt"] for value in self.output.values()]
         self.pde_files = [value["pde"] for value in self.output.values()]
         self.scores_files = [value["json"] for value in self.output.values()]
@@ -84,6 +104,7 @@ class BoltzOutput:
         Function to process the output of a Boltz-1 run
         """
         file_groups = {}
+        cif_pathways = {}
         for pathway in self.output_dir.rglob("*"):
             number = pathway.stem.split("_model_")[-1]
             if not number.isdigit():
@@ -94,7 +115,10 @@ class BoltzOutput:
             if file_type == FileTypes.NPZ.value:
                 file_ = NpzFile(str(pathway))
             elif file_type == FileTypes.CIF.value:
-                file_ = CifFile(str(pathway), self.input_params)
+                # The models are relabelled below, in parallel if requested
+                cif_pathways[number] = pathway
+                file_groups.setdefault(number, [])
+                continue
 
             elif file_type == FileTypes.JSON.value:
                 file_ = ConfidenceJsonFile(str(pathway))
@@ -115,15 +139,44 @@ class BoltzOutput:
                     intermediate_dict["plddt"] = file_
                 elif file_.pathway.stem.startswith("pde"):
                     intermediate_dict["pde"] = file_
-                elif file_.pathway.suffix == ".cif":
-                    file_.name = f"Boltz-1_{model_number}"
-                    file_ = self.update_chain_labels(file_)
-                    intermediate_dict["cif"] = file_
                 else:
                     intermediate_dict[file_.suffix] = file_
 
             model_number_file_type_file[model_number] = intermediate_dict
 
+        model_numbers = list(cif_pathways)
+        sources = list(cif_pathways.values()) + [
+            files["pae"].pathway
+            for files in model_number_file_type_file.values()
+            if "pae" in files
+        ]
+        models = [cif_pathways[model_number] for model_number in model_numbers]
+        self.normalized = self.manifest.is_current(sources, models)
+        if self.normalized:
+            # Nothing is read from the models, their records are in the manifest
+            records = [self.manifest.records()[pathway] for pathway in models]
+        else:
+            self.manifest.record_sources(sources)
+            records = map_models(
+                process_boltz_cif,
+                [
+                    (
+                        cif_pathways[model_number],
+                        self.input_params,
+                        f"Boltz-1_{model_number}",
+                        self.yaml_input_obj.chain_ids,
+                        self.yaml_input_obj.id_links,
+                    )
+                    for model_number in model_numbers
+                ],
+                self.post_workers,
+            )
+        self.records = {record.pathway: record for record in records}
+        for model_number, record in zip(model_numbers, records):
+            model_number_file_type_file[model_number]["cif"] = record.cif_file(
+                self.input_params
+            )
+
         model_number_file_type_file = {
             key: model_number_file_type_file[key]
             for key in sorted(model_number_file_type_file)
@@ -143,7 +196,6 @@ class BoltzOutput:
             of residues in the CIF file
         """
         for cif_file, plddt_scores in zip(self.cif_files, self.plddt_files):
-            cif_file = self.update_chain_labels(cif_file)
             plddt_score = plddt_scores.data["plddt"]
             if max(plddt_score) <= 1:
                 plddt_score = (plddt_score * 100).astype(float)
@@ -154,21 +206,20 @@ class BoltzOutput:
 
             assert sum(chain_lengths.values()) == len(plddt_score), "Length mismatch"
 
-            counter = 0
-            for chain in cif_file.model[0]:
-
-                # Boltz does ligand plddt per atom so we need to count them separately
-                ligand = cif_file.check_ligand(chain)
-
-                for residue in chain:
-                    for atom in residue:
-                        atom.b_iso = plddt_score[counter]
-                        if ligand:
-                            counter += 1
-                    if not ligand:
-                        counter += 1
-
-            assert counter == len(plddt_score), "Length mismatch"
+            # Boltz does ligand plddt per atom and per residue for everything else,
+            # a new token starts at every ligand atom and every new residue
+            atom_table = cif_file.atom_table
+            ligand = np.array(
+                [cif_file.check_ligand(chain_id) for chain_id in atom_table.chain_ids],
+                dtype=bool,
+            )[atom_table.chain_index]
+            token_start = ligand | np.diff(
+                atom_table.residue_index, prepend=-1
+            ).astype(bool)
+            token_index = np.cumsum(token_start) - 1
+
+            assert token_start.sum() == len(plddt_score), "Length mismatch"
+            cif_file.plddts = np.asarray(plddt_score, dtype=float)[token_index]
             cif_file.update()
 
     def pae_to_af3(self):
@@ -178,19 +229,30 @@ class BoltzOutput:
         Returns:
             None
         """
-        for i, (pae_file, cif_file) in enumerate(zip(self.pae_files, self.cif_files)):
-            pae = Af3Pae.from_boltz1(
-                pae_file.data,
-                cif_file,
-            )
-
-            out_name = cif_file.pathway.parent.joinpath(
-                cif_file.pathway.stem + "_af3_pae.json"
+        out_names = [
+            cif_file.pathway.parent.joinpath(cif_file.pathway.stem + "_af3_pae.npz")
+            for cif_file in self.cif_files
+        ]
+        if self.normalized:
+            af3_pae_files = [
+                PaeFile(self.records[cif_file.pathway].derived["af3_pae"])
+                for cif_file in self.cif_files
+            ]
+        else:
+            af3_pae_files = map_models(
+                boltz_pae_to_af3,
+                [
+                    (pae_file.data, cif_file, out_name)
+                    for pae_file, cif_file, out_name in zip(
+                        self.pae_files, self.cif_files, out_names
+                    )
+                ],
+                self.post_workers,
             )
-
-            pae.to_file(out_name)
-
-            self.output[i]["af3_pae"] = ConfidenceJsonFile(out_name)
+            for cif_file, af3_pae_file in zip(self.cif_files, af3_pae_files):
+                self.records[cif_file.pathway].derived["af3_pae"] = af3_pae_file.pathway
+        for i, af3_pae_file in enumerate(af3_pae_files):
+            self.output[i]["af3_pae"] = af3_pae_file
 
     def update_chain_labels(self, cif_file) -> CifFile:
         """
@@ -217,3 +279,53 @@ class BoltzOutput:
         by.json_to_yaml(self.input_params)
 
         return by
+
+
+def process_boltz_cif(
+    cif_pathway: Path,
+    input_params: dict,
+    name: str,
+    chain_ids: list,
+    id_links: dict,
+) -> ModelRecord:
+    """
+    Load a Boltz-1 model, relabel its chains with the ids of the input and write it
+    back. Runs in a worker process when the models are post-processed in parallel,
+    only the record of the model is sent back
+
+    Args:
+        cif_pathway (Path): Path to the CIF file of the model
+        input_params (dict): Dictionary containing the input parameters used for the
+        Boltz-1 run
+        name (str): Name given to the model
+        chain_ids (list): Chain ids of the input
+        id_links (dict): Linked ligand chains of the input
+
+    Returns:
+        ModelRecord: Record of the relabelled model
+    """
+    cif_file = CifFile(str(cif_pathway), input_params)
+    cif_file.name = name
+    cif_file.relabel_chains(chain_ids, id_links)
+    cif_file.update()
+    return ModelRecord.from_cif(cif_file)
+
+
+def boltz_pae_to_af3(
+    pae_scores: dict, cif_file: CifFile, output_file: Path
+) -> PaeFile:
+    """
+    Convert the PAE data of a Boltz-1 model to the format used by Alphafold3 and
+    write it to file
+
+    Args:
+        pae_scores (dict): Data of the Boltz-1 PAE npz file
+        cif_file (CifFile): The model the PAE belongs to
+        output_file (Path): Path to write the converted scores to
+
+    Returns:
+        PaeFile: The converted scores
+    """
+    Af3Pae.from_boltz1(pae_scores, cif_file).to_file(output_file)
+    cif_file.release()
+    return PaeFile(output_file)
@@ -3,9 +3,11 @@ from pathlib import Path
 from typing import Union
 
 from abcfold.chai1.af3_to_chai import ChaiFasta
-from abcfold.output.file_handlers import (CifFile, ConfidenceJsonFile,
-                                          FileTypes, NpyFile, NpzFile)
-from abcfold.output.utils import Af3Pae
+from abcfold.output.file_handlers import (CifFile, FileTypes, NpyFile, NpzFile,
+                                          PaeFile)
+from abcfold.output.manifest import OutputManifest
+from abcfold.output.model_summary import ModelRecord
+from abcfold.output.utils import Af3Pae, map_models
 
 logger = logging.getLogger("logger")
 
@@ -16,6 +18,7 @@ class ChaiOutput:
         chai_output_dir: Union[str, Path],
         input_params: dict,
         name: str,
+        post_workers: int = 1,
     ):
         """
         Object to process the output of an Chai-1 run
@@ -25,12 +28,20 @@ class ChaiOutput:
             input_params (dict): Dictionary containing the input parameters used for the
             Chai-1 run
             name (str): Name given to the Chai-1 run
+            post_workers (int): Number of processes the models are post-processed
+            in, 1 processes them one after another
 
         Attributes:
             input_params (dict): Dictionary containing the input parameters used for the
             Chai-1 run
             output_dir (Path): Path to the Chai-1 output directory
             name (str): Name given to the Chai-1 run
+            manifest (OutputManifest): Record of the normalization of the output
+            directory, the models are only relabelled and their PAE converted when it
+            does not match
+            normalized (bool): Whether the outputs were already normalized
+            records (Dict[Path, ModelRecord]): Record of each model by its path,
+            read from the manifest when the outputs were already normalized
             output (dict): Dictionary containing the processed output the contents
             of the Chai-1 output directory. The dictionary is structured as follows:
 
@@ -48,7 +59,8 @@ class ChaiOutput:
                 ...
             }
             pae_files (list): Ordered list of NpzFile objects containing the PAE data
-            cif_files (list): Ordered list of CifFile objects containing the CIF data
+            cif_files (list): Ordered list of CifFile handles to the models, their
+            atoms are only read while each model is summarized
             scores_files (list):  Ordered list of NpyFile objects containing the scores
             data
 
@@ -56,11 +68,14 @@ class ChaiOutput:
         self.input_params = input_params
         self.output_dir = Path(chai_output_dir)
         self.name = name
+        self.post_workers = post_workers
 
         if not self.output_dir.name.startswith("chai1_" + self.name):
             self.output_dir = self.output_dir.rename(
                 self.output_dir.parent / f"chai1_{self.name}"
             )
+        self.manifest = OutputManifest(self.output_dir)
+        self.normalized = False
         self.input_fasta = self.get_input_fasta()
 
         self.output = self.process_chai_output()
@@ -77,9 +92,12 @@ class ChaiOutput:
         self.af3_pae_files = [
             value["af3_pae"] for value in self.output.values() if "af3_pae" in value
         ]
+        if not self.normalized:
+            self.manifest.write(self.records.values())
 
     def process_chai_output(self):
         file_groups = {}
+        cif_pathways = {}
 
         for pathway in self.output_dir.iterdir():
             number = pathway.stem.split("model_idx_")[-1]
@@ -92,8 +110,8 @@ class ChaiOutput:
                 file_ = NpzFile(str(pathway))
 
             elif file_type == FileTypes.CIF.value:
-                file_ = CifFile(str(pathway), self.input_params)
-                file_ = self.update_chain_labels(file_)
+                # The models are relabelled below, in parallel if requested
+                file_ = None
 
             elif file_type == FileTypes.NPY.value:
                 file_ = NpyFile(str(pathway))
@@ -103,6 +121,11 @@ class ChaiOutput:
             if isinstance(number, str):
                 number = -1
 
+            if file_ is None:
+                cif_pathways.setdefault(number, []).append(pathway)
+                file_groups.setdefault(number, [])
+                continue
+
             if number not in file_groups:
                 file_groups[number] = [file_]
             else:
@@ -114,16 +137,43 @@ class ChaiOutput:
             for file_ in sorted(files, key=lambda x: x.suffix):
                 if file_.pathway.stem.startswith("scores.model"):
                     intermediate_dict["scores"] = file_
-                elif file_.pathway.stem.startswith("pred.model"):
-                    file_.name = f"Chai-1_{model_number}"
-                    # Chai cif not recognised by pae-viewer, so we load and save
-                    file_.to_file(file_.pathway)
-                    intermediate_dict["cif"] = file_
                 elif file_.pathway.stem.startswith("pae_scores"):
                     intermediate_dict["pae"] = file_
 
             model_number_file_type_file[model_number] = intermediate_dict
 
+        sources = [
+            pathway for pathways in cif_pathways.values() for pathway in pathways
+        ] + [
+            files["pae"].pathway
+            for files in model_number_file_type_file.values()
+            if "pae" in files
+        ]
+        tasks = [
+            (
+                pathway,
+                self.input_params,
+                model_number,
+                self.input_fasta.chain_ids,
+            )
+            for model_number, pathways in cif_pathways.items()
+            for pathway in pathways
+        ]
+        models = [pathway for pathway, *_ in tasks]
+        self.normalized = self.manifest.is_current(sources, models)
+        if self.normalized:
+            # Nothing is read from the models, their records are in the manifest
+            records = [self.manifest.records()[pathway] for pathway in models]
+        else:
+            self.manifest.record_sources(sources)
+            records = map_models(process_chai_cif, tasks, self.post_workers)
+        self.records = {record.pathway: record for record in records}
+        for (pathway, _, model_number, _), record in zip(tasks, records):
+            if pathway.stem.startswith("pred.model"):
+                model_number_file_type_file[model_number]["cif"] = record.cif_file(
+                    self.input_params
+                )
+
         model_number_file_type_file = {
             model_number: model_number_file_type_file[model_number]
             for model_number in sorted(model_number_file_type_file)
@@ -137,17 +187,31 @@ class ChaiOutput:
 
         """
 
-        pae_file = self.pae_files[-1]
-        for i, cif_file in enumerate(self.cif_files):
-            pae = Af3Pae.from_chai1(
-                pae_file.data[i],
-                cif_file,
+        out_names = [
+            self.output_dir.joinpath(cif_file.pathway.stem + "_af3_pae.npz")
+            for cif_file in self.cif_files
+        ]
+        if self.normalized:
+            af3_pae_files = [
+                PaeFile(self.records[cif_file.pathway].derived["af3_pae"])
+                for cif_file in self.cif_files
+            ]
+        else:
+            pae_file = self.pae_files[-1]
+            af3_pae_files = map_models(
+                chai_pae_to_af3,
+                [
+                    (pae_file, i, cif_file, out_name)
+                    for i, (cif_file, out_name) in enumerate(
+                        zip(self.cif_files, out_names)
+                    )
+                ],
+                self.post_workers,
             )
-
-            out_name = self.output_dir.joinpath(cif_file.pathway.stem + "_af3_pae.json")
-            pae.to_file(out_name)
-
-            self.output[i]["af3_pae"] = ConfidenceJsonFile(out_name)
+            for cif_file, af3_pae_file in zip(self.cif_files, af3_pae_files):
+                self.records[cif_file.pathway].derived["af3_pae"] = af3_pae_file.pathway
+        for i, af3_pae_file in enumerate(af3_pae_files):
+            self.output[i]["af3_pae"] = af3_pae_file
 
     def get_input_fasta(self) -> ChaiFasta:
         """
@@ -173,5 +237,57 @@ class ChaiOutput:
         """
 
         cif_file.relabel_chains(self.input_fasta.chain_ids)
-        cif_file.to_file(cif_file.pathway)
-        return CifFile(cif_file.pathway, self.input_params)
+        return cif_file
+
+
+def process_chai_cif(
+    cif_pathway: Path,
+    input_params: dict,
+    model_number: int,
+    chain_ids: list,
+) -> ModelRecord:
+    """
+    Load a Chai-1 model, relabel its chains with the ids of the input and write it
+    back. Runs in a worker process when the models are post-processed in parallel,
+    only the record of the model is sent back
+
+    Args:
+        cif_pathway (Path): Path to the CIF file of the model
+        input_params (dict): Dictionary containing the input parameters used for the
+        Chai-1 run
+        model_number (int): Index of the model
+        chain_ids (list): Chain ids of the input
+
+    Returns:
+        ModelRecord: Record of the relabelled model
+    """
+    cif_file = CifFile(str(cif_pathway), input_params)
+    cif_file.relabel_chains(chain_ids)
+    # Chai cif not recognised by pae-viewer, so the relabelled model is written back
+    # once here
+    cif_file.update()
+    if cif_pathway.stem.startswith("pred.model"):
+        cif_file.name = f"Chai-1_{model_number}"
+    return ModelRecord.from_cif(cif_file)
+
+
+def chai_pae_to_af3(
+    pae_file: NpyFile, model_index: int, cif_file: CifFile, output_file: Path
+) -> PaeFile:
+    """
+    Convert the PAE matrix of a Chai-1 model to the format expected by AlphaFold3
+    and write it to file. The matrix is read here, in the worker process when the
+    models are post-processed in parallel
+
+    Args:
+        pae_file (NpyFile): PAE matrices of every model of the run
+        model_index (int): Index of the model in the PAE matrices
+        cif_file (CifFile): The model the PAE belongs to
+        output_file (Path): Path to write the converted scores to
+
+    Returns:
+        PaeFile: The converted scores
+    """
+    Af3Pae.from_chai1(pae_file.data[model_index], cif_file).to_file(output_file)
+    cif_file.release()
+    return PaeFile(output_file)
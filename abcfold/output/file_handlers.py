@@ -1,21 +1,25 @@
-import json
+import functools
 import logging
-import re
 import warnings
 from abc import ABC
 from enum import Enum
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import (Any, Callable, Dict, List, Optional, Sequence, Set, Tuple,
+                    Union)
 
 import numpy as np
-from Bio.PDB import MMCIFIO, Chain, MMCIFParser, Model
+from Bio.PDB import Chain, MMCIFParser
 from Bio.PDB.Atom import Atom
 from Bio.PDB.kdtrees import KDTree
-from Bio.PDB.Polypeptide import is_aa
 from Bio.PDB.Residue import Residue
-from Bio.SeqUtils import seq1
 
+from abcfold.output.atom_table import POLYMER_TYPES, AtomTable, EntityType
 from abcfold.output.atoms import VANDERWALLS
+from abcfold.output.json_reader import read_json
+from abcfold.output.mmcif_reader import read_mmcif
+from abcfold.output.mmcif_writer import write_mmcif
+from abcfold.output.pae_scores import write_pae_json
+from abcfold.output.plddt_summary import PlddtSummary, h_score
 
 warnings.filterwarnings("ignore")
 
@@ -63,6 +67,91 @@ class ResidueCountType(Enum):
         return [value.value for value in cls.__members__.values()]
 
 
+def chain_sequence_types(input_params: dict) -> Optional[Dict[str, Set[str]]]:
+    """
+    Index the sequence types (e.g. "protein", "ligand") given to each chain id in
+    the input parameters
+
+    Args:
+        input_params (dict): Dictionary containing the input parameters
+
+    Returns:
+        Optional[Dict[str, Set[str]]]: Sequence types of each chain id, None if the
+        input parameters have no sequences
+    """
+    sequences = input_params.get("sequences")
+    if sequences is None:
+        return None
+
+    sequence_types: Dict[str, Set[str]] = {}
+    for sequence in sequences:
+        for sequence_type, sequence_data in sequence.items():
+            if "id" not in sequence_data:
+                continue
+            if isinstance(sequence_data["id"], str):
+                chain_ids = [sequence_data["id"]]
+            elif isinstance(sequence_data["id"], list):
+                chain_ids = sequence_data["id"]
+            else:
+                continue
+            for chain_id in chain_ids:
+                sequence_types.setdefault(chain_id, set()).add(sequence_type)
+    return sequence_types
+
+
+class ViewCache:
+    def __init__(self):
+        """
+        Memoised views derived from a model, keyed by the view name and the
+        arguments it was called with. Cached views are shared between callers and
+        must not be modified
+
+        Attributes:
+            hits (int): Number of views served from the cache
+            misses (int): Number of views computed
+        """
+        self.hits = 0
+        self.misses = 0
+        self.__views: Dict[tuple, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.__views)
+
+    def get(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        """
+        Get a view from the cache, computing and storing it on a miss
+
+        Args:
+            key (tuple): Key of the view
+            compute (Callable[[], Any]): Function computing the view
+
+        Returns:
+            Any: The view
+        """
+        if key in self.__views:
+            self.hits += 1
+            return self.__views[key]
+        self.misses += 1
+        view = self.__views[key] = compute()
+        return view
+
+    def clear(self) -> None:
+        self.__views.clear()
+
+
+def cached_view(method: Callable) -> Callable:
+    """
+    Memoise a method of CifFile in its view cache
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return self.view_cache.get(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
+
+
 class FileBase(ABC):
     """
     Abstract base class for the different file types
@@ -79,32 +168,108 @@ class FileBase(ABC):
         return f"{self.__class__.__name__}({self.pathway})"
 
 
+class NpzData(dict):
+    def __init__(self, npz_file: Union[str, Path]):
+        """
+        Dictionary of the arrays in a npz file. Only the names of the arrays are
+        read up front, each array is read (and decompressed) the first time it is
+        accessed and then kept
+
+        Args:
+            npz_file (Union[str, Path]): Path to the npz file
+
+        Attributes:
+            npz_file (Path): Path to the npz file
+            files (Tuple[str, ...]): Names of the arrays in the npz file
+        """
+        super().__init__()
+        self.npz_file = Path(npz_file)
+        with np.load(self.npz_file) as npz:
+            self.files = tuple(npz.files)
+
+    def __missing__(self, key: str) -> np.ndarray:
+        if key not in self.files:
+            raise KeyError(key)
+        with np.load(self.npz_file) as npz:
+            value = npz[key]
+        self[key] = value
+        return value
+
+    def __contains__(self, key) -> bool:
+        return key in self.files
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.npz_file}, files={self.files})"
+
+    def __reduce__(self):
+        # Arrays are read again where the data is unpickled, so only the path is
+        # sent to worker processes
+        return self.__class__, (self.npz_file,)
+
+    def get(self, key, default=None):
+        return self[key] if key in self.files else default
+
+    def keys(self):
+        return dict.fromkeys(self.files).keys()
+
+    def load_all(self) -> "NpzData":
+        """
+        Read every array that has not been accessed yet
+        """
+        for key in self.files:
+            self[key]
+        return self
+
+    def items(self):
+        return super(NpzData, self.load_all()).items()
+
+    def values(self):
+        return super(NpzData, self.load_all()).values()
+
+    def copy(self) -> dict:
+        return dict(self.items())
+
+
 class NpzFile(FileBase):
 
     def __init__(self, npz_file: Union[str, Path]):
         """
-        Object to handle npz files
+        Object to handle npz files. Nothing is read until the data is first
+        accessed and each array is only decompressed when it is used
 
         Args:
             npz_file (Union[str, Path]): Path to the npz file
 
         Attributes:
             npz_file (Path): Path to the npz file
-            data (dict): Dictionary containing the data from the npz file
+            data (NpzData): Dictionary containing the data from the npz file
 
         """
         super().__init__(npz_file)
         self.npz_file = Path(npz_file)
-        self.data = self.load_npz_file()
+        self.__data: Optional[NpzData] = None
+
+    @property
+    def data(self) -> NpzData:
+        if self.__data is None:
+            self.__data = self.load_npz_file()
+        return self.__data
 
-    def load_npz_file(self) -> dict:
-        return dict(np.load(self.npz_file))
+    def load_npz_file(self) -> NpzData:
+        return NpzData(self.npz_file)
 
 
 class NpyFile(FileBase):
     def __init__(self, npy_file: Union[str, Path]):
         """
-        Object to handle npy files
+        Object to handle npy files. The array is memory-mapped read only when it is
+        first accessed, so only the parts that are used are read
 
         Args:
             npy_file (Union[str, Path]): Path to the npy file
@@ -116,10 +281,16 @@ class NpyFile(FileBase):
 
         super().__init__(npy_file)
         self.npy_file = Path(npy_file)
-        self.data = self.load_npy_file()
+        self.__data: Optional[np.ndarray] = None
+
+    @property
+    def data(self) -> np.ndarray:
+        if self.__data is None:
+            self.__data = self.load_npy_file()
+        return self.__data
 
     def load_npy_file(self) -> np.ndarray:
-        return np.load(self.npy_file)
+        return np.load(self.npy_file, mmap_mode="r")
 
 
 class CifFile(FileBase):
@@ -136,7 +307,8 @@ class CifFile(FileBase):
 
         Attributes:
             cif_file (Path): Path to the cif file
-            model (Structure): BioPython structure object containing the model
+            model (Structure): BioPython structure object containing the model, only
+            built from the atom table when it is first accessed
             atom_plddt_per_chain (dict): Dictionary containing the pLDDT scores for
             each atom
             residue_plddt_per_chain (dict): Dictionary containing the pLDDT scores for
@@ -144,23 +316,40 @@ class CifFile(FileBase):
             plddts (list): List containing the pLDDT scores for each atom
             residue_plddts (list): List containing the pLDDT scores for each residue
             name (str): Name given to the model
+            atom_table (AtomTable): Columnar table of the atoms in the model, all of
+            the accessors below are computed from it. Only read from the file when
+            it is first accessed, so a CifFile can be held as a handle to the model
+            view_cache (ViewCache): Views derived from the atom table, cleared
+            whenever the model changes
         """
-        if input_params is None:
-            self.input_params = {}
-        else:
-            self.input_params = input_params
+        self.view_cache = ViewCache()
+        self.__atom_table = None
+        self.__sequence_warning = False
+        self.input_params = input_params
 
         super().__init__(cif_file)
         self.cif_file = Path(cif_file)
         self.clashes = 0
         self.clashes_residues = 0
-        self.model = self.load_cif_file()
+        self.__model = None
+        self.__atoms = None
         self.__ligand_plddts = None
         self.__plddts = None
         self.__residue_plddts = None
         self.__h_score = None
         self.__name = self.cif_file.stem
 
+    @property
+    def input_params(self) -> dict:
+        return self.__input_params
+
+    @input_params.setter
+    def input_params(self, input_params: Optional[dict]):
+        self.__input_params = {} if input_params is None else input_params
+        self.__chain_sequence_types = chain_sequence_types(self.__input_params)
+        if self.__atom_table is not None:
+            self.__set_atom_table(self.__atom_table)
+
     @property
     def name(self):
         return self.__name
@@ -177,11 +366,17 @@ class CifFile(FileBase):
         """
         The pLDDT scores for each atom in the model
         """
-        self.__plddts = [
-            plddts for plddts in self.get_plddt_per_atom().values() for plddts in plddts
-        ]
+        self.__plddts = self.atom_table.bfactor.tolist()
         return self.__plddts
 
+    @plddts.setter
+    def plddts(self, plddts: Union[np.ndarray, list]):
+        if len(plddts) != len(self.atom_table):
+            logger.error("A pLDDT score is needed for every atom in the model")
+            raise ValueError()
+        self.atom_table.bfactor = np.asarray(plddts, dtype=np.float64)
+        self.invalidate()
+
     @property
     def residue_plddts(self):
         """
@@ -194,12 +389,22 @@ class CifFile(FileBase):
         ]
         return self.__residue_plddts
 
+    @property
+    def plddt_summary(self) -> PlddtSummary:
+        """
+        Summary of the atom pLDDT scores (average, H score, band counts and
+        regions), computed once per model
+        """
+        return self.view_cache.get(
+            ("plddt_summary",), lambda: PlddtSummary(self.atom_table.bfactor)
+        )
+
     @property
     def average_plddt(self):
         """
         The average pLDDT score for the model
         """
-        return float(np.mean(self.plddts))
+        return self.plddt_summary.average_plddt
 
     @property
     def ligand_plddts(self):
@@ -214,9 +419,18 @@ class CifFile(FileBase):
         """
         The H score for the model
         """
-        self.__h_score = self.calculate_h_score()
+        self.__h_score = self.plddt_summary.h_score
         return self.__h_score
 
+    @property
+    def model(self):
+        """
+        The BioPython structure of the model
+        """
+        if self.__model is None:
+            self.__model = self.atom_table.to_structure(self.pathway.stem)
+        return self.__model
+
     def load_cif_file(self):
         """
         Load the cif file using BioPython
@@ -224,9 +438,77 @@ class CifFile(FileBase):
         parser = MMCIFParser(QUIET=True)
         return parser.get_structure(self.pathway.stem, self.pathway)
 
+    def load_atom_table(self) -> AtomTable:
+        """
+        Read the atom table with the streaming _atom_site reader. BioPython is only
+        used for files the reader can not represent faithfully
+
+        Returns:
+            AtomTable: The atom table of the first model
+        """
+        atom_table = AtomTable.from_atom_site(read_mmcif(self.pathway).atom_site)
+        if atom_table is None:
+            self.__model = self.load_cif_file()
+            atom_table = AtomTable.from_structure(self.__model)
+        return self.__set_entity_types(atom_table)
+
+    def __set_entity_types(self, atom_table: AtomTable) -> AtomTable:
+        atom_table.set_chain_entity_types(
+            [self.__entity_type(chain_id) for chain_id in atom_table.chain_ids]
+        )
+        return atom_table
+
+    def __set_atom_table(self, atom_table: AtomTable) -> None:
+        self.__atom_table = self.__set_entity_types(atom_table)
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """
+        Drop the BioPython model and every cached view built from the atom table.
+        Called whenever the model changes, and needed after editing the atom table
+        in place e.g. its coordinates
+        """
+        self.__model = None
+        self.__atoms = None
+        self.view_cache.clear()
+
+    def release(self) -> None:
+        """
+        Drop the atom table, the BioPython model and every cached view to free
+        their memory once the model has been written to file. The name, input
+        parameters and clash counts are kept and the atom table is read from the
+        file again if it is needed
+        """
+        self.invalidate()
+        self.__atom_table = None
+        self.__ligand_plddts = None
+        self.__plddts = None
+        self.__residue_plddts = None
+
+    @property
+    def loaded(self) -> bool:
+        """
+        Whether the atom table of the model is held in memory
+        """
+        return self.__atom_table is not None
+
+    @property
+    def atom_table(self) -> AtomTable:
+        if self.__atom_table is None:
+            self.__atom_table = self.load_atom_table()
+        return self.__atom_table
+
+    @property
+    def chain_ids(self) -> List[str]:
+        """
+        The chain ids of the model in order
+        """
+        return list(self.atom_table.chain_ids)
+
     def get_chains(self):
         return self.model[0]
 
+    @cached_view
     def chain_lengths(
         self,
         mode=ModelCount.RESIDUES,
@@ -246,55 +528,47 @@ class CifFile(FileBase):
         Raises:
             ValueError: If the mode is not valid
         """
-        chains = self.get_chains()
+        atom_table = self.atom_table
+        atom_counts = atom_table.chain_atom_counts()
         if mode == ModelCount.ALL or mode == ModelCount.ALL.value:
-
-            # return {
-            #     chain.id: len([atom for resiude in chain for atom in resiude])
-            #     for chain in chains
-            # }
             chain_lengths: dict = {}
-            for chain in chains:
-                if chain.id in chain_lengths:
-                    chain_lengths[chain.id] += len(
-                        [atom for resiude in chain for atom in resiude]
-                    )
-                else:
-                    chain_lengths[chain.id] = len(
-                        [atom for resiude in chain for atom in resiude]
-                    )
+            for chain_id, atom_count in zip(atom_table.chain_ids, atom_counts):
+                chain_lengths[chain_id] = chain_lengths.get(chain_id, 0) + int(
+                    atom_count
+                )
 
             return chain_lengths
 
         elif mode == ModelCount.RESIDUES or mode == ModelCount.RESIDUES.value:
             residue_counts: dict = {}
-            for chain in chains:
-                if self.check_other(chain, ["protein", "rna", "dna"]) and ptm_atoms:
-                    counter = 0
-                    for residue in chain:
-                        if is_aa(residue.resname, standard=True):
-                            counter += 1
-                            continue
-                        else:
-                            counter += len([atom for atom in residue])
-
-                    residue_counts[chain.id] = counter
-
-                elif self.check_ligand(chain):
+            chain_residue_counts = atom_table.chain_residue_counts()
+            if ptm_atoms:
+                # standard amino acids are one token, anything else is one per atom
+                tokens = np.where(
+                    atom_table.standard_amino_acids(),
+                    1,
+                    atom_table.residue_atom_counts(),
+                )
+                chain_ptm_counts = np.bincount(
+                    atom_table.residue_chain_index,
+                    weights=tokens,
+                    minlength=atom_table.n_chains,
+                ).astype(int)
+
+            for i, chain_id in enumerate(atom_table.chain_ids):
+                entity_type = atom_table.chain_entity_type[i]
+                if entity_type in POLYMER_TYPES and ptm_atoms:
+                    residue_counts[chain_id] = int(chain_ptm_counts[i])
+
+                elif entity_type == EntityType.LIGAND:
                     if ligand_atoms:
-                        if chain.id in residue_counts:
-                            residue_counts[chain.id] += len(
-                                [atom for resiude in chain for atom in resiude]
-                            )
-                        else:
-                            residue_counts[chain.id] = len(
-                                [atom for resiude in chain for atom in resiude]
-                            )
-
+                        residue_counts[chain_id] = residue_counts.get(
+                            chain_id, 0
+                        ) + int(atom_counts[i])
                     else:
-                        residue_counts[chain.id] = 1
+                        residue_counts[chain_id] = 1
                 else:
-                    residue_counts[chain.id] = len([residue for residue in chain])
+                    residue_counts[chain_id] = int(chain_residue_counts[i])
 
             return residue_counts
 
@@ -303,6 +577,7 @@ class CifFile(FileBase):
             logger.critical(msg)
             raise ValueError()
 
+    @cached_view
     def token_residue_ids(self) -> dict:
         """
         Function to get the residue ids for each chain in the model
@@ -311,26 +586,27 @@ class CifFile(FileBase):
             dict: Dictionary containing the chain id and the residue ids for each
             chain
         """
-        from abcfold.output.utils import flatten
-
-        chains = self.get_chains()
+        atom_table = self.atom_table
+        # standard residues are one token, hetero residues are one per atom
+        tokens = np.where(
+            atom_table.residue_hetflag == " ", 1, atom_table.residue_atom_counts()
+        )
         residue_ids = {}
-        for chain in chains:
-            if self.check_ligand(chain):
-                residue_ids[chain.id] = [
-                    [residue.id[1]] for residue in chain for _ in residue
-                ]
+        for i, (chain_id, atom_slice, residue_slice) in enumerate(
+            zip(
+                atom_table.chain_ids,
+                atom_table.chain_atom_slices(),
+                atom_table.chain_residue_slices(),
+            )
+        ):
+            if atom_table.chain_entity_type[i] == EntityType.LIGAND:
+                residue_ids[chain_id] = atom_table.residue_seq[
+                    atom_table.residue_index[atom_slice]
+                ].tolist()
                 continue
-            residue_ids[chain.id] = [
-                (
-                    [residue.id[1]]
-                    if residue.id[0] == " " or residue.id[0] == "H"
-                    else [residue.id[1] for _ in residue]
-                )
-                for residue in chain
-            ]
-
-        residue_ids = {k: flatten(v) for k, v in residue_ids.items()}
+            residue_ids[chain_id] = np.repeat(
+                atom_table.residue_seq[residue_slice], tokens[residue_slice]
+            ).tolist()
 
         return residue_ids
 
@@ -341,14 +617,36 @@ class CifFile(FileBase):
         Returns:
             float: The H score for the model
         """
+        return h_score(self.atom_table.bfactor)
+
+    @cached_view
+    def token_sequences(self) -> Dict[str, List[str]]:
+        """
+        Get the token names of each chain, the residue name of each residue and
+        the element of each ligand atom. These match the lengths given by
+        chain_lengths(mode="residues", ligand_atoms=True)
 
-        score = 0
-        for i in reversed(range(1, 101)):
-            if (100.0 / len(self.plddts)) * np.sum(np.array(self.plddts) >= i) >= i:
-                score = i
-                break
-        return score
+        Returns:
+            Dict[str, List[str]]: Dictionary containing the chain id and the token
+            names of the chain
+        """
+        atom_table = self.atom_table
+        token_sequences: Dict[str, List[str]] = {}
+        for i, (chain_id, atom_slice, residue_slice) in enumerate(
+            zip(
+                atom_table.chain_ids,
+                atom_table.chain_atom_slices(),
+                atom_table.chain_residue_slices(),
+            )
+        ):
+            if atom_table.chain_entity_type[i] == EntityType.LIGAND:
+                tokens = atom_table.element[atom_slice]
+            else:
+                tokens = atom_table.residue_name[residue_slice]
+            token_sequences.setdefault(chain_id, []).extend(tokens.tolist())
+        return token_sequences
 
+    @cached_view
     def get_model_sequence_data(self) -> dict:
         """
         Get the sequence for each chain and ligand in the model, used internally
@@ -357,18 +655,25 @@ class CifFile(FileBase):
         Returns:
             dict : Chain ID and sequence data
         """
+        atom_table = self.atom_table
+        one_letter_codes = atom_table.one_letter_codes()
         sequence_data = {}
-        for chain in self.model[0]:
-            if self.check_ligand(chain):
-                sequence_data[chain.id] = "".join(
-                    [atom.id[0] for residue in chain for atom in residue]
+        for i, (chain_id, atom_slice, residue_slice) in enumerate(
+            zip(
+                atom_table.chain_ids,
+                atom_table.chain_atom_slices(),
+                atom_table.chain_residue_slices(),
+            )
+        ):
+            if atom_table.chain_entity_type[i] == EntityType.LIGAND:
+                sequence_data[chain_id] = "".join(
+                    [name[0] for name in atom_table.atom_name[atom_slice]]
                 )
             else:
-                sequence_data[chain.id] = "".join(
-                    [seq1(residue.get_resname()) for residue in chain]
-                )
+                sequence_data[chain_id] = "".join(one_letter_codes[residue_slice])
         return sequence_data
 
+    @cached_view
     def get_plddt_per_atom(self) -> dict:
         """
         Get the pLDDT scores for each atom in the model
@@ -376,18 +681,18 @@ class CifFile(FileBase):
         Returns:
             dict: Dictionary containing the chain id and the pLDDT scores for each atom
         """
+        atom_table = self.atom_table
         plddt: Dict[str, list] = {}
-        for chain in self.model[0]:
-
-            for residue in chain:
-                for atom in residue:
-                    if chain.id in plddt:
-                        plddt[chain.id].append(atom.bfactor)
-                    else:
-                        plddt[chain.id] = [atom.bfactor]
+        for chain_id, atom_slice in zip(
+            atom_table.chain_ids, atom_table.chain_atom_slices()
+        ):
+            plddt.setdefault(chain_id, []).extend(
+                atom_table.bfactor[atom_slice].tolist()
+            )
 
         return plddt
 
+    @cached_view
     def get_plddt_per_residue(self, method=ResidueCountType.CARBONALPHA.value) -> dict:
         """
         Get the pLDDT scores for each residue in the model
@@ -407,37 +712,31 @@ class CifFile(FileBase):
             )
             raise ValueError()
 
-        chains = self.get_chains()
-        for chain in chains:
-            if self.check_ligand(chain):
-                if chain.id in plddts:
-                    plddts[chain.id].extend(
-                        [atom.bfactor for residue in chain for atom in residue]
-                    )
-                else:
-                    plddts[chain.id] = [
-                        atom.bfactor for residue in chain for atom in residue
-                    ]
+        atom_table = self.atom_table
+        residue_average = atom_table.residue_mean(atom_table.bfactor)
+        if method == ResidueCountType.AVERAGE.value:
+            residue_scores = residue_average
+        else:
+            # residues without a carbon alpha (e.g. nucleotides) use their average
+            carbon_alpha = atom_table.residue_first_named("CA")
+            residue_scores = np.where(
+                carbon_alpha >= 0,
+                atom_table.bfactor[carbon_alpha],
+                residue_average,
+            )
 
+        for i, (chain_id, atom_slice, residue_slice) in enumerate(
+            zip(
+                atom_table.chain_ids,
+                atom_table.chain_atom_slices(),
+                atom_table.chain_residue_slices(),
+            )
+        ):
+            if atom_table.chain_entity_type[i] == EntityType.LIGAND:
+                scores = atom_table.bfactor[atom_slice]
             else:
-                for residue in chain:
-                    if method == ResidueCountType.AVERAGE.value:
-                        scores = 0
-                        for atom in residue:
-                            scores += atom.bfactor
-                        score = scores / len(residue)
-
-                    elif method == ResidueCountType.CARBONALPHA.value:
-                        for atom in residue:
-                            if atom.id == "CA":
-                                score = atom.bfactor
-                                break
-
-                    if chain.id in plddts:
-                        plddts[chain.id].append(score)
-
-                    else:
-                        plddts[chain.id] = [score]
+                scores = residue_scores[residue_slice]
+            plddts.setdefault(chain_id, []).extend(scores.tolist())
 
         plddt_lengths = {k: len(v) for (k, v) in plddts.items()}
         chain_lengths = self.chain_lengths(mode="residues", ligand_atoms=True)
@@ -447,6 +746,7 @@ class CifFile(FileBase):
             ), f"{chain_id}, {chain_lengths[chain_id]} != {plddt_lengths[chain_id]}"
         return plddts
 
+    @cached_view
     def get_plddt_per_ligand(self) -> dict:
         """
         Get the pLDDT scores for each ligand in the model
@@ -454,15 +754,15 @@ class CifFile(FileBase):
         Returns:
             dict: Dictionary containing the chain id and the pLDDT scores for each atom
         """
+        atom_table = self.atom_table
         plddt: Dict[str, list] = {}
-        for chain in self.model[0]:
-            if self.check_ligand(chain):
-                for residue in chain:
-                    for atom in residue:
-                        if chain.id in plddt:
-                            plddt[chain.id].append(atom.bfactor)
-                        else:
-                            plddt[chain.id] = [atom.bfactor]
+        for i, (chain_id, atom_slice) in enumerate(
+            zip(atom_table.chain_ids, atom_table.chain_atom_slices())
+        ):
+            if atom_table.chain_entity_type[i] == EntityType.LIGAND:
+                plddt.setdefault(chain_id, []).extend(
+                    atom_table.bfactor[atom_slice].tolist()
+                )
         return plddt
 
     def check_ligand(self, chain: Chain) -> bool:
@@ -479,32 +779,31 @@ class CifFile(FileBase):
         return self.check_other(chain, ["ligand"])
 
     def check_other(self, chain: Chain, check_list) -> bool:
-        sequences = self.input_params.get("sequences")
-        if sequences is None:
-            logger.warning("Unable to gain sequence infromation from input file")
+        if self.__chain_sequence_types is None:
+            if not self.__sequence_warning:
+                logger.warning("Unable to gain sequence infromation from input file")
+                self.__sequence_warning = True
             return False
-        for sequence in sequences:
-            for sequence_type, sequence_data in sequence.items():
-                if sequence_type in check_list:
-                    if "id" not in sequence_data:
-                        continue
-                    if hasattr(chain, "id"):
-                        chain_id = chain.id
-                    else:
-                        chain_id = chain
-                    if isinstance(sequence_data["id"], str):
-                        if chain_id == sequence_data["id"]:
-                            return True
-                    elif isinstance(sequence_data["id"], list):
-                        if chain_id in sequence_data["id"]:
-                            return True
-        return False
+        chain_id = chain.id if hasattr(chain, "id") else chain
+        return not self.__chain_sequence_types.get(chain_id, set()).isdisjoint(
+            check_list
+        )
+
+    def __entity_type(self, chain_id: str) -> EntityType:
+        if self.__chain_sequence_types is None:
+            return EntityType.UNKNOWN
+        sequence_types = self.__chain_sequence_types.get(chain_id, set())
+        for entity_type in EntityType:
+            if entity_type.name.lower() in sequence_types:
+                return entity_type
+        return EntityType.UNKNOWN
 
     def relabel_chains(
         self, chain_ids: List[str], link_ids: Optional[dict] = None
     ) -> None:
         """
-        Relabel the chains in the model
+        Relabel the chains in the model. Only the model in memory is changed, use
+        `update` to write it back to the file
 
         Args:
             chain_ids (List[str]): List of chain ids to relabel the chains
@@ -514,8 +813,9 @@ class CifFile(FileBase):
         """
 
         chain_ids = chain_ids.copy()
-        structure = self.model[0]
-        old_new_chain_id = {}
+        atom_table = self.atom_table
+        residue_slices = atom_table.chain_residue_slices()
+        new_chain_ids = []
 
         if link_ids is None:
             link_ids = {}
@@ -526,10 +826,9 @@ class CifFile(FileBase):
 
         old_chain_label_counter, new_chain_label_counter = 0, 0
 
-        chain_names = [chain.id for chain in structure]
-        while old_chain_label_counter < len(structure):
+        while old_chain_label_counter < atom_table.n_chains:
             chain = chain_ids[new_chain_label_counter]
-            old_new_chain_id[chain_names[old_chain_label_counter]] = chain
+            new_chain_ids.append(chain)
 
             # increment the old_chain everytime a chain has been relabelled
             old_chain_label_counter += 1
@@ -537,40 +836,56 @@ class CifFile(FileBase):
             if chain in link_ids:
                 ligand_no_added = 2
                 for _ in link_ids[chain]:
-                    old_new_chain_id[chain_names[old_chain_label_counter]] = chain
-                    for residue in structure[chain_names[old_chain_label_counter]]:
-
-                        residue.id = (residue.id[0], ligand_no_added, residue.id[2])
-                        ligand_no_added += 1
+                    new_chain_ids.append(chain)
+                    residue_slice = residue_slices[old_chain_label_counter]
+                    n_residues = residue_slice.stop - residue_slice.start
+                    atom_table.residue_seq[residue_slice] = np.arange(
+                        ligand_no_added, ligand_no_added + n_residues
+                    )
+                    ligand_no_added += n_residues
                     old_chain_label_counter += 1
 
             new_chain_label_counter += 1
 
-        for chain_to_rename in structure:
-            chain_to_rename.id = old_new_chain_id[chain_to_rename.id]
-
         assert old_chain_label_counter == len(
-            self.get_chains()
+            new_chain_ids
         ), "Number of chain ids must match the number of chains"
-        self.update()
+
+        atom_table.chain_ids = new_chain_ids
+        self.__set_atom_table(atom_table)
 
     def update(self):
+        """
+        Write the model in memory back to its file
+        """
         self.to_file(self.pathway)
-        self = CifFile(self.pathway, self.input_params)
 
     def reorder_chains(self, new_chain_ids: List[str]):
+        """
+        Reorder the chains in the model. Only the model in memory is changed, use
+        `update` to write it back to the file
+
+        Args:
+            new_chain_ids (List[str]): Chain ids in their new order
+
+        Returns:
+            None
+        """
 
-        assert sorted([chain.id for chain in self.get_chains()]) == sorted(
+        assert sorted(self.chain_ids) == sorted(
             new_chain_ids
         ), "The chain ids need to be identical to what is in the model already \
 for reordering"
 
-        new_model = Model.Model(0)
+        chain_indices: Dict[str, List[int]] = {}
+        for i, chain_id in enumerate(self.chain_ids):
+            chain_indices.setdefault(chain_id, []).append(i)
 
-        [new_model.add(self.model[0][ch]) for ch in new_chain_ids]
-        self.model.detach_child(0)
-        self.model.add(new_model)
-        self.update()
+        self.__set_atom_table(
+            self.atom_table.take_chains(
+                [chain_indices[chain_id].pop(0) for chain_id in new_chain_ids]
+            )
+        )
 
     def check_clashes(
         self,
@@ -579,7 +894,8 @@ for reordering"
         clash_cutoff: float = 0.63,
     ) -> Tuple[List[Tuple[Atom, Atom]], List[Tuple[Residue, Residue]]]:
         """
-        Check for clashes between atoms in different chains
+        Check for clashes between atoms in different chains. The result is cached
+        so the clash CSV and the output page share a single check
 
         Args:
             threshold: The distance threshold for a clash.
@@ -588,55 +904,124 @@ for reordering"
             A list of clashes.
 
         """
-        atoms = self.get_atoms()
-        coords = np.array(
-            [atom.get_coord() for atom in atoms],
-            dtype="d",
+        atom_pairs, residue_pairs = self.find_clashes(threshold, bucket, clash_cutoff)
+        return self.view_cache.get(
+            ("check_clashes", threshold, bucket, clash_cutoff),
+            lambda: self.__clash_objects(atom_pairs, residue_pairs),
+        )
+
+    def find_clashes(
+        self,
+        threshold: Union[int, float] = 3.4,
+        bucket: int = 10,
+        clash_cutoff: float = 0.63,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the clashes between atoms in different chains as atom indices into the
+        atom table, without building BioPython objects. Sets the clash counts of
+        the model and the result is cached
+
+        Args:
+            threshold: The distance threshold for a clash.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (n, 2) array of the clashing atom pairs
+            and (m, 2) array of the first clashing atom pair of each clashing
+            residue pair
+        """
+        atom_pairs, residue_pairs = self.view_cache.get(
+            ("find_clashes", threshold, bucket, clash_cutoff),
+            lambda: self.__find_clashes(threshold, bucket, clash_cutoff),
         )
+        self.clashes = len(atom_pairs)
+        self.clashes_residues = len(residue_pairs)
+        return (atom_pairs, residue_pairs)
+
+    def __clash_objects(
+        self, atom_pairs: np.ndarray, residue_pairs: np.ndarray
+    ) -> Tuple[List[Tuple[Atom, Atom]], List[Tuple[Residue, Residue]]]:
+        if not len(atom_pairs):
+            return ([], [])
+        atoms = self.get_atoms()
+        clashes_atoms = [(atoms[i1], atoms[i2]) for i1, i2 in atom_pairs.tolist()]
+        clashes_residues = [
+            (atoms[i1].get_parent(), atoms[i2].get_parent())
+            for i1, i2 in residue_pairs.tolist()
+        ]
+        return (clashes_atoms, clashes_residues)
+
+    def __find_clashes(
+        self, threshold: Union[int, float], bucket: int, clash_cutoff: float
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        atom_table = self.atom_table
+        coords = atom_table.coords.astype("d")
         assert bucket > 1
         assert coords.shape[1] == 3
         assert clash_cutoff > 0.0 and clash_cutoff <= 1.0
 
         tree = KDTree(coords, bucket)
         neighbors = tree.neighbor_search(threshold)
-        clashes_atoms, clashes_residues = [], []
-
-        for neighbor in neighbors:
-            i1, i2 = neighbor.index1, neighbor.index2
-            atom1, atom2 = atoms[i1], atoms[i2]
-            # get the element of the atom
-            element1 = atom1.element
-            element2 = atom2.element
-            # find chain_id and residue_id
-            chain_id1 = atom1.get_full_id()[2]
-            chain_id2 = atom2.get_full_id()[2]
-
-            if chain_id1 == chain_id2:
-                continue
-
-            distance = np.linalg.norm(atom1.get_coord() - atom2.get_coord())
-            if (atom1.name == "C" and atom1.name == "N") or (
-                atom2.name == "N" and atom1.name == "C"
-            ):
-                continue
-            elif (atom1.name == "SG" and atom2.name == "SG") and distance > 1.88:
-                continue
-
-            clash_radius = (
-                VANDERWALLS.get(element1, 1.7) + VANDERWALLS.get(element2, 1.7)
-            ) * 0.63
-            if distance < clash_radius:
-                residue1 = atom1.get_parent()
-                residue2 = atom2.get_parent()
-
-                clashes_atoms.append((atom1, atom2))
-
-                if (residue1, residue2) not in clashes_residues:
-                    clashes_residues.append((residue1, residue2))
+        index1 = np.fromiter(
+            (neighbor.index1 for neighbor in neighbors), np.int64, len(neighbors)
+        )
+        index2 = np.fromiter(
+            (neighbor.index2 for neighbor in neighbors), np.int64, len(neighbors)
+        )
 
-        self.clashes = len(clashes_atoms)
-        self.clashes_residues = len(clashes_residues)
-        return (clashes_atoms, clashes_residues)
+        # chains are compared by id, chains sharing an id are one chain
+        _, chain_labels = np.unique(atom_table.chain_ids, return_inverse=True)
+        chain_labels = chain_labels.reshape(-1)
+        atom_chain = chain_labels[atom_table.chain_index]
+        inter_chain = atom_chain[index1] != atom_chain[index2]
+
+        delta = atom_table.coords[index1] - atom_table.coords[index2]
+        distance = np.sqrt((delta * delta).sum(axis=1))
+
+        name1 = atom_table.atom_name[index1]
+        name2 = atom_table.atom_name[index2]
+        peptide_bond = (name1 == "C") & (name2 == "N")
+        disulfide_bond = (name1 == "SG") & (name2 == "SG") & (distance > 1.88)
+
+        elements, element_index = np.unique(atom_table.element, return_inverse=True)
+        radii = np.array(
+            [VANDERWALLS.get(element, 1.7) for element in elements.tolist()]
+        )[element_index.reshape(-1)]
+        clash_radius = (radii[index1] + radii[index2]) * 0.63
+
+        clash = (
+            inter_chain
+            & ~peptide_bond
+            & ~disulfide_bond
+            & (distance < clash_radius)
+        )
+        atom_pairs = np.stack([index1[clash], index2[clash]], axis=1)
+        if not len(atom_pairs):
+            return (atom_pairs, atom_pairs)
+
+        # residues are told apart by chain id and residue id, as BioPython does
+        residue_key = self.__residue_keys(chain_labels)
+        _, first_clash = np.unique(
+            residue_key[atom_table.residue_index[atom_pairs]],
+            axis=0,
+            return_index=True,
+        )
+        return (atom_pairs, atom_pairs[np.sort(first_clash)])
+
+    def __residue_keys(self, chain_labels: np.ndarray) -> np.ndarray:
+        # Integer key of each residue from its chain id and BioPython residue id
+        atom_table = self.atom_table
+        hetfield = np.where(
+            atom_table.residue_hetflag == "H",
+            np.char.add("H_", atom_table.residue_name),
+            atom_table.residue_hetflag,
+        )
+        columns = [chain_labels[atom_table.residue_chain_index], atom_table.residue_seq]
+        for values in (hetfield, atom_table.residue_icode):
+            columns.append(np.unique(values, return_inverse=True)[1].reshape(-1))
+        _, residue_key = np.unique(
+            np.stack(columns, axis=1), axis=0, return_inverse=True
+        )
+        return residue_key.reshape(-1)
 
     def get_atoms(self, chain_id=None) -> list:
         """
@@ -649,18 +1034,19 @@ for reordering"
             A list of clashes.
 
         """
-        if chain_id is not None:
-            return [
-                atom
-                for chain in self.model[0]
-                for atom in chain.get_atoms()
-                if chain.id == chain_id
+        if self.__atoms is None:
+            self.__atoms = [
+                atom for chain in self.model[0] for atom in chain.get_atoms()
             ]
-        return [atom for chain in self.model[0] for atom in chain.get_atoms()]
+        if chain_id is not None:
+            chain_mask = self.atom_table.chain_mask(chain_id)
+            return [self.__atoms[i] for i in np.flatnonzero(chain_mask)]
+        return list(self.__atoms)
 
     def to_file(self, output_file: Union[str, Path]) -> None:
         """
-        Save the cif file
+        Save the cif file, the label_asym_id of each atom is set to its chain id and
+        ligand atoms are written as HETATM
 
         Args:
             output_file (Union[str, Path]): Path to save the cif file
@@ -668,88 +1054,92 @@ for reordering"
         Returns:
             None
         """
-        io = MMCIFIO()
-        io.set_structure(self.model)
-
-        # save creates the dictionary
-        io.save(str(output_file))
-        self.__atom_site_label_update(io.dic)
-        self.__ligand_to_hetatm(io.dic)
-        with open(output_file, "w") as f:
-            io._save_dict(f)
-
-        self.__single_to_double_quotes(output_file)
+        write_mmcif(
+            self.atom_table,
+            output_file,
+            self.pathway.stem,
+            hetatm_chains=[
+                self.check_ligand(chain_id) for chain_id in self.atom_table.chain_ids
+            ],
+        )
 
-    def __single_to_double_quotes(self, file_name: Union[str, Path]) -> None:
-        new_lines = []
-        with open(file_name, "r") as f:
-            lines = [line.rstrip() for line in f]
 
-        for line in lines:
+class ConfidenceJsonFile(FileBase):
+    def __init__(
+        self, json_file: Union[str, Path], keys: Optional[Sequence[str]] = None
+    ):
+        """
+        Object to handle json files. The file is only read when the data is first
+        accessed, so unread files are cheap to pass to worker processes. Arrays of
+        numbers, such as the PAE and contact probability matrices, are decoded
+        straight into NumPy arrays
 
-            single_quotes = re.compile(r"[']\w+[']{2}")
-            new_lines.append(
-                single_quotes.sub(lambda x: f'"{x.group()[1:-1]}"', line, count=1)
-            )
+        Args:
+            json_file (Union[str, Path]): Path to the json file
+            keys (Optional[Sequence[str]]): Top level keys to load, all if None
 
-        with open(file_name, "w") as f:
-            f.write("\n".join(new_lines))
+        Attributes:
+            json_file (Path): Path to the json file
+            keys (Optional[Tuple[str, ...]]): Top level keys to load
+            data (dict): Dictionary containing the data from the json file
 
-    def __atom_site_label_update(self, out_dict):
-        atom_site_labels_asym_ids = []
-        for chain_id, chain_length in self.chain_lengths(mode="all").items():
-            atom_site_labels_asym_ids.extend([chain_id] * chain_length)
+        """
+        super().__init__(json_file)
+        self.keys = None if keys is None else tuple(keys)
+        self.__data: Optional[dict] = None
 
-        assert len(out_dict["_atom_site.label_asym_id"]) == len(
-            atom_site_labels_asym_ids
-        ), f"Lengths must be the same, current lengths are \
-{len(out_dict['_atom_site.label_asym_id'])} and {len(atom_site_labels_asym_ids)}"
+    @property
+    def data(self) -> dict:
+        if self.__data is None:
+            self.__data = self.load_json_file()
+        return self.__data
 
-        out_dict["_atom_site.label_asym_id"] = atom_site_labels_asym_ids
+    def load_json_file(self):
+        # load the json file
+        return read_json(self.pathway, self.keys)
 
-        return out_dict
 
-    def __ligand_to_hetatm(self, out_dict):
-        atom_site_group_pdb = []
-        counter = 0
-        for chain_id, chain_length in self.chain_lengths(mode="all").items():
-            if self.check_ligand(chain_id):
-                atom_site_group_pdb.extend(["HETATM"] * chain_length)
-            else:
-                atom_site_group_pdb.extend(
-                    out_dict["_atom_site.group_PDB"][
-                        counter : counter + chain_length  # noqa: E203
-                    ]
-                )
+class PaeFile(FileBase):
+    def __init__(self, pae_file: Union[str, Path]):
+        """
+        Object to handle the compact npz files of AlphaFold3 style scores written
+        by Af3Pae. Nothing is read until the data is first accessed
 
-            counter += chain_length
+        Args:
+            pae_file (Union[str, Path]): Path to the npz file
 
-        assert len(out_dict["_atom_site.group_PDB"]) == len(atom_site_group_pdb)
+        Attributes:
+            pae_file (Path): Path to the npz file
+            data (dict): Dictionary containing the scores, the PAE and contact
+            probability matrices are float32 arrays
+        """
+        super().__init__(pae_file)
+        self.pae_file = Path(pae_file)
+        self.__data: Optional[dict] = None
 
-        out_dict["_atom_site.group_PDB"] = atom_site_group_pdb
+    @property
+    def data(self) -> dict:
+        if self.__data is None:
+            self.__data = self.load_pae_file()
+        return self.__data
 
-        return out_dict
+    def load_pae_file(self) -> NpzData:
+        return NpzData(self.pae_file)
 
+    def release(self) -> None:
+        """
+        Drop the loaded scores, they are read from the file again if needed
+        """
+        self.__data = None
 
-class ConfidenceJsonFile(FileBase):
-    def __init__(self, json_file: Union[str, Path]):
+    def to_json(self, output_file: Union[str, Path]) -> None:
         """
-        Object to handle json files
+        Write the scores as the AlphaFold3 style JSON read by the pae-viewer
 
         Args:
-            json_file (Union[str, Path]): Path to the json file
-
-        Attributes:
-            json_file (Path): Path to the json file
-            data (dict): Dictionary containing the data from the json file
+            output_file (Union[str, Path]): Path to the JSON file
 
+        Returns:
+            None
         """
-        super().__init__(json_file)
-        self.data = self.load_json_file()
-
-    def load_json_file(self):
-        # load the json file
-        with open(self.pathway, "r") as f:
-            data = json.load(f)
-
-        return data
+        write_pae_json(self.data, output_file)
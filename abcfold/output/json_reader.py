@@ -0,0 +1,172 @@
+import json
+import re
+from json.decoder import scanstring
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+# Characters that open or close a JSON value spanning more than one token
+STRUCTURE = '[]{}"'
+WHITESPACE = re.compile(r"\s*")
+# Characters that can only appear in arrays that are not purely numeric
+NOT_NUMERIC = '"{ntfNI'
+DIGITS = "0123456789"
+SEPARATORS = str.maketrans("[],", "   ")
+
+DECODER = json.JSONDecoder()
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    return WHITESPACE.match(text, pos).end()
+
+
+def _value_end(text: str, pos: int) -> int:
+    """
+    Find the end of the JSON value starting at pos without decoding it. Only
+    brackets and strings are visited, the next position of each is found with
+    str.find so numbers are skipped without being looked at one by one
+    """
+    if text[pos] == '"':
+        return scanstring(text, pos + 1)[1]
+    if text[pos] not in "[{":
+        return DECODER.raw_decode(text, pos)[1]
+
+    next_found = {char: text.find(char, pos) for char in STRUCTURE}
+    depth = 0
+    while True:
+        found = [
+            (index, char) for char, index in next_found.items() if index != -1
+        ]
+        if not found:
+            raise ValueError("Unterminated JSON value")
+        index, char = min(found)
+        pos = index + 1
+        if char == '"':
+            pos = scanstring(text, pos)[1]
+        elif char in "[{":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return pos
+        for char, index in next_found.items():
+            if index != -1 and index < pos:
+                next_found[char] = text.find(char, pos)
+
+
+def _positions(text: str, char: str) -> List[int]:
+    positions = []
+    pos = text.find(char)
+    while pos != -1:
+        positions.append(pos)
+        pos = text.find(char, pos + 1)
+    return positions
+
+
+def numeric_array(value: str) -> Optional[np.ndarray]:
+    """
+    Decode a JSON array of numbers, or of equal length arrays of numbers,
+    straight into NumPy without building Python lists
+
+    Args:
+        value (str): JSON text of the array
+
+    Returns:
+        Optional[np.ndarray]: The array, None if the value is not a one or two
+        dimensional array of numbers
+    """
+    if any(char in value for char in NOT_NUMERIC) or not any(
+        char in value for char in DIGITS
+    ):
+        return None
+
+    dtype = np.float64 if any(char in value for char in ".eE") else np.int64
+    values = np.fromstring(value.translate(SEPARATORS), dtype=dtype, sep=" ")
+
+    opening, closing = _positions(value, "["), _positions(value, "]")
+    if len(opening) == 1:
+        return values if values.size == value.count(",") + 1 else None
+
+    # Each row must open after the previous row closed and hold as many values as
+    # every other row
+    rows_opening, rows_closing = opening[1:], closing[:-1]
+    if len(rows_opening) != len(rows_closing):
+        return None
+    if any(start > end for start, end in zip(rows_opening, rows_closing)):
+        return None
+    if any(start < end for start, end in zip(rows_opening[1:], rows_closing)):
+        return None
+    row_commas = np.array(
+        [value.count(",", start, end) for start, end in zip(rows_opening, rows_closing)]
+    )
+    n_columns = int(row_commas[0]) + 1
+    if np.any(row_commas != row_commas[0]) or values.size != n_columns * len(
+        rows_opening
+    ):
+        return None
+    return values.reshape(len(rows_opening), n_columns)
+
+
+def decode_value(value: str) -> Any:
+    """
+    Decode a JSON value, arrays of numbers are returned as NumPy arrays and
+    everything else as the json module would
+    """
+    if value.startswith("["):
+        array = numeric_array(value)
+        if array is not None:
+            return array
+    return json.loads(value)
+
+
+def read_json(
+    json_file: Union[str, Path], keys: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """
+    Read a JSON object, decoding arrays of numbers straight into NumPy arrays.
+    Only the requested top level keys are decoded, the text of every other value is
+    skipped. Used for the AlphaFold3 confidences, whose PAE, contact probability and
+    pLDDT arrays would otherwise be built as nested lists of Python floats
+
+    Args:
+        json_file (Union[str, Path]): Path to the JSON file
+        keys (Optional[Sequence[str]]): Top level keys to decode, all if None
+
+    Returns:
+        Dict[str, Any]: The decoded values of the requested keys present in the file
+    """
+    with open(json_file, "r") as f:
+        text = f.read()
+
+    wanted = None if keys is None else set(keys)
+    pos = _skip_whitespace(text, 0)
+    if not text.startswith("{", pos):
+        data = json.loads(text)
+        if wanted is None or not isinstance(data, dict):
+            return data
+        return {key: value for key, value in data.items() if key in wanted}
+
+    data: Dict[str, Any] = {}
+    pos = _skip_whitespace(text, pos + 1)
+    if text.startswith("}", pos):
+        return data
+
+    while True:
+        if not text.startswith('"', pos):
+            raise ValueError(f"Expected a key at position {pos} of {json_file}")
+        key, pos = scanstring(text, pos + 1)
+        pos = _skip_whitespace(text, pos)
+        if not text.startswith(":", pos):
+            raise ValueError(f"Expected ':' at position {pos} of {json_file}")
+        start = _skip_whitespace(text, pos + 1)
+        pos = _value_end(text, start)
+        if wanted is None or key in wanted:
+            data[key] = decode_value(text[start:pos])
+
+        pos = _skip_whitespace(text, pos)
+        if text.startswith("}", pos):
+            return data
+        if not text.startswith(",", pos):
+            raise ValueError(f"Expected ',' at position {pos} of {json_file}")
+        pos = _skip_whitespace(text, pos + 1)
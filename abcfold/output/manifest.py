@@ -0,0 +1,208 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from abcfold.output.model_summary import ModelRecord
+
+logger = logging.getLogger("logger")
+
+MANIFEST_FILE = "abcfold_manifest.json"
+
+# Increase whenever the normalization of the outputs changes, so directories
+# normalized by an older version are processed again
+NORMALIZATION_VERSION = 2
+
+
+def file_hash(pathway: Union[str, Path]) -> str:
+    """
+    SHA-256 of the contents of a file, read in chunks
+
+    Args:
+        pathway (Union[str, Path]): Path to the file
+
+    Returns:
+        str: Hex digest of the file
+    """
+    sha256 = hashlib.sha256()
+    with open(pathway, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def file_state(pathway: Union[str, Path]) -> dict:
+    """
+    Hash, size and modification time of a file, as kept in the manifest
+
+    Args:
+        pathway (Union[str, Path]): Path to the file
+
+    Returns:
+        dict: The state of the file
+    """
+    stat = Path(pathway).stat()
+    return {
+        "hash": file_hash(pathway),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def matches_state(pathway: Union[str, Path], state: dict) -> bool:
+    """
+    Check a file is as recorded by `file_state`. A file of the recorded size and
+    modification time is taken as unchanged, the file is only hashed otherwise
+
+    Args:
+        pathway (Union[str, Path]): Path to the file
+        state (dict): The recorded state of the file
+
+    Returns:
+        bool: True if the file has not changed
+    """
+    try:
+        stat = Path(pathway).stat()
+    except FileNotFoundError:
+        return False
+    if stat.st_size != state.get("size"):
+        return False
+    if stat.st_mtime_ns == state.get("mtime_ns"):
+        return True
+    return file_hash(pathway) == state.get("hash")
+
+
+class OutputManifest:
+    def __init__(self, output_dir: Union[str, Path]):
+        """
+        Record of the normalization of the output directory of a program. The
+        manifest holds the hash of every source file as written by the program and
+        after normalization, the hash of every file derived from them and the
+        record of every model. While the manifest matches the directory the
+        outputs are loaded from it, without reading the models
+
+        Args:
+            output_dir (Union[str, Path]): Path to the output directory
+
+        Attributes:
+            output_dir (Path): Path to the output directory
+            pathway (Path): Path to the manifest file
+        """
+        self.output_dir = Path(output_dir)
+        self.pathway = self.output_dir.joinpath(MANIFEST_FILE)
+        self.__sources: Dict[str, str] = {}
+        self.__records: Dict[Path, ModelRecord] = {}
+
+    def key(self, pathway: Union[str, Path]) -> str:
+        """
+        Path of a file relative to the output directory, so the manifest stays
+        valid when the directory is renamed
+        """
+        return Path(pathway).relative_to(self.output_dir).as_posix()
+
+    def is_current(
+        self,
+        sources: Iterable[Union[str, Path]],
+        models: Optional[Iterable[Union[str, Path]]] = None,
+    ) -> bool:
+        """
+        Check the sources were normalized by this version, that neither they nor
+        the derived files have changed since and that every model was recorded.
+        The records of the models are then given by `records`
+
+        Args:
+            sources (Iterable[Union[str, Path]]): Source files in the output
+            directory
+            models (Optional[Iterable[Union[str, Path]]]): Models that need a
+            record
+
+        Returns:
+            bool: True if the normalized outputs can be loaded as they are
+        """
+        try:
+            with open(self.pathway, "r") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+        if manifest.get("version") != NORMALIZATION_VERSION:
+            return False
+
+        recorded = manifest.get("sources", {})
+        if set(recorded) != {self.key(source) for source in sources}:
+            return False
+
+        models_data = manifest.get("models", {})
+        if not {self.key(model) for model in models or []} <= set(models_data):
+            return False
+
+        expected = {key: state["normalized"] for key, state in recorded.items()}
+        expected.update(manifest.get("derived", {}))
+        for key, state in expected.items():
+            if not matches_state(self.output_dir.joinpath(key), state):
+                return False
+
+        self.__records = {
+            self.output_dir.joinpath(key): ModelRecord.from_dict(
+                data, self.output_dir
+            )
+            for key, data in models_data.items()
+        }
+        logger.info(f"Outputs in {self.output_dir} already normalized")
+        return True
+
+    def records(self) -> Dict[Path, ModelRecord]:
+        """
+        Records of the models by their path, read by `is_current`
+        """
+        return self.__records
+
+    def record_sources(self, sources: Iterable[Union[str, Path]]) -> None:
+        """
+        Hash the source files as written by the program, before they are normalized
+
+        Args:
+            sources (Iterable[Union[str, Path]]): Source files in the output
+            directory
+
+        Returns:
+            None
+        """
+        self.__sources = {self.key(source): file_hash(source) for source in sources}
+
+    def write(self, records: Iterable[ModelRecord]) -> None:
+        """
+        Write the manifest once the sources recorded by `record_sources` have been
+        normalized
+
+        Args:
+            records (Iterable[ModelRecord]): Records of the normalized models,
+            their derived files are hashed too
+
+        Returns:
+            None
+        """
+        records = list(records)
+        manifest = {
+            "version": NORMALIZATION_VERSION,
+            "sources": {
+                key: {
+                    "source": source_hash,
+                    "normalized": file_state(self.output_dir.joinpath(key)),
+                }
+                for key, source_hash in self.__sources.items()
+            },
+            "derived": {
+                self.key(pathway): file_state(pathway)
+                for record in records
+                for pathway in record.derived.values()
+            },
+            "models": {
+                self.key(record.pathway): record.to_dict(self.output_dir)
+                for record in records
+            },
+        }
+        with open(self.pathway, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        self.__records = {record.pathway: record for record in records}
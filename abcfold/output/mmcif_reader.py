@@ -0,0 +1,207 @@
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, TextIO, Union
+
+import numpy as np
+
+# A quoted CIF value only ends at a matching quote followed by whitespace, this
+# allows quotes inside values e.g. "O5'"
+CIF_TOKEN = re.compile(r"""'(.*?)'(?=\s|$)|"(.*?)"(?=\s|$)|(\S+)""")
+
+ATOM_SITE = "_atom_site"
+
+
+class MmcifData:
+    def __init__(
+        self,
+        data_id: Optional[str],
+        atom_site: Dict[str, np.ndarray],
+        items: Dict[str, List[str]],
+    ):
+        """
+        Categories read from a mmCIF file by `read_mmcif`
+
+        Args:
+            data_id (Optional[str]): Name of the data block
+            atom_site (Dict[str, np.ndarray]): Object array of the string values in
+            each column of the _atom_site loop, keyed by the column name without the
+            category prefix
+            items (Dict[str, List[str]]): Values of every other requested item,
+            keyed by the full item name in the same form as Bio.PDB's MMCIF2Dict
+        """
+        self.data_id = data_id
+        self.atom_site = atom_site
+        self.items = items
+
+
+@contextmanager
+def _open(cif_file: Union[str, Path, TextIO]) -> Iterator[TextIO]:
+    if hasattr(cif_file, "read"):
+        yield cif_file
+    else:
+        with open(cif_file, "r") as handle:
+            yield handle
+
+
+def _logical_lines(handle: TextIO) -> Iterator[str]:
+    """
+    Yield the lines of a CIF file, joining each semicolon delimited text field
+    into a single string that starts with ";"
+    """
+    for line in handle:
+        if not line.startswith(";"):
+            yield line
+            continue
+        text_field = [line]
+        for line in handle:
+            text_field.append(line)
+            if line.startswith(";"):
+                break
+        yield "".join(text_field)
+
+
+def tokenize(lines: Sequence[str]) -> List[str]:
+    """
+    Split CIF data lines into values, removing the quotes around quoted values
+    and joining semicolon delimited text fields
+
+    Args:
+        lines (Sequence[str]): Lines of CIF data, text fields as a single string
+
+    Returns:
+        List[str]: Values in the order they appear
+    """
+    text = "".join(lines)
+    if "'" not in text and '"' not in text and ";" not in text:
+        return text.split()
+
+    tokens: List[str] = []
+    for line in lines:
+        if line.startswith(";"):
+            text_field = line.split("\n")
+            closing = next(
+                i for i in range(1, len(text_field)) if text_field[i].startswith(";")
+            )
+            tokens.append(
+                "\n".join(
+                    [text_field[0][1:].rstrip()]
+                    + [field.rstrip() for field in text_field[1:closing]]
+                )
+            )
+            line = "\n".join(text_field[closing:])[1:]
+
+        if "'" in line or '"' in line:
+            tokens.extend(
+                next(group for group in match.groups() if group is not None)
+                for match in CIF_TOKEN.finditer(line)
+            )
+        else:
+            tokens.extend(line.split())
+    return tokens
+
+
+def read_mmcif(
+    cif_file: Union[str, Path, TextIO],
+    categories: Sequence[str] = (ATOM_SITE,),
+) -> MmcifData:
+    """
+    Stream a mmCIF file and keep only the requested categories. The _atom_site loop
+    is returned as NumPy arrays and every other category is skipped without
+    being tokenised. Handles the AlphaFold3, Boltz-1, Chai-1 and PDB dialects
+    (quoted atom names, single item categories and semicolon text fields)
+
+    Args:
+        cif_file (Union[str, Path, TextIO]): Path or handle of the mmCIF file
+        categories (Sequence[str]): Categories to read e.g. "_atom_site", "_entry"
+
+    Returns:
+        MmcifData: The requested categories of the first data block
+    """
+    wanted = set(categories)
+    data_id = None
+    atom_site: Dict[str, np.ndarray] = {}
+    items: Dict[str, List[str]] = {}
+
+    loop_keys: List[str] = []
+    loop_lines: List[str] = []
+    loop_wanted = in_loop_header = in_loop_body = False
+    pending_key: Optional[str] = None
+
+    def category(key: str) -> str:
+        return key.split(".", 1)[0]
+
+    def finish_loop():
+        if not loop_wanted:
+            return
+        values = tokenize(loop_lines)
+        if not values:
+            return
+        if len(values) % len(loop_keys) != 0:
+            raise ValueError(
+                f"Loop {category(loop_keys[0])} has {len(values)} values for "
+                f"{len(loop_keys)} columns"
+            )
+        if category(loop_keys[0]) == ATOM_SITE:
+            # Object arrays are much cheaper to build than fixed width strings,
+            # columns are converted to numbers or strings only when used
+            table = np.array(values, dtype=object).reshape(-1, len(loop_keys))
+            for i, key in enumerate(loop_keys):
+                atom_site[key.split(".", 1)[1]] = table[:, i]
+        else:
+            for i, key in enumerate(loop_keys):
+                items[key] = values[i:: len(loop_keys)]
+
+    with _open(cif_file) as handle:
+        for line in _logical_lines(handle):
+            if in_loop_body and line[:1] not in ("_", "l", "d", "#", " ", "\t", "\n"):
+                # Fast path for the rows of a loop
+                if loop_wanted:
+                    loop_lines.append(line)
+                continue
+
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+
+            if pending_key is not None:
+                # Value of a single item given on the line after its key
+                if category(pending_key) in wanted:
+                    items[pending_key] = tokenize([line])[:1]
+                pending_key = None
+                continue
+
+            if in_loop_header:
+                if stripped.startswith("_"):
+                    loop_keys.append(stripped.split()[0])
+                    continue
+                in_loop_header, in_loop_body = False, True
+                loop_wanted = category(loop_keys[0]) in wanted
+
+            if in_loop_body:
+                if not stripped.startswith(("_", "loop_", "data_")):
+                    if loop_wanted:
+                        loop_lines.append(line)
+                    continue
+                finish_loop()
+                in_loop_body = False
+                loop_keys, loop_lines = [], []
+
+            if stripped.startswith("data_"):
+                if data_id is not None:
+                    # Only the first data block is read
+                    break
+                data_id = stripped[5:]
+            elif stripped.startswith("loop_"):
+                in_loop_header = True
+            else:
+                key, *value = stripped.split(None, 1)
+                if not value:
+                    pending_key = key
+                elif category(key) in wanted:
+                    items[key] = tokenize(value)[:1]
+
+        if in_loop_body:
+            finish_loop()
+
+    return MmcifData(data_id, atom_site, items)
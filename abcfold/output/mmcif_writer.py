@@ -0,0 +1,177 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, TextIO, Union
+
+import numpy as np
+
+from abcfold.output.atom_table import AtomTable
+
+ATOM_SITE_COLUMNS = (
+    "group_PDB",
+    "id",
+    "type_symbol",
+    "label_atom_id",
+    "label_alt_id",
+    "label_comp_id",
+    "label_asym_id",
+    "label_entity_id",
+    "label_seq_id",
+    "pdbx_PDB_ins_code",
+    "Cartn_x",
+    "Cartn_y",
+    "Cartn_z",
+    "occupancy",
+    "B_iso_or_equiv",
+    "auth_seq_id",
+    "auth_asym_id",
+    "pdbx_PDB_model_num",
+)
+
+# Characters removed from the data block name, as done by Bio.PDB's MMCIFIO
+DATA_ID_REMOVE = str.maketrans("", "", "#$'\"[] \t\n")
+
+
+def quote(value: str) -> str:
+    """
+    Quote a CIF value where required. Values containing a single quote are put
+    in double quotes, as AlphaFold3 does for atom names like "O5'"
+    """
+    if (
+        " " in value
+        or "'" in value
+        or '"' in value
+        or value[0] in ("_", "#", "$", "[", "]", ";")
+        or value.startswith(("data_", "save_"))
+        or value in ("loop_", "stop_", "global_")
+    ):
+        if "'" in value:
+            return f'"{value}"'
+        return f"'{value}'"
+    return value
+
+
+def _quote_column(values: np.ndarray) -> List[str]:
+    # Quoting is decided once per distinct value
+    unique, inverse = np.unique(values, return_inverse=True)
+    quoted = np.array([quote(value) for value in unique.tolist()], dtype=object)
+    return quoted[inverse].tolist()
+
+
+def _format_floats(values: np.ndarray, fmt: str) -> List[str]:
+    return [fmt % value for value in values.tolist()]
+
+
+def atom_site_columns(
+    atom_table: AtomTable, hetatm_chains: Optional[Sequence[bool]] = None
+) -> Dict[str, List[str]]:
+    """
+    Build the _atom_site values of the atom table in the layout written by
+    Bio.PDB's MMCIFIO, with label_asym_id set to the chain ids and every atom of a
+    ligand chain written as HETATM
+
+    Args:
+        atom_table (AtomTable): Atom table to write
+        hetatm_chains (Optional[Sequence[bool]]): For each chain, whether all of its
+        atoms are written as HETATM
+
+    Returns:
+        Dict[str, List[str]]: Formatted (and quoted) values of each column
+    """
+    n_atoms = len(atom_table)
+    residue_index = atom_table.residue_index
+    standard = atom_table.residue_hetflag == " "
+
+    # label_seq_id counts the standard residues of each chain from 1
+    residue_counter = np.cumsum(standard)
+    chain_offset = np.concatenate(
+        ([0], residue_counter[[s.stop - 1 for s in atom_table.chain_residue_slices()]])
+    )[:-1]
+    label_seq_id = np.where(
+        standard,
+        (residue_counter - chain_offset[atom_table.residue_chain_index]).astype(str),
+        ".",
+    )
+
+    group_pdb = np.where(standard, "ATOM", "HETATM")[residue_index]
+    if hetatm_chains is not None:
+        hetatm = np.asarray(hetatm_chains, dtype=bool)[atom_table.chain_index]
+        group_pdb = np.where(hetatm, "HETATM", group_pdb)
+
+    chain_ids = np.array(
+        ["." if chain_id == " " else chain_id for chain_id in atom_table.chain_ids],
+        dtype=object,
+    )[atom_table.chain_index]
+    chain_ids = _quote_column(chain_ids)
+    element = np.char.strip(atom_table.element)
+    element[element == ""] = "?"
+    icode = np.where(
+        atom_table.residue_icode == " ", "?", atom_table.residue_icode
+    )[residue_index]
+    coords = atom_table.coords.astype(np.float64)
+
+    return {
+        "group_PDB": group_pdb.tolist(),
+        "id": [str(i) for i in range(1, n_atoms + 1)],
+        "type_symbol": _quote_column(element),
+        "label_atom_id": _quote_column(np.char.strip(atom_table.atom_name)),
+        "label_alt_id": _quote_column(
+            np.where(atom_table.altloc == " ", ".", atom_table.altloc)
+        ),
+        "label_comp_id": _quote_column(
+            np.char.strip(atom_table.residue_name)[residue_index]
+        ),
+        "label_asym_id": chain_ids,
+        "label_entity_id": ["?"] * n_atoms,
+        "label_seq_id": label_seq_id[residue_index].tolist(),
+        "pdbx_PDB_ins_code": _quote_column(icode),
+        "Cartn_x": _format_floats(coords[:, 0], "%.3f"),
+        "Cartn_y": _format_floats(coords[:, 1], "%.3f"),
+        "Cartn_z": _format_floats(coords[:, 2], "%.3f"),
+        "occupancy": [str(value) for value in atom_table.occupancy.tolist()],
+        "B_iso_or_equiv": [str(value) for value in atom_table.bfactor.tolist()],
+        "auth_seq_id": atom_table.residue_seq.astype(str)[residue_index].tolist(),
+        "auth_asym_id": chain_ids,
+        "pdbx_PDB_model_num": ["1"] * n_atoms,
+    }
+
+
+def write_mmcif(
+    atom_table: AtomTable,
+    output_file: Union[str, Path, TextIO],
+    data_id: str,
+    hetatm_chains: Optional[Sequence[bool]] = None,
+) -> None:
+    """
+    Write the atom table as a mmCIF file in a single buffered pass. Columns are
+    padded to their widest value and trailing whitespace is removed from every
+    line
+
+    Args:
+        atom_table (AtomTable): Atom table to write
+        output_file (Union[str, Path, TextIO]): Path or handle to write to
+        data_id (str): Name of the data block
+        hetatm_chains (Optional[Sequence[bool]]): For each chain, whether all of its
+        atoms are written as HETATM
+
+    Returns:
+        None
+    """
+    columns = atom_site_columns(atom_table, hetatm_chains)
+    widths = [max(map(len, columns[name]), default=0) for name in ATOM_SITE_COLUMNS]
+    # The last column is not padded so rows carry no trailing whitespace
+    row_format = "".join(f"{{:<{width + 1}}}" for width in widths[:-1]) + "{}"
+
+    lines = [f"data_{data_id.translate(DATA_ID_REMOVE)}", "#", "loop_"]
+    lines.extend(f"_atom_site.{name}" for name in ATOM_SITE_COLUMNS)
+    lines.extend(
+        map(
+            row_format.format,
+            *(columns[name] for name in ATOM_SITE_COLUMNS),
+        )
+    )
+    lines.append("#")
+
+    if hasattr(output_file, "write"):
+        output_file.write("\n".join(lines))
+    else:
+        with open(output_file, "w") as f:
+            f.write("\n".join(lines))
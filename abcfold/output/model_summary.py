@@ -0,0 +1,322 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from abcfold.output.file_handlers import CifFile
+from abcfold.output.utils import get_aligned_plddts
+
+
+def model_sequence_data(cif_obj: CifFile) -> Dict[str, str]:
+    """
+    Get the sequence of each chain and ligand in a model, used internally for
+    plotting
+
+    Args:
+        cif_obj (CifFile): The model
+
+    Returns:
+        Dict[str, str]: Chain ID and sequence data
+    """
+    sequence_data: Dict[str, str] = {}
+    atom_table = cif_obj.atom_table
+    one_letter_codes = atom_table.one_letter_codes()
+    for chain_id, atom_slice, residue_slice in zip(
+        atom_table.chain_ids,
+        atom_table.chain_atom_slices(),
+        atom_table.chain_residue_slices(),
+    ):
+        residue_names = atom_table.residue_name[residue_slice]
+        if cif_obj.check_ligand(chain_id):
+            if chain_id not in sequence_data:
+                sequence_data[chain_id] = ""
+            sequence_data[chain_id] += "".join(
+                [name[0] for name in atom_table.atom_name[atom_slice]]
+            )
+        elif cif_obj.check_other(chain_id, ["dna"]):
+            sequence_data[chain_id] = "".join(
+                [residue_name[-1] for residue_name in residue_names]
+            )
+        elif cif_obj.check_other(chain_id, ["rna"]):
+            sequence_data[chain_id] = "".join(residue_names)
+        else:
+            sequence_data[chain_id] = "".join(one_letter_codes[residue_slice])
+    return sequence_data
+
+
+def merge_sequence_data(models_sequence_data: Iterable[Dict[str, str]]) -> dict:
+    """
+    Combine the sequence data of the models, keeping the chains of the last model
+    and the greatest sequence of each chain
+
+    Args:
+        models_sequence_data (Iterable[Dict[str, str]]): Sequence data of each
+            model, see `model_sequence_data`
+
+    Returns:
+        dict: Chain ID and sequence data
+    """
+    sequence_data: dict = {}
+    for sequence_data_ in models_sequence_data:
+        sequence_data = {
+            chain_id: sorted(
+                [sequence_data_[chain_id], sequence_data.get(chain_id, "")],
+                reverse=True,
+            )[0]
+            for chain_id in sequence_data_
+        }
+    return sequence_data
+
+
+class ModelRecord:
+    def __init__(
+        self,
+        pathway: Union[str, Path],
+        name: str,
+        chain_ids: List[str],
+        chain_lengths: Dict[str, int],
+        average_plddt: float,
+        h_score: int,
+        clashes: int,
+        clashes_residues: int,
+        derived: Optional[Dict[str, Union[str, Path]]] = None,
+    ):
+        """
+        State of a post-processed model, small enough to be sent back from a
+        worker process or kept in the manifest of the output directory in place
+        of the model itself
+
+        Args:
+            pathway (Union[str, Path]): Path to the CIF file of the model
+            name (str): Name given to the model
+            chain_ids (List[str]): Chain ids of the model in order
+            chain_lengths (Dict[str, int]): Number of residues in each chain, as
+            given by `CifFile.chain_lengths`
+            average_plddt (float): Average atom pLDDT score
+            h_score (int): H score of the atom pLDDT scores
+            clashes (int): Number of clashing atoms
+            clashes_residues (int): Number of clashing residues
+            derived (Optional[Dict[str, Union[str, Path]]]): Files derived from
+            the model by kind, e.g. "af3_pae" for its converted PAE
+
+        Attributes:
+            pathway (Path): Path to the CIF file of the model
+            name (str): Name given to the model
+            chain_ids (List[str]): Chain ids of the model in order
+            chain_lengths (Dict[str, int]): Number of residues in each chain
+            average_plddt (float): Average atom pLDDT score
+            h_score (int): H score of the atom pLDDT scores
+            clashes (int): Number of clashing atoms
+            clashes_residues (int): Number of clashing residues
+            derived (Dict[str, Path]): Files derived from the model by kind
+        """
+        self.pathway = Path(pathway)
+        self.name = name
+        self.chain_ids = list(chain_ids)
+        self.chain_lengths = dict(chain_lengths)
+        self.average_plddt = average_plddt
+        self.h_score = h_score
+        self.clashes = clashes
+        self.clashes_residues = clashes_residues
+        self.derived = {
+            kind: Path(pathway) for kind, pathway in (derived or {}).items()
+        }
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name}, {self.pathway})"
+
+    @classmethod
+    def from_cif(cls, cif_file: CifFile) -> "ModelRecord":
+        """
+        Record a model, its clashes are found if they were not already
+
+        Args:
+            cif_file (CifFile): The model
+
+        Returns:
+            ModelRecord: The state of the model
+        """
+        cif_file.find_clashes()
+        summary = cif_file.plddt_summary
+        return cls(
+            cif_file.pathway,
+            cif_file.name,
+            cif_file.chain_ids,
+            cif_file.chain_lengths(),
+            float(summary.average_plddt),
+            int(summary.h_score),
+            cif_file.clashes,
+            cif_file.clashes_residues,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict, root: Union[str, Path]) -> "ModelRecord":
+        """
+        Read a record written by `to_dict`
+
+        Args:
+            data (dict): The record
+            root (Union[str, Path]): Directory the paths of the record are
+            relative to
+
+        Returns:
+            ModelRecord: The record
+        """
+        root = Path(root)
+        return cls(
+            root.joinpath(data["pathway"]),
+            data["name"],
+            data["chain_ids"],
+            dict(data["chain_lengths"]),
+            data["average_plddt"],
+            data["h_score"],
+            data["clashes"],
+            data["clashes_residues"],
+            {kind: root.joinpath(key) for kind, key in data["derived"].items()},
+        )
+
+    def to_dict(self, root: Union[str, Path]) -> dict:
+        """
+        The record as JSON serializable data, its paths relative to a directory
+
+        Args:
+            root (Union[str, Path]): Directory holding the model
+
+        Returns:
+            dict: The record
+        """
+        return {
+            "pathway": self.pathway.relative_to(root).as_posix(),
+            "name": self.name,
+            "chain_ids": self.chain_ids,
+            # pairs, as the order of the chains is lost in a sorted JSON object
+            "chain_lengths": list(self.chain_lengths.items()),
+            "average_plddt": self.average_plddt,
+            "h_score": self.h_score,
+            "clashes": self.clashes,
+            "clashes_residues": self.clashes_residues,
+            "derived": {
+                kind: pathway.relative_to(root).as_posix()
+                for kind, pathway in self.derived.items()
+            },
+        }
+
+    def cif_file(self, input_params: Optional[dict] = None) -> CifFile:
+        """
+        Handle to the recorded model, nothing is read from its file until the
+        atoms are needed
+
+        Args:
+            input_params (Optional[dict]): Input parameters of the model, see
+            `CifFile`
+
+        Returns:
+            CifFile: The model, with its name and clash counts set
+        """
+        cif_file = CifFile(self.pathway, input_params)
+        cif_file.name = self.name
+        cif_file.clashes = self.clashes
+        cif_file.clashes_residues = self.clashes_residues
+        return cif_file
+
+
+class ModelSummary:
+    def __init__(self, cif_file: CifFile, method: str):
+        """
+        Compact record of a model holding everything the output page needs, so
+        the model itself can be released once it is summarized. Stands in for the
+        CifFile in `get_gap_indicies`, `get_aligned_plddts`, `plot_plddt` and
+        `get_model_data`
+
+        Args:
+            cif_file (CifFile): The model, its clashes are found if they were not
+            already
+            method (str): Program the model was made by, as in `get_all_cif_files`
+
+        Attributes:
+            name (str): Name given to the model
+            method (str): Program the model was made by
+            pathway (Path): Path to the CIF file of the model
+            residue_plddts (np.ndarray): pLDDT score of each token
+            chain_token_counts (Dict[str, int]): Number of tokens in each chain
+            sequence_data (Dict[str, str]): Sequence of each chain
+            average_plddt (float): Average atom pLDDT score
+            h_score (int): H score of the atom pLDDT scores
+            clashes (int): Number of clashing atoms
+            clashes_residues (int): Number of clashing residues
+            aligned_plddts (Optional[np.ndarray]): pLDDT scores on the positions
+            shared by every model, set by `align_model_summaries`
+        """
+        self.name = cif_file.name
+        self.method = method
+        self.pathway = Path(cif_file.pathway)
+
+        plddt_per_residue = cif_file.get_plddt_per_residue()
+        self.residue_plddts = np.array(
+            [plddt for plddts in plddt_per_residue.values() for plddt in plddts],
+            dtype=np.float64,
+        )
+        self.chain_token_counts = {
+            chain_id: len(plddts) for chain_id, plddts in plddt_per_residue.items()
+        }
+        self.__token_sequences = cif_file.token_sequences()
+        self.sequence_data = model_sequence_data(cif_file)
+
+        summary = cif_file.plddt_summary
+        self.average_plddt = summary.average_plddt
+        self.h_score = summary.h_score
+
+        cif_file.find_clashes()
+        self.clashes = cif_file.clashes
+        self.clashes_residues = cif_file.clashes_residues
+        self.aligned_plddts: Optional[np.ndarray] = None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name}, {self.method})"
+
+    def token_sequences(self) -> Dict[str, List[str]]:
+        """
+        Token names of each chain, as given by `CifFile.token_sequences`
+        """
+        return self.__token_sequences
+
+    def get_plddt_per_residue(self) -> Dict[str, list]:
+        """
+        pLDDT scores of the tokens of each chain, as given by
+        `CifFile.get_plddt_per_residue`
+        """
+        bounds = np.cumsum([0, *self.chain_token_counts.values()])
+        return {
+            chain_id: self.residue_plddts[start:end].tolist()
+            for chain_id, start, end in zip(
+                self.chain_token_counts, bounds[:-1], bounds[1:]
+            )
+        }
+
+
+def align_model_summaries(summaries: List[ModelSummary]) -> np.ndarray:
+    """
+    Align the pLDDT scores of every summarized model and store each model's row
+    on its summary
+
+    Args:
+        summaries (List[ModelSummary]): Summaries of every model of the run
+
+    Returns:
+        np.ndarray: (n_models, n_positions) pLDDT scores, NaN for gaps
+    """
+    plddts = get_aligned_plddts(*summaries)
+    for summary, plddt in zip(summaries, plddts):
+        summary.aligned_plddts = plddt
+    return plddts
+
+
+def summaries_by_method(summaries: List[ModelSummary]) -> Dict[str, list]:
+    """
+    Group the summaries by the program that made the models, in the layout of
+    `get_all_cif_files`
+    """
+    method_summaries: Dict[str, list] = {}
+    for summary in summaries:
+        method_summaries.setdefault(summary.method, []).append(summary)
+    return method_summaries
@@ -0,0 +1,76 @@
+import json
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+PAE_MATRICES = ("pae", "contact_probs")
+
+
+def contact_probs(scores: dict) -> Optional[np.ndarray]:
+    """
+    Get the contact probability matrix of AlphaFold3 style scores
+
+    Args:
+        scores (dict): AlphaFold3 style scores
+
+    Returns:
+        Optional[np.ndarray]: Contact probability matrix, None if the scores have
+        no contact probabilities
+    """
+    if len(scores.get("contact_probs", [])):
+        return np.asarray(scores["contact_probs"])
+    return None
+
+
+def write_pae_npz(scores: dict, file_path: Union[str, Path]) -> None:
+    """
+    Write AlphaFold3 style scores as an uncompressed npz file, the PAE and
+    contact probability matrices are stored as float32
+
+    Args:
+        scores (dict): AlphaFold3 style scores
+        file_path (Union[str, Path]): Path to the npz file
+
+    Returns:
+        None
+    """
+    arrays = {}
+    for key, values in scores.items():
+        if key in PAE_MATRICES:
+            arrays[key] = np.asarray(values, dtype=np.float32)
+        else:
+            arrays[key] = np.asarray(values)
+    with open(file_path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def write_pae_json(scores: dict, file_path: Union[str, Path]) -> None:
+    """
+    Write AlphaFold3 style scores as a single line JSON file. float32 matrices are
+    written with the shortest representation of each value
+
+    Args:
+        scores (dict): AlphaFold3 style scores, values may be lists or arrays
+        file_path (Union[str, Path]): Path to the JSON file
+
+    Returns:
+        None
+    """
+    items = []
+    for key, values in scores.items():
+        if (
+            isinstance(values, np.ndarray)
+            and values.dtype == np.float32
+            and values.ndim == 2
+        ):
+            rows = values.astype(str)
+            value = "[" + ",".join("[" + ",".join(row) + "]" for row in rows) + "]"
+        elif isinstance(values, np.ndarray):
+            value = json.dumps(values.tolist())
+        else:
+            value = json.dumps(values)
+        items.append(f"{json.dumps(key)}: {value}")
+
+    with open(file_path, "w") as f:
+        f.write("{" + ", ".join(items) + "}")
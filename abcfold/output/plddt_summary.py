@@ -0,0 +1,118 @@
+from enum import Enum
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+
+class PlddtBand(Enum):
+    """
+    Enum class for the pLDDT confidence bands shown on the output page
+    """
+
+    V_LOW = "v_low"
+    LOW = "low"
+    CONFIDENT = "confident"
+    V_HIGH = "v_high"
+
+    @classmethod
+    def values(cls):
+        return [band.value for band in cls]
+
+
+def plddt_array(plddts: Union[np.ndarray, list]) -> np.ndarray:
+    """
+    Convert pLDDT scores to a float array, missing (None) scores become NaN and
+    fall outside every band
+    """
+    if isinstance(plddts, np.ndarray) and plddts.dtype.kind == "f":
+        return plddts
+    return np.array(
+        [np.nan if plddt is None else plddt for plddt in plddts], dtype=np.float64
+    )
+
+
+def band_masks(plddts: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Boolean mask of the scores falling in each pLDDT band
+    """
+    return {
+        PlddtBand.V_LOW.value: (plddts >= 0) & (plddts <= 50),
+        PlddtBand.LOW.value: (plddts > 50) & (plddts < 70),
+        PlddtBand.CONFIDENT.value: (plddts >= 70) & (plddts < 90),
+        PlddtBand.V_HIGH.value: plddts >= 90,
+    }
+
+
+def mask_regions(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Get the (start, end) index of each run of True values in a boolean mask
+    """
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return [(int(start), int(end) - 1) for start, end in zip(edges[::2], edges[1::2])]
+
+
+def plddt_regions(plddts: Union[np.ndarray, list]) -> Dict[str, list]:
+    """
+    Get the contiguous regions of each pLDDT band
+
+    Args:
+        plddts (Union[np.ndarray, list]): pLDDT scores, None for missing scores
+
+    Returns:
+        Dict[str, list]: (start, end) indices of the regions in each band
+    """
+    masks = band_masks(plddt_array(plddts))
+    return {band: mask_regions(mask) for band, mask in masks.items()}
+
+
+def h_score(plddts: np.ndarray) -> int:
+    """
+    Calculate the H score, the largest i for which at least i% of the scores are
+    greater than or equal to i
+
+    Args:
+        plddts (np.ndarray): pLDDT scores
+
+    Returns:
+        int: The H score
+    """
+    if len(plddts) == 0:
+        return 0
+    # scores are compared against integer thresholds, so the floor of each score
+    # decides which thresholds it passes
+    histogram = np.bincount(
+        np.clip(np.floor(plddts), 0, 100).astype(np.int64), minlength=101
+    )
+    at_least = np.cumsum(histogram[::-1])[::-1]
+    thresholds = np.arange(101)
+    passing = np.flatnonzero(
+        (100.0 / len(plddts)) * at_least[1:] >= thresholds[1:]
+    )
+    return int(thresholds[1:][passing[-1]]) if len(passing) else 0
+
+
+class PlddtSummary:
+    def __init__(self, plddts: Union[np.ndarray, list]):
+        """
+        Summary statistics of a set of pLDDT scores, computed once from a single
+        array
+
+        Args:
+            plddts (Union[np.ndarray, list]): pLDDT scores
+
+        Attributes:
+            plddts (np.ndarray): pLDDT scores as a float array
+            average_plddt (float): Average pLDDT score
+            h_score (int): H score of the scores
+            band_counts (dict): Number of scores in each pLDDT band
+            regions (dict): Contiguous regions of each pLDDT band
+        """
+        self.plddts = plddt_array(plddts)
+        self.average_plddt = (
+            float(np.nanmean(self.plddts)) if len(self.plddts) else float("nan")
+        )
+        self.h_score = h_score(self.plddts[~np.isnan(self.plddts)])
+
+        masks = band_masks(self.plddts)
+        self.band_counts = {band: int(mask.sum()) for band, mask in masks.items()}
+        self.regions = {band: mask_regions(mask) for band, mask in masks.items()}
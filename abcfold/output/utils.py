@@ -1,18 +1,21 @@
+import functools
 import json
-from itertools import zip_longest
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Union
+from typing import Callable, Dict, List, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
 from Bio.Align import PairwiseAligner
 
 from abcfold.output.file_handlers import CifFile
+from abcfold.output.pae_scores import (contact_probs, write_pae_json,
+                                       write_pae_npz)
 
 AF3TEMPLATE: dict = {
     "atom_chain_ids": [],
     "atom_plddts": [],
-    "contact_probs": [],
     "pae": [],
     "token_chain_ids": [],
     "token_res_ids": [],
@@ -23,23 +26,10 @@ class Af3Pae:
     @classmethod
     def from_alphafold3(cls, scores: dict, cif_file: CifFile):
         def reorder_matrix(pae_matrix, chain_lengths, af3_chain_lengths):
-            if not isinstance(pae_matrix, np.ndarray):
-                pae_matrix = np.array(pae_matrix)
-            desired = flatten([[k] * v for k, v in chain_lengths.items()])
-            current = flatten([[k] * v for k, v in af3_chain_lengths.items()])
-            order = {}
-            for i, c in enumerate(current):
-                if c in desired:
-                    idx = desired.index(c)
-                    order[i] = idx
-                    desired[idx] = None
-                else:
-                    order[i] = i
-            out = np.zeros_like(pae_matrix)
-            for i in range(len(pae_matrix)):
-                for j in range(len(pae_matrix)):
-                    out[order[i], order[j]] = pae_matrix[i, j]
-            return out.tolist()
+            order = chain_permutation(
+                tuple(chain_lengths.items()), tuple(af3_chain_lengths.items())
+            )
+            return np.asarray(pae_matrix)[np.ix_(order, order)]
 
         af3_scores = AF3TEMPLATE.copy()
         chain_lengths = cif_file.chain_lengths(mode="residues", ligand_atoms=True, ptm_atoms=True)
@@ -47,7 +37,7 @@ class Af3Pae:
         token_chains = np.unique(scores["token_chain_ids"])
         missing = set(token_chains) - set(chain_lengths.keys())
         if missing and "L" in chain_lengths:
-            json_ids = [ch.id for ch in cif_file.get_chains()]
+            json_ids = cif_file.chain_ids
             mapping = {chr(ord("A")+i): json_ids[i] for i in range(len(json_ids))}
             scores["token_chain_ids"] = [mapping.get(c, c) for c in scores["token_chain_ids"]]
             token_chains = np.unique(scores["token_chain_ids"])
@@ -62,12 +52,13 @@ class Af3Pae:
         token_res = flatten(list(cif_file.token_residue_ids().values()))
 
         reordered_pae = reorder_matrix(scores["pae"], chain_lengths, af3pae_chain_lengths)
-        contact = reorder_matrix(scores["contact_probs"], chain_lengths, af3pae_chain_lengths)
+        contact = contact_probs(scores)
         token_chain_ids = flatten([[k] * len(v) for k, v in cif_file.token_residue_ids().items()])
 
         af3_scores["atom_chain_ids"] = atom_chain_ids
         af3_scores["atom_plddts"] = atom_plddts
-        af3_scores["contact_probs"] = contact
+        if contact is not None:
+            af3_scores["contact_probs"] = reorder_matrix(contact, chain_lengths, af3pae_chain_lengths)
         af3_scores["pae"]           = reordered_pae
         af3_scores["token_chain_ids"] = token_chain_ids
         af3_scores["token_res_ids"] = token_res
@@ -98,10 +89,9 @@ class Af3Pae:
             ]
         )
 
-        af3_scores["pae"] = scores["pae"].tolist()
+        af3_scores["pae"] = scores["pae"]
         af3_scores["atom_chain_ids"] = atom_chain_ids
         af3_scores["atom_plddts"] = atom_plddts
-        af3_scores["contact_probs"] = np.zeros(shape=scores["pae"].shape).tolist()
         af3_scores["token_chain_ids"] = token_chain_ids
         af3_scores["token_res_ids"] = token_res_ids
 
@@ -130,10 +120,9 @@ class Af3Pae:
             ]
         )
 
-        af3_scores["pae"] = scores.tolist()
+        af3_scores["pae"] = scores
         af3_scores["atom_chain_ids"] = atom_chain_ids
         af3_scores["atom_plddts"] = atom_plddts
-        af3_scores["contact_probs"] = np.zeros(shape=scores.shape).tolist()
         af3_scores["token_chain_ids"] = token_chain_ids
         af3_scores["token_res_ids"] = token_res_ids
 
@@ -143,8 +132,60 @@ class Af3Pae:
         self.scores = af3_scores
 
     def to_file(self, file_path: Union[str, Path]):
-        with open(file_path, "w") as f:
-            json.dump(self.scores, f, indent=4)
+        """
+        Save the scores. A ".npz" path gives the compact binary file read by
+        PaeFile, with the matrices stored as float32, any other path gives the
+        AlphaFold3 style JSON read by the pae-viewer
+
+        Args:
+            file_path (Union[str, Path]): Path to save the scores to
+
+        Returns:
+            None
+        """
+        if Path(file_path).suffix == ".npz":
+            write_pae_npz(self.scores, file_path)
+        else:
+            write_pae_json(self.scores, file_path)
+
+
+@functools.lru_cache(maxsize=128)
+def chain_permutation(
+    chain_lengths: Tuple[Tuple[str, int], ...],
+    af3_chain_lengths: Tuple[Tuple[str, int], ...],
+) -> np.ndarray:
+    """
+    Get the permutation taking tokens ordered by af3_chain_lengths to the order
+    of chain_lengths. Chains of chain_lengths without tokens are skipped. The
+    permutation is computed once per chain layout and shared by every sample
+    with that layout
+
+    Args:
+        chain_lengths (Tuple[Tuple[str, int], ...]): (chain id, length) of each
+        chain in the desired order
+        af3_chain_lengths (Tuple[Tuple[str, int], ...]): (chain id, length) of each
+        chain in the current order
+
+    Returns:
+        np.ndarray: Index of the current token placed at each desired position,
+        apply with m[np.ix_(order, order)]
+    """
+    current_starts = {}
+    start = 0
+    for chain_id, length in af3_chain_lengths:
+        current_starts[chain_id] = start
+        start += length
+
+    order = np.concatenate(
+        [
+            np.arange(current_starts[chain_id], current_starts[chain_id] + length)
+            for chain_id, length in chain_lengths
+            if chain_id in current_starts
+        ]
+        + [np.zeros(0, dtype=np.int64)]
+    ).astype(np.int64)
+    order.flags.writeable = False
+    return order
 
 
 def flatten(xss):
@@ -157,20 +198,26 @@ def get_gap_indicies(*cif_objs) -> List[np.ndarray]:
     between chain lengths between the modelling programs. This function is
     used to find where these discrepencies are.
 
+    Chains are compared token by token (one token per residue, one per ligand
+    atom), each distinct pair of chain compositions is aligned once and identical
+    compositions are mapped without aligning
+
     Args:
-        *cif_objs: Multiple cif objects
+        *cif_objs: Multiple cif objects, or their ModelSummary records
 
     Returns:
-        indicies: Dict with the chain_id as the key where the discrepency is located and
-            the value is a list of indicies with -1 representing gaps
+        indicies: Array of token indicies for each model, with -1 representing
+            gaps
 
     """
     indicies: list = []
 
     if len(cif_objs) == 1:
         return indicies
+    token_sequences = [cif.token_sequences() for cif in cif_objs]
     chain_lengths = [
-        cif.chain_lengths(mode="residues", ligand_atoms=True) for cif in cif_objs
+        {chain_id: len(tokens) for chain_id, tokens in sequences.items()}
+        for sequences in token_sequences
     ]
 
     assert all(
@@ -180,69 +227,116 @@ def get_gap_indicies(*cif_objs) -> List[np.ndarray]:
         ]
     )
 
-    unequal_chain_lengths = [
-        id_
-        for id_ in chain_lengths[0].keys()
-        if any(
-            [
-                chain_lengths[0][id_] != chain_lengths[i][id_]
-                for (i, _) in enumerate(chain_lengths[1:], start=1)
-            ]
+    # every distinct token name is encoded as a single character for the aligner
+    token_codes: Dict[str, str] = {}
+
+    def encode(tokens: List[str]) -> str:
+        return "".join(
+            token_codes.setdefault(token, chr(0x100 + len(token_codes)))
+            for token in tokens
         )
-    ]
 
+    model_indicies: List[List[np.ndarray]] = [[] for _ in cif_objs]
     for chain_id in chain_lengths[0]:
-        if chain_id in unequal_chain_lengths:
-            chain_atoms = [
-                "".join([atom.element for atom in cif.get_atoms(chain_id=chain_id)])
-                for cif in cif_objs
-            ]
-
-            longest = max(chain_atoms, key=len)
-
-            for atom_str in chain_atoms:
-                alignment = PairwiseAligner().align(longest, atom_str)
-                indicies.append(alignment[0].indices[1])
-        else:
-            for _ in cif_objs:
+        if all(
+            lengths[chain_id] == chain_lengths[0][chain_id]
+            for lengths in chain_lengths[1:]
+        ):
+            for chain_indicies in model_indicies:
+                chain_indicies.append(np.ones(chain_lengths[0][chain_id], dtype=int))
+            continue
 
-                indicies.append(np.array([1] * chain_lengths[0][chain_id]))
+        compositions = [encode(tokens[chain_id]) for tokens in token_sequences]
+        longest = max(compositions, key=len)
+        for chain_indicies, composition in zip(model_indicies, compositions):
+            chain_indicies.append(align_tokens(longest, composition))
 
-    indicies = interleave_repeated(
-        indicies, len(cif_objs), len(list(chain_lengths[0].keys()))
-    )
+    indicies = [np.concatenate(chain_indicies) for chain_indicies in model_indicies]
 
     return indicies
 
 
-def interleave_repeated(lst, n, chain_no):
-    indicies = []
-    chunks = [lst[i : i + n] for i in range(0, len(lst), n)]  # noqa: E203
-    interleaved = [x for tup in zip_longest(*chunks) for x in tup if x is not None]
+@functools.lru_cache(maxsize=1024)
+def align_tokens(reference: str, tokens: str) -> np.ndarray:
+    """
+    Map tokens onto a reference sequence, each pair of sequences is only aligned
+    once
 
-    for i in range(0, len(interleaved), chain_no):
-        tmp_lst = []
-        for j in range(chain_no):
-            tmp_lst.extend(interleaved[i + j])
-        indicies.append(tmp_lst)
+    Args:
+        reference (str): Reference sequence, one character per token
+        tokens (str): Sequence to map, one character per token
 
+    Returns:
+        np.ndarray: Index into tokens of each aligned position, -1 for gaps
+    """
+    if tokens == reference:
+        indicies = np.arange(len(tokens))
+    else:
+        indicies = PairwiseAligner().align(reference, tokens)[0].indices[1]
+    indicies.flags.writeable = False
     return indicies
 
 
 def insert_none_by_minus_one(indices, values):
-    result = []
-    value_index = 0
+    indices = np.asarray(indices)
+    present = indices != -1
+    result = np.full(len(indices), None, dtype=object)
+    result[present] = values[: int(present.sum())]
 
-    for idx in indices:
-        if idx == -1:
-            result.append(None)
-        else:
-            result.append(values[value_index])
-            value_index += 1
+    return result.tolist()
 
-    assert len(indices) == len(result)
 
-    return result
+def align_plddts(
+    plddts: Sequence[Union[np.ndarray, list]], indicies: Sequence[np.ndarray]
+) -> np.ndarray:
+    """
+    Place the pLDDT scores of every model on the shared positions given by the
+    gap indicies, the batched form of `insert_none_by_minus_one`
+
+    Args:
+        plddts (Sequence[Union[np.ndarray, list]]): Residue pLDDT scores of each
+            model
+        indicies (Sequence[np.ndarray]): Gap indicies of each model from
+            `get_gap_indicies`, -1 representing gaps. Empty if the models need no
+            alignment
+
+    Returns:
+        np.ndarray: (n_models, n_positions) pLDDT scores, NaN for gaps
+    """
+    if len(indicies) == 0:
+        indicies = [np.zeros(len(plddt), dtype=int) for plddt in plddts]
+
+    n_positions = max((len(index) for index in indicies), default=0)
+    present = np.zeros((len(indicies), n_positions), dtype=bool)
+    for row, index in zip(present, indicies):
+        row[: len(index)] = np.asarray(index) != -1
+
+    aligned = np.full(present.shape, np.nan)
+    counts = present.sum(axis=1)
+    if counts.sum():
+        aligned[present] = np.concatenate(
+            [
+                np.asarray(plddt, dtype=np.float64)[:count]
+                for plddt, count in zip(plddts, counts)
+            ]
+        )
+
+    return aligned
+
+
+def get_aligned_plddts(*cif_objs) -> np.ndarray:
+    """
+    Align the residue pLDDT scores of all the models once per run
+
+    Args:
+        *cif_objs: Multiple cif objects
+
+    Returns:
+        np.ndarray: (n_models, n_positions) pLDDT scores, NaN for gaps
+    """
+    return align_plddts(
+        [cif.residue_plddts for cif in cif_objs], get_gap_indicies(*cif_objs)
+    )
 
 
 def make_dummy_m8_file(run_json, output_dir):
@@ -276,3 +370,30 @@ def make_dummy_m8_file(run_json, output_dir):
     pd.DataFrame(table).to_csv(m8_file, sep="\t", header=False, index=False)
 
     return m8_file
+
+
+def map_models(function: Callable, tasks: Sequence[tuple], workers: int = 1) -> list:
+    """
+    Apply a post-processing function to the arguments of every model. The models
+    are independent, so with more than one worker they are fanned out to a pool of
+    processes. The function must be defined at module level and its arguments and
+    result must be picklable, and should be small e.g. handles rather than models.
+    The workers are spawned rather than forked, as the programs may be processed
+    from several threads at once
+
+    Args:
+        function (Callable): Function to apply to each model
+        tasks (Sequence[tuple]): Arguments of the function for each model
+        workers (int): Number of worker processes, 1 runs the models in this process
+
+    Returns:
+        list: Result for each model, in the order of the tasks
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        return [function(*task) for task in tasks]
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(tasks)),
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        return list(pool.map(function, *zip(*tasks)))
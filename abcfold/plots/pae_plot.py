@@ -1,18 +1,21 @@
 # Run the code for the PAE plots
 
+import csv
 import logging
 import shutil
 import subprocess
+from itertools import repeat
 from multiprocessing import Process
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Dict, List, Optional, Union
 
-import pandas as pd
+import numpy as np
 
 from abcfold.output.alphafold3 import AlphafoldOutput
 from abcfold.output.boltz import BoltzOutput
 from abcfold.output.chai import ChaiOutput
 from abcfold.output.file_handlers import CifFile
+from abcfold.output.model_summary import ModelSummary
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +56,7 @@ COLUMNS = [
 def create_pae_plots(
     outputs: list,
     output_dir: Union[str, Path],
+    summaries: Optional[List[ModelSummary]] = None,
 ) -> Dict[str, str]:
     """
     Create PAE html plots for the outputs
@@ -60,6 +64,9 @@ def create_pae_plots(
     Args:
         outputs: List of outputs to create plots for
         output_dir: Output directory for the plots
+        summaries: If given, every model is summarized into this list and released
+            as soon as the inputs of its plot are written, so only one model is
+            held in memory at a time
 
     Returns:
         Pathway plot dictionary with the key as the plot path and value as the plot path
@@ -87,6 +94,7 @@ def create_pae_plots(
 
         if isinstance(output, BoltzOutput):
             css_path = CSSPATHS["B"]
+            method = "Boltz-1"
             template_file = plots_dir.joinpath("boltz_template.html")
             template_files.append(template_file)
             cmd = get_template_run_script(
@@ -99,6 +107,7 @@ def create_pae_plots(
 
         elif isinstance(output, ChaiOutput):
             css_path = CSSPATHS["C"]
+            method = "Chai-1"
             template_file = plots_dir.joinpath("chai_template.html")
             template_files.append(template_file)
             cmd = get_template_run_script(
@@ -111,6 +120,7 @@ def create_pae_plots(
 
         elif isinstance(output, AlphafoldOutput):
             css_path = CSSPATHS["A"]
+            method = "Alphafold3"
             template_file = plots_dir.joinpath("af3_template.html")
             template_files.append(template_file)
             cmd = get_template_run_script(
@@ -130,6 +140,8 @@ def create_pae_plots(
                         pathway_plot,
                         template_file,
                         True,
+                        method,
+                        summaries,
                     )
                 )
 
@@ -146,6 +158,8 @@ def create_pae_plots(
                 pathway_plot,
                 template_file,
                 False,
+                method,
+                summaries,
             )
         )
 
@@ -161,11 +175,21 @@ def create_pae_plots(
     for csv_file in output_dir.glob("*.csv"):
         csv_file.unlink()
 
+    for scores_json_file in output_dir.glob("*scores.json"):
+        scores_json_file.unlink()
+
     return pathway_plot
 
 
 def prepare_scripts(
-    cif_files, pae_files, plots_dir, pathway_plot, template_file, is_af3=False
+    cif_files,
+    pae_files,
+    plots_dir,
+    pathway_plot,
+    template_file,
+    is_af3=False,
+    method="",
+    summaries=None,
 ):
 
     scripts = []
@@ -176,18 +200,27 @@ def prepare_scripts(
         clashes_csv_file = plots_dir.joinpath(f"{name_stem}clashes.csv")
         clashes_csv(cif_file, clashes_csv_file)
 
+        # The pae-viewer reads JSON, it is only written here for the viewer
+        scores_json_file = plots_dir.joinpath(f"{name_stem}scores.json")
+        pae_file.to_json(scores_json_file)
+
         labels = [f"Chain-{chain}" for chain in cif_file.chain_lengths()]
         plot_pathway = plots_dir.joinpath(f"{name_stem}pae_plot.html")
         pae_viewer_script = get_pae_run_script(
             cif_file.pathway,
             labels,
-            pae_file.pathway,
+            scores_json_file,
             plot_pathway,
             template_file,
             clashes_csv_file,
         )
         pathway_plot[str(cif_file.pathway)] = str(plot_pathway)
         scripts.append(pae_viewer_script)
+
+        if summaries is not None:
+            summaries.append(ModelSummary(cif_file, method))
+            cif_file.release()
+            pae_file.release()
     return scripts
 
 
@@ -312,21 +345,35 @@ def create_subdirs(output_dir: Union[str, Path], subdirs: List[str]):
 
 
 def clashes_csv(cif_file: CifFile, output_name: Union[str, Path]):
+    """
+    Write the residue clashes of a model as crosslinks for the pae-viewer. The
+    columns are gathered from the atom table and streamed to the file in one go
+
+    Args:
+        cif_file (CifFile): Model to write the clashes of
+        output_name (Union[str, Path]): Path to the CSV file
+
+    Returns:
+        None
+    """
     output_name = Path(output_name)
 
-    _, clashes = cif_file.check_clashes()
-    df = pd.DataFrame(columns=COLUMNS)
-
-    for clash in clashes:
-        atom1, atom2 = clash
-        chain_id1, chain_id2 = atom1.get_full_id()[2], atom2.get_full_id()[2]
-        res1, res2 = atom1.get_full_id()[3][1], atom2.get_full_id()[3][1]
-        df.loc[len(df)] = [
-            f"Chain-{chain_id1}",
-            res1,
-            f"Chain-{chain_id2}",
-            res2,
-            False,
-        ]
-
-    df.to_csv(output_name, index=False)
+    _, residue_pairs = cif_file.find_clashes()
+    atom_table = cif_file.atom_table
+    chain_ids = np.array(atom_table.chain_ids, dtype=object)[
+        atom_table.chain_index[residue_pairs]
+    ]
+    residue_seqs = atom_table.residue_seq[atom_table.residue_index[residue_pairs]]
+
+    with open(output_name, "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(COLUMNS)
+        writer.writerows(
+            zip(
+                [f"Chain-{chain_id}" for chain_id in chain_ids[:, 0]],
+                residue_seqs[:, 0].tolist(),
+                [f"Chain-{chain_id}" for chain_id in chain_ids[:, 1]],
+                residue_seqs[:, 1].tolist(),
+                repeat(False),
+            )
+        )
@@ -1,14 +1,15 @@
 # import numpy as np
 import logging
 from pathlib import Path
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import plotly.offline as pyo
 
 from abcfold.output.file_handlers import CifFile
-from abcfold.output.utils import get_gap_indicies, insert_none_by_minus_one
+from abcfold.output.utils import get_aligned_plddts
 
 logger = logging.getLogger("logger")
 
@@ -21,6 +22,7 @@ def plot_plddt(
     show: bool = False,
     chain_line_occupancy: float = 0.9,
     include_plotlyjs: bool = True,
+    plddts: Optional[np.ndarray] = None,
 ) -> None:
     """
     Plots the pLDDT distribution of the models in the dictionary of cif models. Outputs
@@ -37,6 +39,9 @@ def plot_plddt(
         dash: Dash style of the lines in the plot.
         show: If True, the plot will be displayed in the browser.
         chain_line_occupancy: Opacity of the vertical lines that separate the chains.
+        plddts: (n_models, n_positions) aligned pLDDT scores of the models in the
+            order of the dictionary, from `get_aligned_plddts`. Computed if not
+            given.
 
     Returns:
         None
@@ -58,11 +63,16 @@ def plot_plddt(
 
     line_ranges: dict = {}
 
-    cif_models = [
-        cif_file for cif_files in cif_models_dict.values() for cif_file in cif_files
-    ]
-    indicies = get_gap_indicies(*cif_models)
-    indicies_index = 0
+    if plddts is None:
+        plddts = get_aligned_plddts(
+            *[
+                cif_file
+                for cif_files in cif_models_dict.values()
+                for cif_file in cif_files
+            ]
+        )
+    positions = np.arange(plddts.shape[1])
+    plddt_rows = iter(plddts)
 
     for method, cif_models in cif_models_dict.items():
 
@@ -71,12 +81,8 @@ def plot_plddt(
             color_list = method_colours.get(method, colours)
             color = color_list[model_index % len(color_list)]
 
-            plddt = cif_model.residue_plddts
-
-            if len(indicies) > 0:
-                plddt = insert_none_by_minus_one(indicies[indicies_index], plddt)
+            plddt = next(plddt_rows)
 
-            indicies_index += 1
             chain_ranges = {
                 chain: len(plddt)
                 for chain, plddt in cif_model.get_plddt_per_residue().items()
@@ -87,7 +93,7 @@ def plot_plddt(
             }
 
             trace = go.Scatter(
-                x=list(range(len(plddt))),
+                x=positions,
                 y=plddt,
                 mode="lines",
                 legendgroup=method,
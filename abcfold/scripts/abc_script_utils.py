@@ -8,10 +8,15 @@ from io import StringIO
 from pathlib import Path
 from typing import Mapping, Optional, Union
 
+import numpy as np
 from Bio import Align
 from Bio.PDB import MMCIFIO, MMCIFParser
+from Bio.PDB.MMCIF2Dict import MMCIF2Dict
 from colorama import Fore, Style
 
+from abcfold.output.atom_table import AtomTable
+from abcfold.output.mmcif_reader import read_mmcif
+
 logger = logging.getLogger("logger")
 
 
@@ -56,26 +61,47 @@ def setup_logger():
 
 def get_chains(mmcif_file):
     """Return a list of chains in a MMCIF file."""
-    parser = MMCIFParser(QUIET=True)
-    structure = parser.get_structure("template", mmcif_file)
+    atom_site = read_mmcif(mmcif_file).atom_site
+    keep = atom_site["auth_seq_id"] != "."
+    chain_ids = atom_site["auth_asym_id"][keep]
+    if "pdbx_PDB_model_num" in atom_site:
+        model_num = atom_site["pdbx_PDB_model_num"][keep]
+        model_start = np.flatnonzero(
+            np.concatenate(([True], model_num[1:] != model_num[:-1]))
+        )
+    else:
+        model_start = np.array([0])
+
     chains = []
-    for model in structure:
-        for chain in model:
-            chains.append(chain.id)
+    for start, end in zip(model_start, np.append(model_start[1:], len(chain_ids))):
+        chains.extend(dict.fromkeys(chain_ids[start:end].tolist()))
     return chains
 
 
+def load_atom_table(mmcif_file) -> AtomTable:
+    """
+    Read the first model of a MMCIF file into an atom table, BioPython is only used
+    when the streaming reader can not represent the file
+    """
+    atom_table = AtomTable.from_atom_site(read_mmcif(mmcif_file).atom_site)
+    if atom_table is None:
+        if hasattr(mmcif_file, "seek"):
+            mmcif_file.seek(0)
+        parser = MMCIFParser(QUIET=True)
+        atom_table = AtomTable.from_structure(
+            parser.get_structure("template", mmcif_file)
+        )
+    return atom_table
+
+
 def extract_sequence_from_mmcif(mmcif_file):
     """Extract the sequence from a MMCIF file."""
-    parser = MMCIFParser(QUIET=True)
-    structure = parser.get_structure("template", mmcif_file)
-    sequence = ""
-    model = structure[0]  # Assuming one model/chain only
-    for chain in model:
-        for residue in chain:
-            if residue.id[0] == " ":  # Exclude heteroatoms
-                sequence += residue.resname[0]  # Simplified to take the first letter
-    return sequence
+    atom_table = load_atom_table(mmcif_file)  # Assuming one model/chain only
+    # Exclude heteroatoms, simplified to take the first letter
+    return "".join(
+        residue_name[0]
+        for residue_name in atom_table.residue_name[atom_table.residue_hetflag == " "]
+    )
 
 
 # Code from https://github.com/google-deepmind/alphafold3
@@ -136,17 +162,24 @@ def get_mmcif(
     specified chain, residues and metadata.
     """
 
-    parser = MMCIFParser(QUIET=True)
-    structure = parser.get_structure(pdb_id, cif)
-
-    # Extract release date from the CIF file
-    mmcif_dict = parser._mmcif_dict
     headers_to_keep = [
         "_entry.id",
         "_entry.title",
         "_entry.deposition_date",
         "_pdbx_audit_revision_history.revision_date",
     ]
+    mmcif_data = read_mmcif(
+        cif, categories={"_atom_site"} | {key.split(".")[0] for key in headers_to_keep}
+    )
+    atom_table = AtomTable.from_atom_site(mmcif_data.atom_site)
+
+    # Extract release date from the CIF file
+    if atom_table is None:
+        parser = MMCIFParser(QUIET=True)
+        structure = parser.get_structure(pdb_id, cif)
+        mmcif_dict = parser._mmcif_dict
+    else:
+        mmcif_dict = mmcif_data.items
     filtered_metadata = {
         key: mmcif_dict[key] for key in headers_to_keep if key in mmcif_dict
     }
@@ -157,6 +190,53 @@ def get_mmcif(
             "%Y-%m-%d"
         )
 
+    if atom_table is None:
+        structure = filter_structure(structure, chain_id, start, end)
+    else:
+        # The atom table only holds the first model, which is the representative
+        # model picked for multimodel templates (e.g. NMR)
+        chain_mask = atom_table.residue_chain_index == (
+            atom_table.chain_ids.index(chain_id)
+            if chain_id in atom_table.chain_ids
+            else -1
+        )
+        residue_position = np.cumsum(chain_mask)
+        residue_mask = (
+            chain_mask
+            & (residue_position >= start)
+            & (residue_position <= end)
+            & (atom_table.residue_hetflag == " ")
+        )
+        structure = atom_table.select(
+            residue_mask[atom_table.residue_index]
+        ).to_structure(pdb_id)
+
+    # Save the filtered structure
+    io = MMCIFIO()
+    io.set_structure(structure)
+    filtered_output = StringIO()
+    io.save(filtered_output)
+
+    # Parse the filtered structure to get the modified MMCIF with no metadata
+    filtered_output.seek(0)
+    mmcif_dict = MMCIF2Dict(filtered_output)
+
+    # Add the filtered metadata to the MMCIF dictionary
+    mmcif_dict.update(filtered_metadata)
+
+    # Save the modified MMCIF with wanted metadata to a string
+    string_io = StringIO()
+    io.set_dict(mmcif_dict)
+    io.save(string_io)
+
+    return string_io.getvalue()
+
+
+def filter_structure(structure, chain_id, start, end):
+    """
+    Keep the residues between start and end (1-based, inclusive) of a chain in the
+    first model of a BioPython structure, heteroatoms are removed
+    """
     # For multimodel templates (e.g. NMR) pick a single representative model
     # add a copy of the first model to the structure
 
@@ -184,31 +264,7 @@ def get_mmcif(
             for res in res_to_del:
                 chain.detach_child(res.id)
 
-    # Save the filtered structure to a new CIF file
-    io = MMCIFIO()
-    io.set_structure(structure)
-    filtered_output = (
-        f"{pdb_id}_{chain_id}.cif"
-        if tmpdir is None
-        else f"{tmpdir}/{pdb_id}_{chain_id}.cif"
-    )
-    io.save(filtered_output)
-
-    # Parse the filtered structure to get the modified MMCIF with no metadata
-    structure = parser.get_structure(pdb_id, filtered_output)
-    mmcif_dict = parser._mmcif_dict
-
-    # Add the filtered metadata to the MMCIF dictionary
-    mmcif_dict.update(filtered_metadata)
-
-    # Save the modified MMCIF with wanted metadata to a string
-    string_io = StringIO()
-    io.set_dict(mmcif_dict)
-    io.save(string_io)
-
-    os.unlink(filtered_output)
-
-    return string_io.getvalue()
+    return structure
 
 
 # runs for each sequence in the input json
@@ -361,6 +417,24 @@ def check_input_json(
     return output_json
 
 
+def has_protein_msa(input_params: dict) -> bool:
+    """
+    Whether any protein of an input JSON comes with its MSA, in which case
+    Alphafold3 is given empty databases rather than searching them
+
+    Args:
+        input_params (dict): The input JSON
+
+    Returns:
+        bool: True if a protein has an unpaired MSA
+    """
+    return any(
+        seq.get("protein", {}).get("unpairedMsa")
+        or seq.get("protein", {}).get("unpairedMsaPath")
+        for seq in input_params["sequences"]
+    )
+
+
 def make_dummy_af3_db(output_dir):
     dummy_af3_db = output_dir.joinpath("af3_db")
     dummy_files = [
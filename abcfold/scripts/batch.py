@@ -0,0 +1,728 @@
+#!/usr/bin/env python
+
+import configparser
+import json
+import logging
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from abcfold.argparse_utils import (boltz_argparse_util, chai_argparse_util,
+                                    prediction_argparse_util)
+from abcfold.scripts.abc_script_utils import setup_logger
+
+logger = logging.getLogger("logger")
+
+MSA_DIR = "msa"
+LOG_DIR = "logs"
+AF3_DIR = "af3_groups"
+DONE_FILE = "abcfold_batch.done"
+REPORT_FILE = "batch_report.json"
+ERROR_LOGS = ("af3_error.log", "boltz_error.log", "chai_error.log")
+
+
+class MsaMethod(Enum):
+    """
+    Enum class for the programs making the MSAs of the CPU stage
+    """
+
+    MMSEQS2 = "mmseqs2"
+    JACKHMMER = "jackhmmer"
+
+    @classmethod
+    def values(cls):
+        return [e.value for e in cls]
+
+
+class BatchTarget:
+    def __init__(self, input_json: Union[str, Path], output_root: Union[str, Path]):
+        """
+        A target of a batch run, with the time spent on each of its stages
+
+        Args:
+            input_json (Union[str, Path]): Path to the input JSON of the target
+            output_root (Union[str, Path]): Output directory of the batch run
+
+        Attributes:
+            name (str): Name of the target, the stem of its input JSON
+            input_json (Path): Path to the input JSON
+            msa_json (Path): Path to the input JSON with the MSAs, written by the
+            CPU stage
+            output_dir (Path): Output directory of the ABCFold run of the target
+            log_file (Path): Log of the ABCFold run of the target
+            msa_seconds (float): Time spent making the MSAs, 0 if they were reused
+            inference_seconds (float): Time spent in the ABCFold run
+            status (str): "pending", "done", "msa_failed" or "failed"
+        """
+        output_root = Path(output_root)
+        self.input_json = Path(input_json)
+        self.name = self.input_json.stem
+        self.msa_json = output_root.joinpath(MSA_DIR, f"{self.name}.json")
+        self.output_dir = output_root.joinpath(self.name)
+        self.log_file = output_root.joinpath(LOG_DIR, f"{self.name}.log")
+        self.msa_seconds = 0.0
+        self.inference_seconds = 0.0
+        self.status = "pending"
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name}, {self.status})"
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether the target was predicted by an earlier run
+        """
+        return self.output_dir.joinpath(DONE_FILE).is_file()
+
+
+class BatchPipeline:
+    def __init__(
+        self,
+        input_jsons: List[Union[str, Path]],
+        output_root: Union[str, Path],
+        gpus: List[str],
+        msa_method: str = MsaMethod.MMSEQS2.value,
+        msa_workers: int = 4,
+        queue_size: int = 2,
+        abcfold_args: Optional[List[str]] = None,
+        model_params: Optional[str] = None,
+        database_dir: Optional[str] = None,
+        jackhmmer_cpus: int = 8,
+        templates: bool = False,
+        num_templates: int = 20,
+        boltz_workers: bool = False,
+        chai_workers: bool = False,
+        number_of_models: int = 5,
+        num_recycles: int = 10,
+        af3_group_size: int = 1,
+    ):
+        """
+        Run many targets in two overlapping stages. A pool of CPU workers makes
+        the MSAs of the targets and hands them to a bounded queue, one inference
+        worker per GPU takes them from the queue and runs ABCFold. While the GPUs
+        predict a target the MSAs of the next ones are made, and the CPU workers
+        wait whenever the queue is full so they never run far ahead of the GPUs.
+
+        Finished stages are kept on disk, so an interrupted batch carries on from
+        where it stopped: MSAs already written are reused and targets already
+        predicted are skipped.
+
+        Args:
+            input_jsons (List[Union[str, Path]]): Input JSONs of the targets
+            output_root (Union[str, Path]): Output directory of the batch
+            gpus (List[str]): Device of each inference worker, e.g. ["0", "1"]
+            msa_method (str): Program making the MSAs, see MsaMethod
+            msa_workers (int): Number of targets whose MSAs are made at once
+            queue_size (int): Number of targets with MSAs that may wait for a GPU
+            abcfold_args (Optional[List[str]]): Extra arguments of every ABCFold run
+            model_params (Optional[str]): AlphaFold3 model parameters directory
+            database_dir (Optional[str]): AlphaFold3 database directory, used to
+            make the MSAs with jackhmmer
+            jackhmmer_cpus (int): CPUs of each jackhmmer/nhmmer search
+            templates (bool): Add templates to the MMseqs2 MSAs
+            num_templates (int): Number of templates to add
+            boltz_workers (bool): Keep a Boltz-1 worker running on each GPU and
+            send it the Boltz-1 predictions, rather than loading Boltz-1 for every
+            target
+            chai_workers (bool): Keep a Chai-1 worker running on each GPU and send
+            it the Chai-1 predictions, rather than loading Chai-1 for every target
+            number_of_models (int): Number of models of each program
+            num_recycles (int): Number of recycles of each program
+            af3_group_size (int): Number of targets each GPU takes from the queue
+            at a time and runs Alphafold3 on in one container, before running
+            ABCFold on each of them with its Alphafold3 results. 1 runs
+            Alphafold3 within the ABCFold run of each target
+
+        Attributes:
+            targets (List[BatchTarget]): Targets of the batch
+            report (dict): Throughput of the batch, set once it has run
+        """
+        self.output_root = Path(output_root)
+        self.gpus = gpus
+        self.msa_method = msa_method
+        self.msa_workers = msa_workers
+        self.queue_size = queue_size
+        self.abcfold_args = [] if abcfold_args is None else abcfold_args
+        self.model_params = model_params
+        self.database_dir = database_dir
+        self.jackhmmer_cpus = jackhmmer_cpus
+        self.templates = templates
+        self.num_templates = num_templates
+        self.boltz_workers = boltz_workers
+        self.chai_workers = chai_workers
+        self.number_of_models = number_of_models
+        self.num_recycles = num_recycles
+        self.af3_group_size = af3_group_size
+
+        self.targets = [
+            BatchTarget(input_json, self.output_root) for input_json in input_jsons
+        ]
+        self.report: dict = {}
+        self.__lock = threading.Lock()
+        self.__busy_seconds: Dict[str, float] = {gpu: 0.0 for gpu in gpus}
+        self.__idle_seconds: Dict[str, float] = {gpu: 0.0 for gpu in gpus}
+        self.__worker_args: Dict[str, List[str]] = {gpu: [] for gpu in gpus}
+        self.__af3_results: Dict[str, Path] = {}
+
+    def run(self) -> dict:
+        """
+        Run the batch and write its throughput report
+
+        Returns:
+            dict: The throughput report
+        """
+        for directory in (MSA_DIR, LOG_DIR, AF3_DIR):
+            self.output_root.joinpath(directory).mkdir(parents=True, exist_ok=True)
+
+        pending = []
+        for target in self.targets:
+            if target.done:
+                target.status = "done"
+                logger.info(f"Already predicted: {target.name}, skipping")
+            else:
+                pending.append(target)
+        skipped = len(self.targets) - len(pending)
+
+        logger.info(
+            f"Running {len(pending)} targets, MSAs with {self.msa_method} on "
+            f"{self.msa_workers} CPU workers and inference on GPUs "
+            f"{', '.join(self.gpus)}"
+        )
+        targets_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        start = time.perf_counter()
+        workers = [
+            threading.Thread(
+                target=self.inference_worker, args=(gpu, targets_queue), daemon=True
+            )
+            for gpu in self.gpus
+        ]
+        for worker in workers:
+            worker.start()
+
+        with ThreadPoolExecutor(max_workers=self.msa_workers) as executor:
+            for target in pending:
+                executor.submit(self.msa_stage, target, targets_queue)
+
+        for _ in workers:
+            targets_queue.put(None)
+        for worker in workers:
+            worker.join()
+
+        self.report = self.throughput_report(
+            pending, skipped, time.perf_counter() - start
+        )
+        with open(self.output_root.joinpath(REPORT_FILE), "w") as f:
+            json.dump(self.report, f, indent=2)
+        return self.report
+
+    def msa_stage(self, target: BatchTarget, targets_queue: queue.Queue) -> None:
+        """
+        Make the MSAs of a target, unless an earlier run did, and queue it for
+        inference. Blocks while the queue is full
+        """
+        if target.msa_json.is_file():
+            logger.info(f"Reusing the MSAs of {target.name}")
+        else:
+            start = time.perf_counter()
+            try:
+                self.make_msa(target)
+            except Exception as e:
+                logger.error(f"Making the MSAs of {target.name} failed: {e}")
+                target.status = "msa_failed"
+                return
+            target.msa_seconds = time.perf_counter() - start
+            logger.info(f"MSAs of {target.name} made in {target.msa_seconds:.1f} s")
+        targets_queue.put(target)
+
+    def make_msa(self, target: BatchTarget) -> None:
+        """
+        Write the input JSON of a target with its MSAs to `target.msa_json`. The
+        file is only put in place once complete, so it is never read half written
+        """
+        msa_dir = target.msa_json.parent
+        with tempfile.TemporaryDirectory(
+            dir=msa_dir, ignore_cleanup_errors=True
+        ) as temp_dir:
+            if self.msa_method == MsaMethod.JACKHMMER.value:
+                from abcfold.alphafold3.run_alphafold3 import \
+                    run_alphafold3_data_pipeline
+
+                msa_json = run_alphafold3_data_pipeline(
+                    input_json=target.input_json,
+                    output_dir=Path(temp_dir),
+                    model_params=self.model_params,
+                    database_dir=self.database_dir,
+                    n_cpu=self.jackhmmer_cpus,
+                )
+                if msa_json is None:
+                    raise RuntimeError("no data JSON written")
+            else:
+                from abcfold.scripts.add_mmseqs_msa import add_msa_to_json
+
+                msa_json = Path(temp_dir).joinpath(target.msa_json.name)
+                add_msa_to_json(
+                    input_json=target.input_json,
+                    templates=self.templates,
+                    num_templates=self.num_templates,
+                    output_json=msa_json,
+                    to_file=True,
+                )
+            msa_json.replace(target.msa_json)
+
+    def inference_worker(self, gpu: str, targets_queue: queue.Queue) -> None:
+        """
+        Predict the queued targets on one device until the queue is closed
+        """
+        workers = []
+        if self.boltz_workers:
+            from abcfold.boltz1.run_boltz import BoltzWorker
+
+            workers.append(("--boltz_worker_socket", BoltzWorker))
+        if self.chai_workers:
+            from abcfold.chai1.run_chai1 import ChaiWorker
+
+            workers.append(("--chai_worker_socket", ChaiWorker))
+
+        started = []
+        for option, worker_class in workers:
+            try:
+                worker = worker_class(
+                    gpu,
+                    log_file=self.output_root.joinpath(
+                        LOG_DIR, f"{worker_class.program}_worker_{gpu}.log"
+                    ),
+                )
+                worker.start()
+            except Exception as e:
+                logger.error(
+                    f"Starting the {worker_class.program} worker on GPU {gpu} "
+                    f"failed, it is loaded for every target instead: {e}"
+                )
+                continue
+            started.append(worker)
+            self.__worker_args[gpu] += [option, str(worker.socket)]
+        try:
+            self.__predict_queued(gpu, targets_queue)
+        finally:
+            for worker in started:
+                worker.close()
+
+    def __predict_queued(self, gpu: str, targets_queue: queue.Queue) -> None:
+        # Every target taken from the queue is given a status, whatever fails, so
+        # the queue keeps draining and the MSA workers are never left waiting
+        closed = False
+        while not closed:
+            group = []
+            wait_start = time.perf_counter()
+            while len(group) < self.af3_group_size:
+                target = targets_queue.get()
+                if target is None:
+                    closed = True
+                    break
+                group.append(target)
+            waited = time.perf_counter() - wait_start
+            if not group:
+                return
+
+            try:
+                with self.__lock:
+                    self.__idle_seconds[gpu] += waited
+                self.predict_group(group, gpu)
+            except (Exception, SystemExit) as e:
+                logger.error(f"Predicting a group of targets on GPU {gpu} failed: {e}")
+                for target in group:
+                    if target.status != "done":
+                        target.status = "failed"
+
+    def predict_group(self, group: List[BatchTarget], gpu: str) -> None:
+        """
+        Predict the targets taken from the queue together, after running
+        Alphafold3 on all of them in one container if they are grouped
+        """
+        group_dir = None
+        try:
+            if self.af3_group_size > 1:
+                start = time.perf_counter()
+                group_dir = Path(
+                    tempfile.mkdtemp(
+                        prefix=f"gpu_{gpu}_", dir=self.output_root / AF3_DIR
+                    )
+                )
+                try:
+                    af3_results = self.alphafold3_group(group, gpu, group_dir)
+                except (Exception, SystemExit) as e:
+                    logger.error(f"Running Alphafold3 on a group failed: {e}")
+                    af3_results = {}
+                group_seconds = time.perf_counter() - start
+                with self.__lock:
+                    self.__busy_seconds[gpu] += group_seconds
+                    for name, af3_dir in af3_results.items():
+                        if af3_dir is not None:
+                            self.__af3_results[name] = af3_dir
+                for target in group:
+                    target.inference_seconds += group_seconds / len(group)
+
+            for target in group:
+                self.predict_target(target, gpu)
+        finally:
+            if group_dir is not None:
+                with self.__lock:
+                    for target in group:
+                        self.__af3_results.pop(target.name, None)
+                shutil.rmtree(group_dir, ignore_errors=True)
+
+    def predict_target(self, target: BatchTarget, gpu: str) -> None:
+        """
+        Run ABCFold on a target and record the outcome
+        """
+        start = time.perf_counter()
+        try:
+            success = self.predict(target, gpu)
+        except Exception as e:
+            logger.error(f"Running ABCFold on {target.name} failed: {e}")
+            success = False
+        seconds = time.perf_counter() - start
+        target.inference_seconds += seconds
+        with self.__lock:
+            self.__busy_seconds[gpu] += seconds
+
+        if success:
+            target.status = "done"
+            target.output_dir.joinpath(DONE_FILE).touch()
+            logger.info(
+                f"{target.name} predicted on GPU {gpu} in "
+                f"{target.inference_seconds:.1f} s"
+            )
+        else:
+            target.status = "failed"
+            logger.error(
+                f"Predicting {target.name} on GPU {gpu} failed, see "
+                f"{target.log_file}"
+            )
+
+    def alphafold3_group(
+        self, targets: List[BatchTarget], gpu: str, group_dir: Path
+    ) -> Dict[str, Optional[Path]]:
+        """
+        Run Alphafold3 on a group of targets in one container, from the same
+        input JSONs ABCFold would give it. The ABCFold run of each target moves
+        its Alphafold3 output out of `group_dir`
+
+        Returns:
+            Dict[str, Optional[Path]]: Alphafold3 output directory of each target,
+            None for the targets Alphafold3 failed on, which run it again within
+            their ABCFold run
+        """
+        from abcfold.alphafold3.run_alphafold3 import run_alphafold3_batch
+        from abcfold.scripts.abc_script_utils import (check_input_json,
+                                                      has_protein_msa,
+                                                      make_dummy_af3_db)
+
+        input_jsons = {}
+        all_msas = True
+        for target in targets:
+            input_params = check_input_json(target.msa_json, test=True)
+            all_msas = all_msas and has_protein_msa(input_params)
+            input_json = group_dir.joinpath("inputs", f"{target.name}.json")
+            input_json.parent.mkdir(exist_ok=True)
+            with open(input_json, "w") as f:
+                json.dump(input_params, f, indent=4)
+            input_jsons[input_json] = target
+
+        database_dir = make_dummy_af3_db(group_dir) if all_msas else self.database_dir
+        logger.info(
+            f"Running Alphafold3 on {len(targets)} targets in one container on "
+            f"GPU {gpu}"
+        )
+        job_dirs = run_alphafold3_batch(
+            list(input_jsons),
+            group_dir.joinpath("outputs"),
+            model_params=self.model_params,
+            database_dir=database_dir,
+            number_of_models=self.number_of_models,
+            num_recycles=self.num_recycles,
+            gpus=gpu,
+        )
+        for error_log in group_dir.rglob("af3_error.log"):
+            shutil.copy(
+                error_log,
+                self.output_root.joinpath(LOG_DIR, f"{group_dir.name}_af3_error.log"),
+            )
+        return {
+            target.name: job_dirs.get(input_json)
+            for input_json, target in input_jsons.items()
+        }
+
+    def abcfold_command(self, target: BatchTarget, gpu: str) -> List[str]:
+        """
+        The ABCFold call predicting a target from its input JSON with MSAs
+        """
+        cmd = [
+            sys.executable,
+            "-m",
+            "abcfold.abcfold",
+            str(target.msa_json),
+            str(target.output_dir),
+            "--gpus",
+            gpu,
+            "--override",
+            "--no_server",
+            "--number_of_models",
+            str(self.number_of_models),
+            "--num_recycles",
+            str(self.num_recycles),
+            *self.abcfold_args,
+        ]
+        if self.model_params is not None:
+            cmd += ["--model_params", str(self.model_params)]
+        cmd += self.__worker_args.get(gpu, [])
+        with self.__lock:
+            af3_results = self.__af3_results.get(target.name)
+        if af3_results is not None:
+            cmd += ["--af3_results", str(af3_results)]
+        return cmd
+
+    def predict(self, target: BatchTarget, gpu: str) -> bool:
+        """
+        Run ABCFold on the input JSON with MSAs of a target
+
+        Returns:
+            bool: True if every program ran without error
+        """
+        with open(target.log_file, "w") as log:
+            returncode = subprocess.call(
+                self.abcfold_command(target, gpu),
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+        if returncode != 0 or not target.output_dir.is_dir():
+            return False
+        return not any(
+            error_log.name in ERROR_LOGS for error_log in target.output_dir.rglob("*")
+        )
+
+    def throughput_report(
+        self, targets: List[BatchTarget], skipped: int, wall_seconds: float
+    ) -> dict:
+        """
+        Summarize the throughput of the targets run by this batch
+
+        Args:
+            targets (List[BatchTarget]): Targets run by this batch
+            skipped (int): Number of targets predicted by earlier runs
+            wall_seconds (float): Wall time of the batch
+
+        Returns:
+            dict: The throughput report
+        """
+        completed = [target for target in targets if target.status == "done"]
+        msa_seconds = sum(target.msa_seconds for target in targets)
+        inference_seconds = sum(target.inference_seconds for target in targets)
+        report = {
+            "targets": len(targets) + skipped,
+            "skipped": skipped,
+            "completed": len(completed),
+            "msa_failed": [t.name for t in targets if t.status == "msa_failed"],
+            "failed": [t.name for t in targets if t.status == "failed"],
+            "wall_seconds": round(wall_seconds, 2),
+            "msa_seconds": round(msa_seconds, 2),
+            "inference_seconds": round(inference_seconds, 2),
+            "targets_per_hour": (
+                round(len(completed) * 3600 / wall_seconds, 2) if wall_seconds else 0.0
+            ),
+            "gpu_busy_fraction": {
+                gpu: round(busy / wall_seconds, 3) if wall_seconds else 0.0
+                for gpu, busy in self.__busy_seconds.items()
+            },
+            "gpu_wait_seconds": {
+                gpu: round(idle, 2) for gpu, idle in self.__idle_seconds.items()
+            },
+            "per_target": {
+                target.name: {
+                    "status": target.status,
+                    "msa_seconds": round(target.msa_seconds, 2),
+                    "inference_seconds": round(target.inference_seconds, 2),
+                }
+                for target in targets
+            },
+        }
+
+        logger.info(
+            f"{report['completed']} of {len(targets)} targets predicted in "
+            f"{report['wall_seconds']} s ({report['targets_per_hour']} per hour), "
+            f"{skipped} skipped, {len(report['msa_failed'])} MSA failures, "
+            f"{len(report['failed'])} inference failures"
+        )
+        logger.info(
+            f"MSA time {report['msa_seconds']} s, inference time "
+            f"{report['inference_seconds']} s"
+        )
+        for gpu, busy in report["gpu_busy_fraction"].items():
+            logger.info(
+                f"GPU {gpu} busy {busy:.0%} of the time, waited "
+                f"{report['gpu_wait_seconds'][gpu]} s for MSAs"
+            )
+        return report
+
+
+def main():
+    import argparse
+
+    setup_logger()
+    parser = argparse.ArgumentParser(
+        description="Run ABCFold on a directory of input JSONs, making the MSAs of \
+the next targets on the CPU while the GPUs predict"
+    )
+    parser.add_argument("input_dir", help="Directory of input JSON files")
+    parser.add_argument("output_dir", help="Output directory")
+    parser.add_argument(
+        "--gpus",
+        default="0",
+        help="Devices of the inference workers, one worker each, e.g. '0,1,3' or "
+        "'cpu'",
+    )
+    parser.add_argument(
+        "--msa",
+        choices=MsaMethod.values(),
+        default=MsaMethod.MMSEQS2.value,
+        help="Program making the MSAs",
+    )
+    parser.add_argument(
+        "--msa_workers",
+        type=int,
+        default=4,
+        help="Number of targets whose MSAs are made at the same time",
+    )
+    parser.add_argument(
+        "--queue_size",
+        type=int,
+        default=2,
+        help="Number of targets with MSAs that may wait for a GPU, the MSA workers "
+        "pause while it is reached",
+    )
+    parser.add_argument(
+        "--jackhmmer_cpus",
+        type=int,
+        default=8,
+        help="CPUs of each jackhmmer/nhmmer search",
+    )
+    parser.add_argument(
+        "--templates", action="store_true", help="Add templates to the MMseqs2 MSAs"
+    )
+    parser.add_argument(
+        "--num_templates",
+        type=int,
+        default=20,
+        help="Number of templates to add to the MMseqs2 MSAs",
+    )
+    parser.add_argument(
+        "--database",
+        help="The Database directory for the generation of the MSA with jackhmmer.",
+        dest="database_dir",
+        default=None,
+    )
+    parser.add_argument(
+        "--model_params",
+        help="The directory containing the model parameters",
+        default=None,
+    )
+    parser.add_argument(
+        "-a", "--alphafold3", action="store_true", help="Run Alphafold3"
+    )
+    parser = boltz_argparse_util(parser)
+    parser = chai_argparse_util(parser)
+    parser = prediction_argparse_util(parser)
+    parser.add_argument(
+        "--af3_group_size",
+        type=int,
+        default=1,
+        help="Number of targets each GPU runs Alphafold3 on in one container, so "
+        "the container start and model compilation are paid once for all of them",
+    )
+    parser.add_argument(
+        "--boltz_workers",
+        action="store_true",
+        help="Keep a Boltz-1 worker running on each GPU, so Boltz-1 is loaded once "
+        "rather than for every target",
+    )
+    parser.add_argument(
+        "--chai_workers",
+        action="store_true",
+        help="Keep a Chai-1 worker running on each GPU, so Chai-1 is loaded once "
+        "rather than for every target",
+    )
+    parser.add_argument(
+        "--visuals",
+        action="store_true",
+        help="Generate the output page of every target",
+    )
+
+    config_file = Path(__file__).parents[1].joinpath("data", "config.ini")
+    if config_file.exists():
+        config = configparser.ConfigParser()
+        config.read(str(config_file))
+        parser.set_defaults(**dict(config.items("Databases")))
+    args = parser.parse_args()
+
+    for option in ("msa_workers", "queue_size", "jackhmmer_cpus", "af3_group_size"):
+        if getattr(args, option) < 1:
+            logger.error(f"--{option} must be greater than 0")
+            sys.exit(1)
+    if args.msa == MsaMethod.JACKHMMER.value and not args.database_dir:
+        logger.error("A database directory is needed to make the MSAs with jackhmmer")
+        sys.exit(1)
+
+    input_jsons = sorted(Path(args.input_dir).glob("*.json"))
+    if not input_jsons:
+        logger.error(f"No JSON files in {args.input_dir}")
+        sys.exit(1)
+
+    abcfold_args = [
+        flag
+        for flag, selected in (
+            ("--alphafold3", args.alphafold3),
+            ("--boltz1", args.boltz1),
+            ("--chai1", args.chai1),
+            ("--save_input", args.save_input),
+            ("--no_visuals", not args.visuals),
+        )
+        if selected
+    ]
+    for option, socket in (
+        ("--boltz_worker_socket", args.boltz_worker_socket),
+        ("--chai_worker_socket", args.chai_worker_socket),
+    ):
+        if socket is not None:
+            abcfold_args += [option, socket]
+
+    BatchPipeline(
+        input_jsons,
+        args.output_dir,
+        gpus=[gpu.strip() for gpu in args.gpus.split(",") if gpu.strip()],
+        msa_method=args.msa,
+        msa_workers=args.msa_workers,
+        queue_size=args.queue_size,
+        abcfold_args=abcfold_args,
+        model_params=args.model_params,
+        database_dir=args.database_dir,
+        jackhmmer_cpus=args.jackhmmer_cpus,
+        templates=args.templates,
+        num_templates=args.num_templates,
+        boltz_workers=args.boltz_workers and args.boltz1,
+        chai_workers=args.chai_workers and args.chai1,
+        number_of_models=args.number_of_models,
+        num_recycles=args.num_recycles,
+        af3_group_size=args.af3_group_size if args.alphafold3 else 1,
+    ).run()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
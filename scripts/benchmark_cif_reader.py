@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Parse-throughput benchmark of the streaming _atom_site reader against Biopython's
+MMCIFParser.
+
+    python scripts/benchmark_cif_reader.py                 # all CIFs in tests/test_data
+    python scripts/benchmark_cif_reader.py big.cif -n 3
+"""
+import argparse
+import time
+from pathlib import Path
+
+from Bio.PDB import MMCIFParser
+
+from abcfold.output.atom_table import AtomTable
+from abcfold.output.mmcif_reader import read_mmcif
+
+TEST_DATA = Path(__file__).resolve().parents[1].joinpath("tests", "test_data")
+
+
+def biopython(cif_file: Path) -> AtomTable:
+    parser = MMCIFParser(QUIET=True)
+    return AtomTable.from_structure(parser.get_structure(cif_file.stem, cif_file))
+
+
+def streaming(cif_file: Path) -> AtomTable:
+    atom_table = AtomTable.from_atom_site(read_mmcif(cif_file).atom_site)
+    return biopython(cif_file) if atom_table is None else atom_table
+
+
+def best_time(func, cif_file: Path, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(cif_file)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "cif_files",
+        nargs="*",
+        type=Path,
+        help="CIF files to parse, defaults to every CIF in tests/test_data",
+    )
+    parser.add_argument(
+        "-n", "--repeats", type=int, default=5, help="Best of n runs per file"
+    )
+    args = parser.parse_args()
+
+    cif_files = args.cif_files or sorted(TEST_DATA.rglob("*.cif"))
+    header = f"{'file':<48}{'atoms':>8}{'biopython':>12}{'streaming':>12}{'speedup':>9}"
+    print(header)
+    print("-" * len(header))
+
+    total_atoms, total_bio, total_stream = 0, 0.0, 0.0
+    for cif_file in cif_files:
+        n_atoms = len(streaming(cif_file))
+        bio = best_time(biopython, cif_file, args.repeats)
+        stream = best_time(streaming, cif_file, args.repeats)
+        total_atoms += n_atoms
+        total_bio += bio
+        total_stream += stream
+        name = str(cif_file)[-47:]
+        print(
+            f"{name:<48}{n_atoms:>8}{bio * 1e3:>10.1f}ms{stream * 1e3:>10.1f}ms"
+            f"{bio / stream:>8.1f}x"
+        )
+
+    print("-" * len(header))
+    print(
+        f"{'throughput (atoms/s)':<56}{total_atoms / total_bio:>12.0f}"
+        f"{total_atoms / total_stream:>12.0f}{total_bio / total_stream:>8.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ from pathlib import Path
 
 import pytest
 
-from abcfold.abcfold import run
+from abcfold.abcfold import run, run_engines
 
 
 @pytest.mark.skipif(
@@ -65,3 +65,52 @@ database_dir = None
 
         assert "chai1" in out_dirs
         assert "boltz-1_inputAB_mmseqs" in out_dirs
+
+
+def test_run_engines():
+    class Output:
+        input_json = Path("alphafold3_data.json")
+
+    started = []
+
+    def boltz_task(engine_json):
+        started.append(("boltz1", engine_json))
+        return None
+
+    def chai_task(engine_json):
+        started.append(("chai1", engine_json))
+        return "chai1"
+
+    args = argparse.Namespace(
+        alphafold3=True,
+        boltz1=True,
+        chai1=True,
+        concurrent_engines=False,
+        reuse_af3_json=False,
+        engine_gpus={"alphafold3": "0", "boltz1": "1", "chai1": "2"},
+    )
+    outputs = run_engines(args, Path("input.json"), Output, boltz_task, chai_task)
+    assert list(outputs) == ["alphafold3", "boltz1", "chai1"]
+    assert outputs["boltz1"] is None and outputs["chai1"] == "chai1"
+    assert started == [
+        ("boltz1", Output.input_json),
+        ("chai1", Output.input_json),
+    ]
+
+    # At the same time, the AlphaFold3 data JSON is only waited for if asked
+    args.concurrent_engines = True
+    started.clear()
+    outputs = run_engines(args, Path("input.json"), Output, boltz_task, chai_task)
+    assert list(outputs) == ["alphafold3", "boltz1", "chai1"]
+    assert sorted(started) == [
+        ("boltz1", Path("input.json")),
+        ("chai1", Path("input.json")),
+    ]
+
+    args.reuse_af3_json = True
+    started.clear()
+    run_engines(args, Path("input.json"), Output, boltz_task, chai_task)
+    assert sorted(started) == [
+        ("boltz1", Output.input_json),
+        ("chai1", Output.input_json),
+    ]
@@ -1,8 +1,12 @@
 import argparse
 
+import pytest
+
 from abcfold.argparse_utils import (alphafold_argparse_util,
+                                    concurrent_engines,
                                     custom_template_argpase_util,
-                                    main_argpase_util, mmseqs2_argparse_util)
+                                    main_argpase_util, mmseqs2_argparse_util,
+                                    parse_gpus, raise_argument_errors)
 
 
 def test_mmseqs2_argparse_util():
@@ -77,3 +81,71 @@ def test_af3_argparse_main(test_data):
     assert args.database_dir == "path/to/database"
     assert args.model_params == "path/to/model_params"
     assert args.mmseqs2
+
+
+def test_parse_gpus():
+    assert parse_gpus("0,1") == {"alphafold3": "0,1", "boltz1": "0,1", "chai1": "0,1"}
+    assert parse_gpus("af3=0,boltz=1,chai=2") == {
+        "alphafold3": "0",
+        "boltz1": "1",
+        "chai1": "2",
+    }
+    assert parse_gpus("alphafold3=0,1, chai-1=cpu") == {
+        "alphafold3": "0,1",
+        "boltz1": "all",
+        "chai1": "cpu",
+    }
+
+    for gpus in ("openfold=0", "0,af3=1", "af3=", "af3=0,af3=1"):
+        with pytest.raises(ValueError):
+            parse_gpus(gpus)
+
+
+def test_concurrent_engines():
+    engines = ["alphafold3", "boltz1", "chai1"]
+    assert concurrent_engines("af3=0,boltz=1,chai=2,3", engines)
+    assert concurrent_engines("af3=0,boltz=cpu,chai=cpu", engines)
+    assert concurrent_engines("af3=0,boltz=1", ["alphafold3", "boltz1"])
+    assert not concurrent_engines("0,1", engines)
+    # Programs without devices would use every GPU
+    assert not concurrent_engines("af3=0", engines)
+    assert not concurrent_engines("af3=0,boltz=1", engines)
+    # Programs sharing a GPU would run out of memory
+    assert not concurrent_engines("af3=0,boltz=0,chai=1", engines)
+    assert not concurrent_engines("af3=0,1,boltz=1,chai=2", engines)
+    assert not concurrent_engines("af3=all,boltz=1,chai=2", engines)
+
+
+def test_raise_argument_errors_gpus():
+    def parse(gpus):
+        args = argparse.Namespace(
+            alphafold3=False,
+            boltz1=True,
+            chai1=True,
+            model_params=None,
+            mmseqs2=False,
+            templates=False,
+            custom_template=None,
+            custom_template_chain=None,
+            use_af3_template_search=False,
+            num_templates=20,
+            num_recycles=10,
+            number_of_models=5,
+            post_workers=1,
+            gpus=gpus,
+        )
+        return raise_argument_errors(args)
+
+    args = parse("boltz=0,chai=1")
+    assert args.concurrent_engines
+    assert args.engine_gpus["chai1"] == "1"
+
+    args = parse("boltz=0")
+    assert not args.concurrent_engines
+    assert args.engine_gpus == {"alphafold3": "all", "boltz1": "0", "chai1": "all"}
+
+    args = parse("boltz=0,chai=0")
+    assert not args.concurrent_engines
+
+    with pytest.raises(SystemExit):
+        parse("boltz=0,openfold=1")
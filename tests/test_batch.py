@@ -0,0 +1,236 @@
+import json
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from abcfold.alphafold3.run_alphafold3 import (af3_job_dir_name,
+                                               run_alphafold3_batch)
+from abcfold.scripts.batch import (AF3_DIR, DONE_FILE, REPORT_FILE,
+                                   BatchPipeline)
+
+
+class QuickPipeline(BatchPipeline):
+    """
+    Batch whose MSA and inference stages only write placeholder files
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.made_msas = []
+        self.predicted = []
+        self.max_queued = 0
+        self.lock = threading.Lock()
+
+    def make_msa(self, target):
+        if target.name == "bad_msa":
+            raise RuntimeError("MMseqs2 failed")
+        time.sleep(0.01)
+        with self.lock:
+            self.made_msas.append(target.name)
+        target.msa_json.write_text(target.input_json.read_text())
+
+    def msa_stage(self, target, targets_queue):
+        super().msa_stage(target, targets_queue)
+        with self.lock:
+            self.max_queued = max(self.max_queued, targets_queue.qsize())
+
+    def predict(self, target, gpu):
+        time.sleep(0.02)
+        with self.lock:
+            self.predicted.append((target.name, gpu))
+        target.output_dir.mkdir(parents=True, exist_ok=True)
+        return target.name != "bad_fold"
+
+
+def test_batch_pipeline(tmp_path):
+    input_dir = tmp_path.joinpath("inputs")
+    input_dir.mkdir()
+    names = [f"target_{i}" for i in range(6)] + ["bad_msa", "bad_fold"]
+    for name in names:
+        input_dir.joinpath(f"{name}.json").write_text(json.dumps({"name": name}))
+    input_jsons = sorted(input_dir.glob("*.json"))
+    output_dir = tmp_path.joinpath("outputs")
+
+    pipeline = QuickPipeline(
+        input_jsons, output_dir, gpus=["0", "1"], msa_workers=3, queue_size=1
+    )
+    report = pipeline.run()
+
+    assert sorted(pipeline.made_msas) == sorted(set(names) - {"bad_msa"})
+    assert sorted(name for name, _ in pipeline.predicted) == sorted(
+        set(names) - {"bad_msa"}
+    )
+    assert {gpu for _, gpu in pipeline.predicted} == {"0", "1"}
+    # The MSA workers wait for the GPUs rather than filling an unbounded queue
+    assert pipeline.max_queued <= 1
+
+    assert report["completed"] == 6
+    assert report["msa_failed"] == ["bad_msa"]
+    assert report["failed"] == ["bad_fold"]
+    assert set(report["gpu_busy_fraction"]) == {"0", "1"}
+    with open(output_dir.joinpath(REPORT_FILE)) as f:
+        assert json.load(f)["completed"] == 6
+    assert output_dir.joinpath("target_0", DONE_FILE).is_file()
+    assert not output_dir.joinpath("bad_fold", DONE_FILE).exists()
+
+    # A second run only retries the failed targets and reuses their MSAs
+    pipeline = QuickPipeline(input_jsons, output_dir, gpus=["0"])
+    report = pipeline.run()
+    assert pipeline.made_msas == []
+    assert [name for name, _ in pipeline.predicted] == ["bad_fold"]
+    assert report["skipped"] == 6
+    assert report["msa_failed"] == ["bad_msa"]
+
+
+class GroupPipeline(QuickPipeline):
+    """
+    Batch whose Alphafold3 groups only make placeholder output directories
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.groups = []
+        self.commands = {}
+
+    def alphafold3_group(self, targets, gpu, group_dir):
+        with self.lock:
+            self.groups.append([target.name for target in targets])
+        results = {}
+        for target in targets:
+            job_dir = group_dir.joinpath(target.name)
+            job_dir.mkdir()
+            results[target.name] = None if target.name == "bad_fold" else job_dir
+        return results
+
+    def predict(self, target, gpu):
+        cmd = self.abcfold_command(target, gpu)
+        with self.lock:
+            self.commands[target.name] = cmd
+        return super().predict(target, gpu)
+
+
+def test_batch_af3_groups(tmp_path):
+    input_dir = tmp_path.joinpath("inputs")
+    input_dir.mkdir()
+    names = [f"target_{i}" for i in range(7)] + ["bad_fold"]
+    for name in names:
+        input_dir.joinpath(f"{name}.json").write_text(json.dumps({"name": name}))
+    output_dir = tmp_path.joinpath("outputs")
+
+    pipeline = GroupPipeline(
+        sorted(input_dir.glob("*.json")),
+        output_dir,
+        gpus=["0", "1"],
+        queue_size=4,
+        number_of_models=2,
+        af3_group_size=3,
+    )
+    report = pipeline.run()
+
+    assert sorted(name for group in pipeline.groups for name in group) == sorted(
+        names
+    )
+    assert all(len(group) <= 3 for group in pipeline.groups)
+    assert len(pipeline.groups) >= 3
+    for name, cmd in pipeline.commands.items():
+        assert cmd[cmd.index("--number_of_models") + 1] == "2"
+        if name == "bad_fold":
+            # Runs Alphafold3 again within its own ABCFold run
+            assert "--af3_results" not in cmd
+        else:
+            assert Path(cmd[cmd.index("--af3_results") + 1]).name == name
+    assert report["completed"] == 7
+    assert list(output_dir.joinpath(AF3_DIR).iterdir()) == []
+
+
+def test_run_alphafold3_batch(tmp_path, monkeypatch):
+    input_jsons = []
+    for i, name in enumerate(["Target A", "target_b", "target_a", "broken"]):
+        input_json = tmp_path.joinpath(f"input_{i}.json")
+        input_json.write_text(json.dumps({"name": name}))
+        input_jsons.append(input_json)
+    calls = []
+
+    def fake_run(cmd, **_):
+        volumes = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "--volume"]
+        af_input, af_output = (Path(volume.split(":")[0]) for volume in volumes[:2])
+        assert cmd[cmd.index("--input_dir") + 1] == "/root/af_input"
+        jobs = sorted(path.name for path in af_input.glob("*.json"))
+        calls.append(jobs)
+        for input_json in sorted(af_input.glob("*.json")):
+            name = af3_job_dir_name(json.loads(input_json.read_text())["name"])
+            if name == "broken":
+                raise subprocess.CalledProcessError(1, cmd, stderr="broken input")
+            af_output.joinpath(name).mkdir()
+            af_output.joinpath(name, f"{name}_model.cif").touch()
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    job_dirs = run_alphafold3_batch(
+        input_jsons, tmp_path.joinpath("af3"), "params", "databases", gpus="1"
+    )
+
+    # "Target A" and "target_a" share an output directory, so run apart
+    assert calls == [
+        ["input_0.json", "input_1.json", "input_3.json"],
+        ["input_2.json"],
+    ]
+    assert job_dirs[input_jsons[0]].name == "target_a"
+    assert job_dirs[input_jsons[1]].name == "target_b"
+    assert job_dirs[input_jsons[2]].name == "target_a"
+    assert job_dirs[input_jsons[0]] != job_dirs[input_jsons[2]]
+    assert job_dirs[input_jsons[3]] is None
+
+
+class BrokenPipeline(QuickPipeline):
+    """
+    Batch whose GPU stage fails outside of the ABCFold runs
+    """
+
+    def predict_target(self, target, gpu):
+        if target.name == "broken":
+            raise RuntimeError("disk full")
+        super().predict_target(target, gpu)
+
+
+def test_batch_gpu_failures(tmp_path, monkeypatch):
+    input_dir = tmp_path.joinpath("inputs")
+    input_dir.mkdir()
+    names = ["broken"] + [f"target_{i}" for i in range(5)]
+    for name in names:
+        input_dir.joinpath(f"{name}.json").write_text(json.dumps({"name": name}))
+    input_jsons = sorted(input_dir.glob("*.json"))
+
+    def run(pipeline):
+        # A GPU thread that died would leave the MSA workers waiting forever
+        result = {}
+        thread = threading.Thread(
+            target=lambda: result.update(report=pipeline.run()), daemon=True
+        )
+        thread.start()
+        thread.join(timeout=30)
+        assert not thread.is_alive()
+        return result["report"]
+
+    report = run(
+        BrokenPipeline(input_jsons, tmp_path.joinpath("one"), gpus=["0"], queue_size=1)
+    )
+    assert report["failed"] == ["broken"]
+    assert report["completed"] == 5
+
+    def no_space(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(tempfile, "mkdtemp", no_space)
+    report = run(
+        GroupPipeline(
+            input_jsons,
+            tmp_path.joinpath("groups"),
+            gpus=["0"],
+            queue_size=1,
+            af3_group_size=2,
+        )
+    )
+    assert sorted(report["failed"]) == sorted(names)
+    assert report["completed"] == 0
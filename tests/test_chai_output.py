@@ -2,6 +2,7 @@ import tempfile
 from pathlib import Path
 
 from abcfold.output.file_handlers import CifFile, NpyFile, NpzFile
+from abcfold.output.pae_scores import contact_probs
 from abcfold.output.utils import Af3Pae
 
 
@@ -40,9 +41,8 @@ def test_chai_pae_to_af3_pae(output_objs):
         # If it isn't breaking the output page generation, then it's fine
         assert len(pae.scores["pae"]) == len(comparison_af3_output["pae"])
 
-        assert len(pae.scores["contact_probs"]) == len(
-            comparison_af3_output["contact_probs"]
-        )
+        # no contact probabilities are predicted, so none are stored
+        assert contact_probs(pae.scores) is None
         assert len(pae.scores["token_chain_ids"]) == len(
             comparison_af3_output["token_chain_ids"]
         )
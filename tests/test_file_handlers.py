@@ -1,9 +1,15 @@
+import json
+import pickle
+import shutil
 from pathlib import Path
 
+import numpy as np
 import pytest
 
 from abcfold.html.html_utils import get_plddt_regions
 from abcfold.output import file_handlers
+from abcfold.output.plddt_summary import PlddtSummary
+from abcfold.output.utils import Af3Pae
 
 
 def test_npz_file(test_data):
@@ -15,6 +21,20 @@ def test_npz_file(test_data):
     assert isinstance(npz_file.data, dict)
     assert "pae" in npz_file.data.keys()
 
+    # arrays are only decompressed when they are accessed, then kept
+    data = file_handlers.NpzFile(test_npz).data
+    assert dict.__len__(data) == 0 and len(data) == 1
+    assert data["pae"] is data["pae"]
+    assert dict.__len__(data) == 1
+    assert data.get("plddt") is None
+    with pytest.raises(KeyError):
+        data["plddt"]
+
+    # only the path is pickled
+    unpickled = pickle.loads(pickle.dumps(file_handlers.NpzFile(test_npz).data))
+    assert dict.__len__(unpickled) == 0
+    assert np.array_equal(unpickled["pae"], data["pae"])
+
 
 def test_npy_file(test_data):
     test_npy = Path(test_data.test_chai1_6BJ9_).joinpath("pae_scores.npy")
@@ -79,3 +99,188 @@ def test_confidence_json_file(test_data):
     assert "atom_plddts" in confidence_file.data
     assert "contact_probs" in confidence_file.data
     assert "pae" in confidence_file.data
+
+
+def test_cif_file_atom_table(test_data):
+    test_cif = Path(test_data.test_boltz_1_6BJ9_).joinpath(
+        "predictions/test_mmseqs/test_mmseqs_model_0.cif"
+    )
+    cif_file = file_handlers.CifFile(test_cif)
+    atom_table = cif_file.atom_table
+    atoms = cif_file.get_atoms()
+
+    assert len(atom_table) == len(atoms)
+    assert atom_table.chain_ids == [chain.id for chain in cif_file.get_chains()]
+    assert cif_file.plddts == [atom.bfactor for atom in atoms]
+    assert atom_table.coords.shape == (len(atoms), 3)
+    assert sum(cif_file.chain_lengths(mode="all").values()) == len(atoms)
+    assert len(cif_file.get_atoms(chain_id="A")) == int(
+        atom_table.chain_atom_counts()[atom_table.chain_ids.index("A")]
+    )
+
+
+def test_cif_file_handle(test_data):
+    test_cif = Path(test_data.test_boltz_1_6BJ9_).joinpath(
+        "predictions/test_mmseqs/test_mmseqs_model_0.cif"
+    )
+    cif_file = file_handlers.CifFile(test_cif)
+    assert not cif_file.loaded
+
+    chain_ids = cif_file.chain_ids
+    assert cif_file.loaded
+
+    cif_file.release()
+    assert not cif_file.loaded
+    assert cif_file.chain_ids == chain_ids
+
+
+def test_plddt_summary():
+    plddts = [10.0, 20.0, None, 55.0, 75.0, 95.0, 96.0, 89.9]
+    summary = PlddtSummary(plddts)
+
+    assert summary.band_counts == {"v_low": 2, "low": 1, "confident": 2, "v_high": 2}
+    assert summary.regions == get_plddt_regions(plddts)
+    assert summary.regions["v_low"] == [(0, 1)]
+    assert summary.regions["confident"] == [(4, 4), (7, 7)]
+    assert summary.h_score == 57
+    assert summary.average_plddt == pytest.approx(62.99, rel=1e-3)
+
+
+def test_cif_file_to_file(test_data, tmp_path):
+    test_cif = Path(test_data.test_alphafold3_6BJ9_).joinpath(
+        "seed-1_sample-0/model.cif"
+    )
+    input_params = {"sequences": [{"ligand": {"id": ["C", "D"]}}]}
+    cif_file = file_handlers.CifFile(test_cif, input_params)
+    output_cif = tmp_path / "model.cif"
+    cif_file.to_file(output_cif)
+
+    lines = output_cif.read_text().splitlines()
+    assert lines[:3] == ["data_model", "#", "loop_"]
+    assert lines[-1] == "#"
+    assert all(line == line.rstrip() for line in lines)
+    assert all(
+        line.startswith("HETATM")
+        for line in lines
+        if line.split()[-2:] in (["C", "1"], ["D", "1"])
+    )
+
+    written = file_handlers.CifFile(output_cif, input_params)
+    assert written.chain_ids == cif_file.chain_ids
+    assert written.plddts == cif_file.plddts
+    assert (written.atom_table.coords == cif_file.atom_table.coords).all()
+    assert (written.atom_table.atom_name == cif_file.atom_table.atom_name).all()
+
+
+def test_cif_file_relabel_reorder(test_data, tmp_path):
+    test_cif = tmp_path / "model.cif"
+    shutil.copy(
+        Path(test_data.test_alphafold3_6BJ9_).joinpath("seed-1_sample-0/model.cif"),
+        test_cif,
+    )
+    original = test_cif.read_text()
+    cif_file = file_handlers.CifFile(test_cif)
+    chain_lengths = cif_file.chain_lengths(mode="all")
+
+    cif_file.relabel_chains(["W", "X", "Y", "Z"])
+    assert cif_file.chain_ids == ["W", "X", "Y", "Z"]
+    assert [chain.id for chain in cif_file.get_chains()] == ["W", "X", "Y", "Z"]
+
+    cif_file.reorder_chains(["Y", "W", "Z", "X"])
+    assert cif_file.chain_ids == ["Y", "W", "Z", "X"]
+    assert cif_file.chain_lengths(mode="all") == {
+        new: chain_lengths[old] for new, old in zip("YWZX", "CADB")
+    }
+    # the file is only written when the model is flushed
+    assert test_cif.read_text() == original
+
+    cif_file.update()
+    written = file_handlers.CifFile(test_cif)
+    assert written.chain_ids == ["Y", "W", "Z", "X"]
+    assert written.plddts == cif_file.plddts
+    assert (written.atom_table.coords == cif_file.atom_table.coords).all()
+
+
+def test_chain_sequence_types():
+    input_params = {
+        "sequences": [
+            {"protein": {"id": ["A", "B"], "sequence": "MK"}},
+            {"rna": {"id": "C", "sequence": "AU"}},
+            {"ligand": {"id": ["D"], "ccdCodes": ["ATP"]}},
+            {"ligand": {"ccdCodes": ["ATP"]}},
+        ]
+    }
+    assert file_handlers.chain_sequence_types(input_params) == {
+        "A": {"protein"},
+        "B": {"protein"},
+        "C": {"rna"},
+        "D": {"ligand"},
+    }
+    assert file_handlers.chain_sequence_types({}) is None
+
+
+def test_cif_file_view_cache(test_data):
+    test_cif = Path(test_data.test_alphafold3_6BJ9_).joinpath(
+        "seed-1_sample-0/model.cif"
+    )
+    cif_file = file_handlers.CifFile(test_cif)
+    chain_lengths = cif_file.chain_lengths(mode="all")
+    assert cif_file.chain_lengths(mode="all") is chain_lengths
+    assert (cif_file.view_cache.hits, cif_file.view_cache.misses) == (1, 1)
+
+    cif_file.get_plddt_per_residue()
+    assert cif_file.view_cache.misses == 3
+
+    cif_file.relabel_chains(["W", "X", "Y", "Z"])
+    assert len(cif_file.view_cache) == 0
+    assert list(cif_file.chain_lengths(mode="all")) == ["W", "X", "Y", "Z"]
+
+    cif_file.plddts = [50.0] * len(cif_file.atom_table)
+    assert cif_file.average_plddt == 50.0
+    assert set(cif_file.get_plddt_per_atom()["W"]) == {50.0}
+
+
+def test_cif_file_check_clashes(test_data):
+    test_cif = Path(test_data.test_boltz_1_6BJ9_).joinpath(
+        "predictions/test_mmseqs/test_mmseqs_model_1.cif"
+    )
+    cif_file = file_handlers.CifFile(test_cif)
+    clashes_atoms, clashes_residues = cif_file.check_clashes()
+
+    assert (cif_file.clashes, cif_file.clashes_residues) == (3, 3)
+    assert [
+        (atom1.get_parent().id[1], atom2.get_parent().id[1])
+        for atom1, atom2 in clashes_atoms
+    ] == [(281, 2), (2, 281), (93, 70)]
+    assert all(
+        residue1.get_parent().id != residue2.get_parent().id
+        for residue1, residue2 in clashes_residues
+    )
+
+    misses = cif_file.view_cache.misses
+    assert cif_file.check_clashes()[0] is clashes_atoms
+    atom_pairs, residue_pairs = cif_file.find_clashes()
+    assert cif_file.view_cache.misses == misses
+    assert atom_pairs.shape == (3, 2) and residue_pairs.shape == (3, 2)
+
+
+def test_pae_file(test_data, tmp_path):
+    boltz_dir = Path(test_data.test_boltz_1_6BJ9_).joinpath("predictions/test_mmseqs")
+    cif_file = file_handlers.CifFile(boltz_dir / "test_mmseqs_model_1.cif")
+    scores = file_handlers.NpzFile(boltz_dir / "pae_test_mmseqs_model_1.npz").data
+    pae = Af3Pae.from_boltz1(scores, cif_file)
+
+    pae.to_file(tmp_path / "pae.npz")
+    pae_file = file_handlers.PaeFile(tmp_path / "pae.npz")
+    assert pae_file.data["pae"].dtype == np.float32
+    assert np.array_equal(pae_file.data["pae"], scores["pae"].astype(np.float32))
+    assert pae_file.data["token_chain_ids"].tolist() == pae.scores["token_chain_ids"]
+
+    pae_file.to_json(tmp_path / "pae.json")
+    with open(tmp_path / "pae.json") as f:
+        pae_json = json.load(f)
+    assert pae_json.keys() == pae.scores.keys()
+    assert np.array_equal(
+        np.array(pae_json["pae"], dtype=np.float32), pae_file.data["pae"]
+    )
+    assert pae_json["atom_plddts"] == pae.scores["atom_plddts"]
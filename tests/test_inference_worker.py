@@ -0,0 +1,41 @@
+import sys
+
+from abcfold.inference_worker import InferenceWorker, submit_job
+
+ECHO_WORKER = """
+import sys
+from multiprocessing.connection import Listener
+
+with Listener(sys.argv[1], family="AF_UNIX") as listener:
+    while True:
+        with listener.accept() as conn:
+            job = conn.recv()
+            if job is None:
+                break
+            conn.send({"success": True, "error": "", "job": job})
+"""
+
+
+class EchoWorker(InferenceWorker):
+    program = "echo"
+
+    def command(self):
+        return [sys.executable, "-c", ECHO_WORKER, str(self.socket)]
+
+
+def test_inference_worker(tmp_path):
+    with EchoWorker("0", log_file=tmp_path.joinpath("echo.log")) as worker:
+        assert worker.alive
+        assert worker.socket.name == "echo_0.sock"
+        assert worker.environment()["CUDA_VISIBLE_DEVICES"] == "0"
+        for i in range(3):
+            reply = worker.submit({"target": i})
+            assert reply["success"]
+            assert reply["job"] == {"target": i}
+        socket_dir = worker.socket.parent
+
+    assert not worker.alive
+    assert not socket_dir.exists()
+    reply = submit_job(worker.socket, {"target": 3})
+    assert not reply["success"]
+    assert "Could not reach the worker" in reply["error"]
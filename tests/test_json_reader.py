@@ -0,0 +1,51 @@
+import json
+
+import numpy as np
+
+from abcfold.output.json_reader import numeric_array, read_json
+
+
+def test_numeric_array():
+    assert np.array_equal(numeric_array("[1, 2, 3]"), np.array([1, 2, 3]))
+    assert numeric_array("[1, 2, 3]").dtype == np.int64
+    assert np.array_equal(
+        numeric_array("[[0.5, 1e-3], [-2, 4.25]]"),
+        np.array([[0.5, 1e-3], [-2, 4.25]]),
+    )
+
+    # Anything that is not a one or two dimensional array of numbers is left to
+    # the json module
+    assert numeric_array("[]") is None
+    assert numeric_array('["A", "B"]') is None
+    assert numeric_array("[1, null]") is None
+    assert numeric_array("[[1, 2], [3]]") is None
+    assert numeric_array("[[[1, 2]], [[3, 4]]]") is None
+    assert numeric_array("[1, [2, 3]]") is None
+
+
+def test_read_json(tmp_path):
+    rng = np.random.default_rng(0)
+    confidences = {
+        "atom_chain_ids": ["A", "A", "B"],
+        "atom_plddts": np.round(rng.uniform(0, 100, 3), 2).tolist(),
+        "contact_probs": np.round(rng.uniform(0, 1, (4, 4)), 2).tolist(),
+        "pae": np.round(rng.uniform(0, 30, (4, 4)), 2).tolist(),
+        "token_chain_ids": ["A", "A", "B", "B"],
+        "token_res_ids": [1, 2, 1, 2],
+        "metadata": {"ragged": [[1], [2, 3]], "name": "a \"quoted\" [name]"},
+    }
+    json_file = tmp_path.joinpath("confidences.json")
+    with open(json_file, "w") as f:
+        json.dump(confidences, f, indent=1)
+
+    data = read_json(json_file)
+    assert list(data) == list(confidences)
+    for key in ("atom_plddts", "contact_probs", "pae", "token_res_ids"):
+        assert isinstance(data[key], np.ndarray)
+        assert np.array_equal(data[key], np.array(confidences[key]))
+    assert data["token_chain_ids"] == confidences["token_chain_ids"]
+    assert data["metadata"] == confidences["metadata"]
+
+    data = read_json(json_file, keys=["pae", "token_chain_ids", "missing"])
+    assert list(data) == ["pae", "token_chain_ids"]
+    assert np.array_equal(data["pae"], np.array(confidences["pae"]))
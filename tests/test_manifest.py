@@ -0,0 +1,82 @@
+import json
+
+from abcfold.output import manifest
+from abcfold.output.manifest import OutputManifest, file_hash
+from abcfold.output.model_summary import ModelRecord
+
+
+def test_output_manifest(tmp_path):
+    output_dir = tmp_path.joinpath("boltz_results_test")
+    output_dir.joinpath("predictions").mkdir(parents=True)
+    model = output_dir.joinpath("predictions", "model_0.cif")
+    pae = output_dir.joinpath("predictions", "pae_model_0.npz")
+    derived = output_dir.joinpath("predictions", "model_0_af3_pae.npz")
+    model.write_text("raw model")
+    pae.write_bytes(b"raw pae")
+
+    output_manifest = OutputManifest(output_dir)
+    assert not output_manifest.is_current([model, pae])
+
+    raw_hash = file_hash(model)
+    output_manifest.record_sources([model, pae])
+    model.write_text("normalized model")
+    derived.write_bytes(b"derived pae")
+    record = ModelRecord(
+        model, "Boltz-1_0", ["A", "B"], {"B": 2, "A": 3}, 71.5, 60, 4, 1
+    )
+    record.derived["af3_pae"] = derived
+    output_manifest.write([record])
+
+    with open(output_manifest.pathway) as f:
+        written = json.load(f)
+    assert written["version"] == manifest.NORMALIZATION_VERSION
+    assert written["sources"]["predictions/model_0.cif"]["source"] == raw_hash
+    assert written["sources"]["predictions/model_0.cif"]["normalized"] == {
+        "hash": file_hash(model),
+        "size": model.stat().st_size,
+        "mtime_ns": model.stat().st_mtime_ns,
+    }
+    assert written["sources"]["predictions/pae_model_0.npz"]["source"] == file_hash(
+        pae
+    )
+    assert written["derived"]["predictions/model_0_af3_pae.npz"]["hash"] == (
+        file_hash(derived)
+    )
+    assert written["models"]["predictions/model_0.cif"]["derived"] == {
+        "af3_pae": "predictions/model_0_af3_pae.npz"
+    }
+
+    output_manifest = OutputManifest(output_dir)
+    assert output_manifest.is_current([model, pae], [model])
+    loaded = output_manifest.records()[model]
+    assert loaded.to_dict(output_dir) == record.to_dict(output_dir)
+    assert list(loaded.chain_lengths) == ["B", "A"]
+    assert loaded.derived == {"af3_pae": derived}
+
+    # Every model needs a record
+    assert not OutputManifest(output_dir).is_current([model, pae], [model, pae])
+
+    # The manifest holds relative paths, so it survives renaming the directory
+    renamed = output_dir.rename(tmp_path.joinpath("boltz-1_test"))
+    model = renamed.joinpath("predictions", "model_0.cif")
+    pae = renamed.joinpath("predictions", "pae_model_0.npz")
+    derived = renamed.joinpath("predictions", "model_0_af3_pae.npz")
+    assert OutputManifest(renamed).is_current([model, pae])
+
+    # A new source file, a changed file or a missing derived file invalidate it
+    assert not OutputManifest(renamed).is_current([model])
+    model.write_text("new model")
+    assert not OutputManifest(renamed).is_current([model, pae])
+    # A file rewritten with the same contents is hashed and still matches
+    model.write_text("normalized model")
+    assert OutputManifest(renamed).is_current([model, pae])
+    derived.unlink()
+    assert not OutputManifest(renamed).is_current([model, pae])
+    derived.write_bytes(b"derived pae")
+    assert OutputManifest(renamed).is_current([model, pae])
+
+    manifest.NORMALIZATION_VERSION += 1
+    try:
+        assert not OutputManifest(renamed).is_current([model, pae])
+    finally:
+        manifest.NORMALIZATION_VERSION -= 1
@@ -0,0 +1,81 @@
+import pickle
+from pathlib import Path
+
+import numpy as np
+
+from abcfold.html.html_utils import get_model_sequence_data
+from abcfold.output.file_handlers import CifFile
+from abcfold.output.model_summary import (ModelRecord, ModelSummary,
+                                          align_model_summaries,
+                                          merge_sequence_data,
+                                          summaries_by_method)
+from abcfold.output.utils import get_aligned_plddts
+
+
+def test_model_summary(test_data):
+    cif_files = [
+        CifFile(
+            Path(test_data.test_boltz_1_6BJ9_).joinpath(
+                "predictions", "test_mmseqs", "test_mmseqs_model_0.cif"
+            )
+        ),
+        CifFile(Path(test_data.test_chai1_6BJ9_).joinpath("pred.model_idx_0.cif")),
+    ]
+    expected_plddts = get_aligned_plddts(*cif_files)
+    expected_sequence_data = get_model_sequence_data(cif_files)
+
+    summaries = []
+    for cif_file, method in zip(cif_files, ("Boltz-1", "Chai-1")):
+        summary = ModelSummary(cif_file, method)
+        assert summary.name == cif_file.name
+        assert summary.pathway == cif_file.pathway
+        assert summary.average_plddt == cif_file.average_plddt
+        assert summary.h_score == cif_file.h_score
+        assert summary.clashes == cif_file.clashes
+        assert summary.token_sequences() == cif_file.token_sequences()
+        assert summary.get_plddt_per_residue() == cif_file.get_plddt_per_residue()
+        summaries.append(summary)
+
+        # The model is read from its file again if it is needed after release
+        chain_ids = cif_file.chain_ids
+        cif_file.release()
+        assert cif_file.chain_ids == chain_ids
+
+    np.testing.assert_array_equal(align_model_summaries(summaries), expected_plddts)
+    np.testing.assert_array_equal(summaries[1].aligned_plddts, expected_plddts[1])
+    assert (
+        merge_sequence_data(summary.sequence_data for summary in summaries)
+        == expected_sequence_data
+    )
+    assert summaries_by_method(summaries) == {
+        "Boltz-1": [summaries[0]],
+        "Chai-1": [summaries[1]],
+    }
+
+
+def test_model_record(test_data):
+    cif_file = CifFile(
+        Path(test_data.test_boltz_1_6BJ9_).joinpath(
+            "predictions", "test_mmseqs", "test_mmseqs_model_1.cif"
+        )
+    )
+    cif_file.name = "Boltz-1_1"
+    record = ModelRecord.from_cif(cif_file)
+    assert record.name == "Boltz-1_1"
+    assert record.chain_ids == cif_file.chain_ids
+    assert record.chain_lengths == cif_file.chain_lengths()
+    assert record.average_plddt == cif_file.average_plddt
+    assert record.h_score == cif_file.h_score
+    assert (record.clashes, record.clashes_residues) == (
+        cif_file.clashes,
+        cif_file.clashes_residues,
+    )
+
+    # The record is sent back from the worker processes instead of the model
+    assert len(pickle.dumps(record)) < len(pickle.dumps(cif_file)) / 100
+
+    handle = record.cif_file()
+    assert not handle.loaded
+    assert handle.name == "Boltz-1_1"
+    assert handle.clashes == record.clashes
+    assert handle.chain_ids == record.chain_ids
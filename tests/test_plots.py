@@ -2,7 +2,8 @@ import tempfile
 from pathlib import Path
 
 from abcfold.html.html_utils import get_model_sequence_data
-from abcfold.plots.pae_plot import create_pae_plots
+from abcfold.output.file_handlers import CifFile
+from abcfold.plots.pae_plot import clashes_csv, create_pae_plots
 from abcfold.plots.plddt_plot import plot_plddt
 
 
@@ -100,3 +101,19 @@ KTLGLDESKVNIHGGAVSLGHPIGMSGARIVGHLVHTLKPGQKGCAAICNGGGGAGGMIIEKL",
         "C": "NCNCCCNNCNCCOCOPOOOCOCOPOOOPOOOCCCCCOCONCCCONCCSCOC",
         "D": "NCNCCCNNCNCCOCOPOOOCOCOPOOOPOOOCCCCCOCONCCCONCCSCOC",
     }
+
+
+def test_clashes_csv(test_data, tmp_path):
+    cif_file = CifFile(
+        Path(test_data.test_boltz_1_6BJ9_).joinpath(
+            "predictions/test_mmseqs/test_mmseqs_model_1.cif"
+        )
+    )
+    clashes_csv(cif_file, tmp_path / "clashes.csv")
+
+    assert (tmp_path / "clashes.csv").read_text().splitlines() == [
+        "Protein1,SeqPos1,Protein2,SeqPos2,RestraintSatisfied",
+        "Chain-A,281,Chain-B,2,False",
+        "Chain-A,2,Chain-B,281,False",
+        "Chain-A,93,Chain-B,70,False",
+    ]
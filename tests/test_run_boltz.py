@@ -1,5 +1,7 @@
 import os
 import tempfile
+import threading
+from multiprocessing.connection import Listener
 
 import pytest
 
@@ -36,3 +38,48 @@ def test_generate_boltz_command():
     assert input_yaml in cmd
     assert output_dir in cmd
     assert "--override" in cmd
+
+
+def test_run_boltz_worker(test_data, tmp_path):
+    worker_socket = tmp_path.joinpath("boltz.sock")
+    output_dir = tmp_path.joinpath("output")
+    output_dir.mkdir()
+    jobs = []
+
+    def worker(listener):
+        for success in (True, False):
+            with listener.accept() as conn:
+                job = conn.recv()
+                jobs.append(job)
+                results_dir = job["output_dir"].joinpath(
+                    f"boltz_results_{job['input_yaml'].stem}"
+                )
+                conn.send(
+                    {
+                        "success": success,
+                        "error": "" if success else "CUDA out of memory",
+                        "output_dir": str(results_dir) if success else "",
+                    }
+                )
+
+    with Listener(str(worker_socket), family="AF_UNIX") as listener:
+        thread = threading.Thread(target=worker, args=(listener,))
+        thread.start()
+        assert run_boltz(
+            test_data.test_inputA_json,
+            output_dir,
+            number_of_models=2,
+            num_recycles=3,
+            worker_socket=worker_socket,
+        )
+        assert not run_boltz(
+            test_data.test_inputA_json, output_dir, worker_socket=worker_socket
+        )
+        thread.join()
+
+    assert jobs[0]["input_yaml"].name == "inputA.yaml"
+    assert jobs[0]["output_dir"] == output_dir
+    assert jobs[0]["diffusion_samples"] == 2
+    assert jobs[0]["recycling_steps"] == 3
+    assert jobs[1]["diffusion_samples"] == 5
+    assert output_dir.joinpath("boltz_error.log").read_text() == "CUDA out of memory"
@@ -1,5 +1,7 @@
 import os
 import tempfile
+import threading
+from multiprocessing.connection import Listener
 
 import pytest
 
@@ -58,3 +60,46 @@ def test_run_chai(test_data):
         except Exception as e:
             print(e)
             assert False
+
+
+def test_run_chai_worker(test_data, tmp_path):
+    from abcfold.chai1.run_chai1 import run_chai
+
+    worker_socket = tmp_path.joinpath("chai.sock")
+    replies = [{"success": True, "error": ""}, {"success": False, "error": "OOM"}]
+    jobs = []
+
+    def worker(listener):
+        for reply in replies:
+            with listener.accept() as conn:
+                jobs.append(conn.recv())
+                conn.send(reply)
+
+    with Listener(str(worker_socket), family="AF_UNIX") as listener:
+        thread = threading.Thread(target=worker, args=(listener,))
+        thread.start()
+        assert run_chai(
+            test_data.test_inputA_json,
+            tmp_path.joinpath("first"),
+            number_of_models=3,
+            worker_socket=worker_socket,
+        )
+        assert not run_chai(
+            test_data.test_inputA_json,
+            tmp_path.joinpath("second"),
+            worker_socket=worker_socket,
+        )
+        thread.join()
+
+    assert jobs[0]["output_dir"] == tmp_path.joinpath("first")
+    assert jobs[0]["fasta_file"].suffix == ".fasta"
+    assert jobs[0]["num_diffn_samples"] == 3
+    assert jobs[1]["num_diffn_samples"] == 5
+    assert tmp_path.joinpath("chai_error.log").read_text() == "OOM"
+
+    # A worker that is no longer running fails the prediction
+    assert not run_chai(
+        test_data.test_inputA_json,
+        tmp_path.joinpath("third"),
+        worker_socket=worker_socket,
+    )
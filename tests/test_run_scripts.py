@@ -43,3 +43,17 @@ def test_add_mmseqs_msa_script():
         assert (
             b"usage: add_mmseqs_msa" in stdout
         ), f"stdout: {stdout.decode()}\nstderr: {stderr.decode()}"
+
+
+def test_batch_script():
+    with subprocess.Popen(
+        "python -m abcfold.scripts.batch --help",
+        shell=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    ) as p:
+        stdout, stderr = p.communicate()
+        assert p.returncode == 0, f"Return code: {p.returncode}\n{stderr.decode()}"
+        assert (
+            b"usage: batch" in stdout
+        ), f"stdout: {stdout.decode()}\nstderr: {stderr.decode()}"
@@ -2,8 +2,17 @@ import json
 import tempfile
 from pathlib import Path
 
+import numpy as np
+from Bio.PDB import MMCIFParser
+
+from abcfold.output.atom_table import AtomTable
 from abcfold.output.file_handlers import CifFile, ConfidenceJsonFile
-from abcfold.output.utils import Af3Pae
+from abcfold.output.mmcif_reader import read_mmcif
+from abcfold.output.mmcif_writer import write_mmcif
+from abcfold.output.pae_scores import contact_probs
+from abcfold.output.utils import (Af3Pae, align_plddts, chain_permutation,
+                                  get_gap_indicies, insert_none_by_minus_one,
+                                  map_models)
 from abcfold.scripts.abc_script_utils import (align_and_map, check_input_json,
                                               extract_sequence_from_mmcif,
                                               get_chains, get_mmcif)
@@ -113,3 +122,110 @@ def test_af3_pae_reorder(test_data):
             pae_obj.scores["token_chain_ids"][787 + 50 :]  # noqa: E203
             == pae_to_compare_tci[:51]
         )
+
+
+def test_read_mmcif(test_data):
+    mmcif_data = read_mmcif(
+        test_data.test_6BJ9_cif, categories=("_atom_site", "_entry")
+    )
+    assert mmcif_data.data_id == "6BJ9"
+    assert mmcif_data.items["_entry.id"] == ["6BJ9"]
+    assert len(mmcif_data.atom_site["Cartn_x"]) == 12354
+
+    # Waters and ligands listed after both chains are merged into their chain
+    atom_table = AtomTable.from_atom_site(mmcif_data.atom_site)
+    structure = MMCIFParser(QUIET=True).get_structure("6BJ9", test_data.test_6BJ9_cif)
+    bio_atom_table = AtomTable.from_structure(structure)
+
+    assert atom_table.chain_ids == bio_atom_table.chain_ids == ["A", "B"]
+    assert (atom_table.coords == bio_atom_table.coords).all()
+    assert (atom_table.atom_name == bio_atom_table.atom_name).all()
+    assert (atom_table.residue_hetflag == bio_atom_table.residue_hetflag).all()
+
+
+def test_chain_permutation():
+    chain_lengths = (("B", 2), ("A", 3), ("C", 1))
+    af3_chain_lengths = (("A", 3), ("B", 2), ("C", 1))
+    order = chain_permutation(chain_lengths, af3_chain_lengths)
+    assert order.tolist() == [3, 4, 0, 1, 2, 5]
+    assert chain_permutation(chain_lengths, af3_chain_lengths) is order
+
+    token_chains = np.array(["A", "A", "A", "B", "B", "C"])
+    pae = np.equal.outer(token_chains, token_chains).astype(float)
+    reordered = pae[np.ix_(order, order)]
+    assert (np.diag(reordered) == 1).all()
+    assert reordered[0, 1] == 1 and reordered[1, 2] == 0
+
+    # Chains of the model without PAE tokens are left out of the permutation
+    chain_lengths = (("B", 2), ("L", 4), ("A", 3), ("C", 1))
+    order = chain_permutation(chain_lengths, af3_chain_lengths)
+    assert order.tolist() == [3, 4, 0, 1, 2, 5]
+    assert pae[np.ix_(order, order)].shape == (6, 6)
+
+
+def test_contact_probs():
+    pae = np.zeros((3, 3))
+    assert contact_probs({"pae": pae}) is None
+    assert contact_probs({"pae": pae, "contact_probs": []}) is None
+
+    dense = np.array([[1.0, 0.5, 0.0], [0.5, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    assert np.array_equal(contact_probs({"pae": pae, "contact_probs": dense}), dense)
+
+
+def test_get_gap_indicies(test_data, tmp_path):
+    input_params = {"sequences": [{"ligand": {"id": ["C", "D"]}}]}
+    cif_file = CifFile(
+        Path(test_data.test_boltz_1_6BJ9_).joinpath(
+            "predictions/test_mmseqs/test_mmseqs_model_0.cif"
+        ),
+        input_params,
+    )
+    atom_table = cif_file.atom_table
+
+    # remove the 10th residue of chain A and two atoms of ligand C
+    keep = atom_table.residue_index != 9
+    keep[np.flatnonzero(atom_table.chain_mask("C"))[3:5]] = False
+    write_mmcif(atom_table.select(keep), tmp_path / "gapped.cif", "gapped")
+    gapped = CifFile(tmp_path / "gapped.cif", input_params)
+
+    indicies = get_gap_indicies(cif_file, gapped, gapped)
+    assert [len(index) for index in indicies] == [888, 888, 888]
+    assert (indicies[0] != -1).all()
+    # identical neighbouring tokens may take the gap, so only count them
+    gaps = np.flatnonzero(indicies[1] == -1)
+    assert len(gaps) == 3 and gaps[0] < 20 and (gaps[1:] >= 789).all()
+    assert (indicies[1] == indicies[2]).all()
+
+    plddts = insert_none_by_minus_one(indicies[1], gapped.residue_plddts)
+    assert sum(plddt is None for plddt in plddts) == 3
+    assert [plddt for plddt in plddts if plddt is not None] == gapped.residue_plddts
+
+
+def test_align_plddts():
+    indicies = [np.array([0, 1, 2, 3]), np.array([0, -1, 1, 2]), np.array([0, 1])]
+    plddts = [[10.0, 20.0, 30.0, 40.0], np.array([50.0, 60.0, 70.0]), [80.0, 90.0]]
+
+    aligned = align_plddts(plddts, indicies)
+    assert aligned.shape == (3, 4)
+    np.testing.assert_array_equal(
+        aligned,
+        [
+            [10.0, 20.0, 30.0, 40.0],
+            [50.0, np.nan, 60.0, 70.0],
+            [80.0, 90.0, np.nan, np.nan],
+        ],
+    )
+    for row, index, plddt in zip(aligned, indicies, plddts):
+        assert [
+            None if np.isnan(value) else value for value in row[: len(index)]
+        ] == insert_none_by_minus_one(index, plddt)
+
+    # a single model needs no alignment
+    np.testing.assert_array_equal(align_plddts([[1.0, 2.0]], []), [[1.0, 2.0]])
+
+
+def test_map_models():
+    tasks = [(7, 2), (9, 4), (5, 5)]
+    assert map_models(divmod, tasks) == [(3, 1), (2, 1), (1, 0)]
+    assert map_models(divmod, tasks, workers=2) == map_models(divmod, tasks)
+    assert map_models(divmod, [], workers=2) == []